@@ -0,0 +1,282 @@
+"""Per-device on-disk cache of document cover thumbnails.
+
+xochitl keeps one ``<uuid>.thumbnails`` directory per document.  The cover
+wall used to list each directory and download a full thumbnail for every
+document, one after another, before its dialog could open.  Covers are now
+described by a ``CoverSource`` (which file, at what mtime and size), and the
+cache keeps a verified, downscaled PNG per document under a name that
+includes that stamp.  A thumbnail rewritten on the device gets a new stamp
+and misses, so entries never need invalidating, and the cache is capped in
+bytes with least-recently-used eviction.  ``fetch_covers`` downloads
+the misses in bounded batches and decodes one batch while the next one is
+being read, yielding results as they arrive.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import posixpath
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from PIL import Image
+
+from _state_files import SharedInstances, safe_name, write_atomic
+
+COVER_CACHE_DIR_NAME = "cover-cache"
+THUMBNAIL_SUFFIXES = (".png", ".jpg", ".jpeg", ".thumbnail")
+# Covers are composed onto wallpapers up to about a third of the screen
+# wide, so keeping more pixels than this only costs disk and decode time.
+COVER_MAX_SIZE = 640
+FETCH_BATCH_SIZE = 48
+DECODE_WORKERS = 4
+COVER_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Evict down to this share of the cap so a full cache does not evict on
+# every store.
+_PRUNE_TARGET = 0.8
+
+CoverReader = Callable[[Sequence["CoverSource"]], Dict[str, Optional[bytes]]]
+
+
+@dataclass(frozen=True)
+class CoverSource:
+    """The thumbnail file chosen as a document's cover."""
+
+    identifier: str
+    path: str
+    mtime: int
+    size: int
+
+    @property
+    def stamp(self) -> str:
+        return f"{self.mtime}-{self.size}"
+
+
+def is_thumbnail_name(filename: str) -> bool:
+    return filename.lower().endswith(THUMBNAIL_SUFFIXES)
+
+
+def pick_cover_name(filenames: Iterable[str]) -> Optional[str]:
+    """Return the thumbnail used as cover: the first supported name in order."""
+    names = sorted(name for name in filenames if is_thumbnail_name(name))
+    return names[0] if names else None
+
+
+def parse_thumbnail_listing(output: str, root: str) -> Dict[str, CoverSource]:
+    """Map document ids to their cover from ``<mtime> <size> <path>`` lines.
+
+    *output* lists thumbnail files relative to *root*, as printed by
+    ``stat -c '%Y %s %n'`` from inside it; other lines are ignored.
+    """
+    files: Dict[str, Dict[str, tuple]] = {}
+    for line in output.splitlines():
+        parts = line.split(" ", 2)
+        if len(parts) != 3 or not parts[0].isdigit() or not parts[1].isdigit():
+            continue
+        relative = parts[2][2:] if parts[2].startswith("./") else parts[2]
+        directory, _sep, filename = relative.rpartition("/")
+        if not directory.endswith(".thumbnails") or "/" in directory:
+            continue
+        identifier = directory[: -len(".thumbnails")]
+        files.setdefault(identifier, {})[filename] = (int(parts[0]), int(parts[1]))
+    sources = {}
+    for identifier, entries in files.items():
+        name = pick_cover_name(entries)
+        if name is not None:
+            mtime, size = entries[name]
+            path = posixpath.join(root, f"{identifier}.thumbnails", name)
+            sources[identifier] = CoverSource(identifier, path, mtime, size)
+    return sources
+
+
+def normalise_cover(data: Optional[bytes]) -> Optional[bytes]:
+    """Return *data* as a PNG no larger than ``COVER_MAX_SIZE``, or ``None``.
+
+    Empty, truncated or otherwise undecodable thumbnails are unusable.
+    """
+    if not data:
+        return None
+    try:
+        with Image.open(BytesIO(data)) as image:
+            image.load()
+            if image.mode not in ("L", "RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+            image.thumbnail((COVER_MAX_SIZE, COVER_MAX_SIZE), Image.LANCZOS)
+            buffer = BytesIO()
+            image.save(buffer, "PNG")
+    except Exception:
+        return None
+    return buffer.getvalue()
+
+
+class CoverCache:
+    """Normalised covers of one device, stored as PNG files under *directory*.
+
+    The directory is scanned once, on first use; after that an in-memory
+    index answers which stamp of each document is stored and how many bytes
+    the cache holds.  Past *max_bytes* the least recently used covers are
+    removed, file mtimes recording the last use across sessions.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = COVER_CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # safe document name -> [stamp, size, last use]
+        self._index: Optional[Dict[str, list]] = None
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, name: str, stamp: str) -> Path:
+        return self.directory / f"{name}@{stamp}.png"
+
+    def _load(self) -> Dict[str, list]:
+        if self._index is not None:
+            return self._index
+        index: Dict[str, list] = {}
+        paths = self.directory.glob("*@*.png") if self.directory.is_dir() else ()
+        for path in paths:
+            name, _sep, stamp = path.name[: -len(".png")].rpartition("@")
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entry = [stamp, stat.st_size, stat.st_mtime]
+            previous = index.get(name)
+            # Only the newest stamp of a document is kept.
+            if previous is not None and previous[2] > entry[2]:
+                previous, entry = entry, previous
+            if previous is not None:
+                self._unlink(self._path(name, previous[0]))
+            index[name] = entry
+        self._index = index
+        self._total = sum(entry[1] for entry in index.values())
+        return index
+
+    @staticmethod
+    def _unlink(path: Path) -> None:
+        try:
+            path.unlink(missing_ok=True)
+        except OSError:
+            logging.warning("Could not remove cached cover %s", path)
+
+    def get(self, source: CoverSource) -> Optional[bytes]:
+        """Return the cached cover for *source*, if its stamp still matches."""
+        name = safe_name(source.identifier)
+        with self._lock:
+            entry = self._load().get(name)
+            if entry is None or entry[0] != source.stamp:
+                self.misses += 1
+                return None
+        path = self._path(name, source.stamp)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            entry[2] = time.time()
+        return data
+
+    def put(self, source: CoverSource, data: bytes) -> None:
+        """Store the normalised cover *data*, replacing older stamps of the document."""
+        name = safe_name(source.identifier)
+        path = self._path(name, source.stamp)
+        try:
+            write_atomic(path, data)
+        except OSError:
+            logging.warning("Could not store cover of %s", source.identifier, exc_info=True)
+            return
+        with self._lock:
+            index = self._load()
+            previous = index.get(name)
+            if previous is not None:
+                self._total -= previous[1]
+                if previous[0] != source.stamp:
+                    self._unlink(self._path(name, previous[0]))
+            index[name] = [source.stamp, len(data), time.time()]
+            self._total += len(data)
+            if self._total > self.max_bytes:
+                self._evict(int(self.max_bytes * _PRUNE_TARGET))
+
+    def _evict(self, target: int) -> None:
+        for name, entry in sorted(self._index.items(), key=lambda item: item[1][2]):
+            if self._total <= target:
+                break
+            self._unlink(self._path(name, entry[0]))
+            del self._index[name]
+            self._total -= entry[1]
+
+    def size(self) -> int:
+        """Return the bytes currently used by cached covers."""
+        with self._lock:
+            self._load()
+            return self._total
+
+    def clear(self) -> None:
+        """Remove every cached cover."""
+        with self._lock:
+            for name, entry in self._load().items():
+                self._unlink(self._path(name, entry[0]))
+            self._index = {}
+            self._total = 0
+
+
+def fetch_covers(
+    sources: Sequence[CoverSource],
+    read: CoverReader,
+    cache: Optional[CoverCache] = None,
+    batch_size: Optional[int] = None,
+) -> Iterator[Dict[str, Optional[bytes]]]:
+    """Download, normalise and cache *sources*, yielding one dict per batch.
+
+    *read* fetches the raw bytes of one batch, keyed by remote path.  While
+    it runs, the previous batch is decoded on a small thread pool.  Each
+    yielded dict maps document ids to their normalised cover, or ``None``
+    when the thumbnail could not be read or decoded.
+    """
+    sources = list(sources)
+    step = max(1, FETCH_BATCH_SIZE if batch_size is None else batch_size)
+    batches = [sources[start:start + step] for start in range(0, len(sources), step)]
+    if not batches:
+        return
+
+    def decode(batch: List[CoverSource], contents: Dict[str, Optional[bytes]]):
+        return [(source, normalise_cover(contents.get(source.path))) for source in batch]
+
+    def collect(results) -> Dict[str, Optional[bytes]]:
+        covers = {}
+        for source, cover in results:
+            if cover is not None and cache is not None:
+                cache.put(source, cover)
+            covers[source.identifier] = cover
+        return covers
+
+    with ThreadPoolExecutor(max_workers=DECODE_WORKERS, thread_name_prefix="rmtool-cover") as pool:
+        pending = None
+        for batch in batches:
+            contents = read(batch)
+            chunks = [batch[index::DECODE_WORKERS] for index in range(DECODE_WORKERS)]
+            decoding = [pool.submit(decode, chunk, contents) for chunk in chunks if chunk]
+            if pending is not None:
+                yield collect(result for future in pending for result in future.result())
+            pending = decoding
+        yield collect(result for future in pending for result in future.result())
+
+
+_caches: SharedInstances[CoverCache] = SharedInstances(CoverCache)
+
+
+def cache_for_device(state_dir: Path, device_key: str) -> CoverCache:
+    """Return the shared ``CoverCache`` for *device_key* under *state_dir*."""
+    return _caches.get(Path(state_dir) / COVER_CACHE_DIR_NAME / safe_name(device_key))
@@ -0,0 +1,143 @@
+"""Per-device on-disk cache of parsed document ``.metadata`` files.
+
+Listing the document root is one SFTP request, but opening and parsing every
+``.metadata`` file costs a round trip per notebook.  ``DocumentIndex`` keeps
+the parsed metadata keyed by filename together with the ``st_mtime`` and
+``st_size`` it was read at, so a refresh only re-reads files whose stat
+changed.  A missing, unreadable or outdated index file simply starts empty,
+which is the same as a full rebuild; see ``_state_files`` for how the
+caches treat I/O errors.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from _state_files import SharedInstances, safe_name, write_atomic
+
+INDEX_VERSION = 1
+INDEX_DIR_NAME = "document-index"
+
+MetadataReader = Callable[[List[str]], Dict[str, Optional[object]]]
+
+
+def _stat_key(entry) -> Optional[list]:
+    mtime = getattr(entry, "st_mtime", None)
+    size = getattr(entry, "st_size", None)
+    if mtime is None or size is None:
+        return None
+    return [int(mtime), int(size)]
+
+
+class DocumentIndex:
+    """Cached metadata for one device, persisted as JSON at *path*."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, dict]] = None
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(
+        self, entries: Iterable[object], read_metadata: MetadataReader
+    ) -> Dict[str, object]:
+        """Return parsed metadata for every ``.metadata`` entry in *entries*.
+
+        *entries* are ``listdir_attr`` results for the document root.  Files
+        whose cached stat still matches are answered from the index; the rest
+        are passed in one list to *read_metadata*, which maps each filename
+        to its parsed metadata or ``None`` when it could not be read.
+        Unreadable files are reported as ``{}`` and left out of the index so
+        the next refresh tries again.
+        """
+        with self._lock:
+            cached = self._load()
+            current: Dict[str, dict] = {}
+            results: Dict[str, object] = {}
+            stale: Dict[str, Optional[list]] = {}
+            for entry in entries:
+                filename = entry.filename
+                if not filename.endswith(".metadata"):
+                    continue
+                stat_key = _stat_key(entry)
+                record = cached.get(filename)
+                if stat_key is not None and record and record.get("stat") == stat_key:
+                    self.hits += 1
+                    current[filename] = record
+                    results[filename] = record.get("metadata")
+                else:
+                    stale[filename] = stat_key
+            self.misses += len(stale)
+            fresh = read_metadata(list(stale)) if stale else {}
+            changed = False
+            for filename, stat_key in stale.items():
+                metadata = fresh.get(filename)
+                if metadata is None:
+                    results[filename] = {}
+                    continue
+                results[filename] = metadata
+                if stat_key is not None:
+                    current[filename] = {"stat": stat_key, "metadata": metadata}
+                    changed = True
+            if changed or current.keys() != cached.keys():
+                self._entries = current
+                self._save(current)
+            return results
+
+    def clear(self) -> None:
+        """Forget every cached entry so the next ``resolve`` reads all files."""
+        with self._lock:
+            self._entries = {}
+            try:
+                self.path.unlink(missing_ok=True)
+            except OSError:
+                logging.warning("Could not remove document index %s", self.path)
+
+    def _load(self) -> Dict[str, dict]:
+        if self._entries is not None:
+            return self._entries
+        self._entries = {}
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return self._entries
+        except (OSError, ValueError):
+            logging.warning("Document index %s is unreadable; rebuilding", self.path)
+            return self._entries
+        if (
+            not isinstance(data, dict)
+            or data.get("version") != INDEX_VERSION
+            or not isinstance(data.get("entries"), dict)
+        ):
+            logging.info("Document index %s is outdated; rebuilding", self.path)
+            return self._entries
+        self._entries = {
+            filename: record
+            for filename, record in data["entries"].items()
+            if isinstance(record, dict) and isinstance(record.get("stat"), list)
+        }
+        return self._entries
+
+    def _save(self, entries: Dict[str, dict]) -> None:
+        try:
+            payload = json.dumps(
+                {"version": INDEX_VERSION, "entries": entries},
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+            write_atomic(self.path, payload.encode("utf-8"))
+        except (OSError, TypeError, ValueError):
+            logging.warning("Could not save document index %s", self.path, exc_info=True)
+
+
+_indexes: SharedInstances[DocumentIndex] = SharedInstances(DocumentIndex)
+
+
+def index_for_device(state_dir: Path, device_key: str) -> DocumentIndex:
+    """Return the shared ``DocumentIndex`` for *device_key* under *state_dir*."""
+    return _indexes.get(Path(state_dir) / INDEX_DIR_NAME / f"{safe_name(device_key)}.json")
@@ -0,0 +1,243 @@
+"""Per-device local mirror of notebook sources used by PDF export.
+
+Exporting a notebook needs its ``<uuid>`` page directory plus the
+``.content`` file and any ``.note``/``.zip`` archive.  Instead of pulling all
+of them into a fresh temp directory every time, ``NotebookMirror`` keeps a
+copy under the app state directory and syncs it: files whose size and
+``st_mtime`` match the device are reused, files whose size matches but whose
+mtime differs are compared by SHA-256 in one batched probe, and only the
+rest are downloaded.  Local files that disappeared on the device are
+removed.  Downloaded files take the remote mtime, so the next sync can
+compare stats without a manifest.
+
+Each device's mirrors are capped at ``MIRROR_MAX_BYTES``: after a sync the
+least recently synced notebooks are dropped, whole, until the rest fit.
+Mirrors of notebooks deleted on the device are removed by
+``prune_mirrors`` once a document listing no longer contains them.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import shutil
+import stat
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from _remote_probe import PROBE_SHA256, probe_remote
+from _state_files import SharedInstances, atomic_path, safe_name
+
+MIRROR_DIR_NAME = "export-mirror"
+MIRROR_MAX_BYTES = 1024 * 1024 * 1024
+
+
+@dataclass
+class SyncResult:
+    """Relative paths touched by :meth:`NotebookMirror.sync`."""
+
+    downloaded: Set[str] = field(default_factory=set)
+    removed: Set[str] = field(default_factory=set)
+    reused: int = 0
+
+    @property
+    def changed(self) -> Set[str]:
+        return self.downloaded | self.removed
+
+
+def _local_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class NotebookMirror:
+    """Local copy of one notebook's export sources under *root*.
+
+    Hold :attr:`lock` while syncing and while reading the files so two
+    exports of the same notebook do not overwrite each other's input.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.lock = threading.Lock()
+
+    def sync(self, ssh_client, sftp, remote_root: str, entries: Iterable[object]) -> SyncResult:
+        """Bring the mirror in line with *entries* below *remote_root*.
+
+        *entries* are ``listdir_attr`` results from *remote_root*; directories
+        among them are walked recursively.
+        """
+        remote = self._remote_files(sftp, remote_root, entries)
+        # The root exists even when the device has no files for the
+        # notebook, so the renderer reports missing pages, not a bad source.
+        self.root.mkdir(parents=True, exist_ok=True)
+        local = self._local_files()
+        result = SyncResult()
+
+        pending: List[str] = []
+        ambiguous: List[str] = []
+        for relative, attr in remote.items():
+            local_stat = local.get(relative)
+            remote_size = getattr(attr, "st_size", None)
+            remote_mtime = getattr(attr, "st_mtime", None)
+            if local_stat is None or remote_size is None or local_stat.st_size != remote_size:
+                pending.append(relative)
+            elif remote_mtime is not None and int(local_stat.st_mtime) == int(remote_mtime):
+                result.reused += 1
+            else:
+                ambiguous.append(relative)
+
+        if ambiguous:
+            paths = {relative: f"{remote_root}/{relative}" for relative in ambiguous}
+            hashes = probe_remote(ssh_client, [(PROBE_SHA256, path) for path in paths.values()])
+            for relative in ambiguous:
+                path = self.root / relative
+                try:
+                    same = hashes.sha256(paths[relative]) == _local_sha256(path)
+                except (OSError, RuntimeError):
+                    same = False
+                if same:
+                    self._stamp(path, remote[relative])
+                    result.reused += 1
+                else:
+                    pending.append(relative)
+
+        for relative in pending:
+            self._download(sftp, f"{remote_root}/{relative}", self.root / relative, remote[relative])
+            result.downloaded.add(relative)
+
+        for relative in local.keys() - remote.keys():
+            try:
+                (self.root / relative).unlink()
+            except OSError:
+                logging.warning("Could not remove stale mirror file %s", relative)
+                continue
+            result.removed.add(relative)
+        self._prune_empty_dirs()
+        # The root's mtime records the last sync, for trim_mirrors.
+        os.utime(self.root)
+        return result
+
+    def _remote_files(self, sftp, remote_root: str, entries: Iterable[object]) -> Dict[str, object]:
+        files: Dict[str, object] = {}
+        stack = [("", list(entries))]
+        while stack:
+            prefix, listing = stack.pop()
+            for entry in listing:
+                relative = f"{prefix}{entry.filename}"
+                if stat.S_ISDIR(getattr(entry, "st_mode", None) or 0):
+                    stack.append((f"{relative}/", sftp.listdir_attr(f"{remote_root}/{relative}")))
+                else:
+                    files[relative] = entry
+        return files
+
+    def _local_files(self) -> Dict[str, os.stat_result]:
+        files: Dict[str, os.stat_result] = {}
+        if not self.root.is_dir():
+            return files
+        for directory, _dirnames, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.startswith(".") and name.endswith(".part"):
+                    continue
+                path = Path(directory) / name
+                files[path.relative_to(self.root).as_posix()] = path.stat()
+        return files
+
+    @staticmethod
+    def _stamp(path: Path, attr) -> None:
+        mtime = getattr(attr, "st_mtime", None)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    def _download(self, sftp, remote_path: str, local_path: Path, attr) -> None:
+        with atomic_path(local_path, suffix=".part") as temp_path:
+            sftp.get(remote_path, str(temp_path))
+        self._stamp(local_path, attr)
+
+    def _prune_empty_dirs(self) -> None:
+        if not self.root.is_dir():
+            return
+        for directory, _dirnames, _filenames in os.walk(self.root, topdown=False):
+            path = Path(directory)
+            if path == self.root:
+                continue
+            try:
+                path.rmdir()
+            except OSError:
+                pass
+
+    def size(self) -> int:
+        """Return the bytes used by the mirrored files."""
+        return sum(local_stat.st_size for local_stat in self._local_files().values())
+
+    def clear(self) -> None:
+        """Delete the mirrored files."""
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+_mirrors: SharedInstances[NotebookMirror] = SharedInstances(NotebookMirror)
+
+
+def device_mirrors_dir(state_dir: Path, device_key: str) -> Path:
+    """Return the directory holding every notebook mirror of *device_key*."""
+    return Path(state_dir) / MIRROR_DIR_NAME / safe_name(device_key)
+
+
+def mirror_for(state_dir: Path, device_key: str, identifier: str) -> NotebookMirror:
+    """Return the shared mirror of notebook *identifier* on *device_key*."""
+    return _mirrors.get(device_mirrors_dir(state_dir, device_key) / safe_name(identifier))
+
+
+def _device_mirrors(directory: Path) -> List[NotebookMirror]:
+    if not directory.is_dir():
+        return []
+    return [_mirrors.get(path) for path in directory.iterdir() if path.is_dir()]
+
+
+def _remove_idle(mirror: NotebookMirror) -> bool:
+    # A mirror an export is reading from is left alone; the next sync or
+    # listing gets another chance at it.
+    if not mirror.lock.acquire(blocking=False):
+        return False
+    try:
+        mirror.clear()
+    finally:
+        mirror.lock.release()
+    return True
+
+
+def trim_mirrors(
+    directory: Path, max_bytes: Optional[int] = None, keep: Optional[NotebookMirror] = None
+) -> None:
+    """Drop the least recently synced mirrors under *directory* past *max_bytes*.
+
+    *max_bytes* defaults to ``MIRROR_MAX_BYTES``.  *keep*, usually the
+    mirror just synced, is never dropped.
+    """
+    max_bytes = MIRROR_MAX_BYTES if max_bytes is None else max_bytes
+    mirrors = []
+    for mirror in _device_mirrors(directory):
+        try:
+            mirrors.append((mirror.root.stat().st_mtime, mirror.size(), mirror))
+        except OSError:
+            continue
+    total = sum(size for _mtime, size, _mirror in mirrors)
+    for _mtime, size, mirror in sorted(mirrors, key=lambda entry: entry[0]):
+        if total <= max_bytes:
+            break
+        if mirror is not keep and _remove_idle(mirror):
+            total -= size
+
+
+def prune_mirrors(directory: Path, identifiers: Iterable[str]) -> None:
+    """Remove the mirrors under *directory* of notebooks not in *identifiers*."""
+    present = {safe_name(identifier) for identifier in identifiers}
+    for mirror in _device_mirrors(directory):
+        if mirror.root.name not in present:
+            _remove_idle(mirror)
@@ -21,6 +21,7 @@ from typing import Iterable, Optional
 import _package_download
 import _tap_page_turn as tap
 import _xovi_standalone
+from _remote_probe import PROBE_EXISTS, PROBE_SHA256, probe_remote, probe_with_sha256
 
 
 REPO_URL = "https://github.com/pretenderlu/rmtool"
@@ -736,15 +737,24 @@ def _standalone_payload_valid(
             return False, "启动包装器标记不匹配"
         if marker.get("dropin_sha256") != dropin_sha:
             return False, "systemd 配置标记不匹配"
-        if tap._remote_sha256(ssh_client, DROPIN_PATH) != dropin_sha:
+        runtime_files = [
+            (item, posixpath.join(REMOTE_BASE, item.path))
+            for item in package.files
+            if item.path in _RUNTIME_PATHS
+        ]
+        hashes = probe_with_sha256(
+            ssh_client,
+            [(PROBE_SHA256, DROPIN_PATH), (PROBE_SHA256, LAUNCHER_PATH)]
+            + [(PROBE_SHA256, remote) for _item, remote in runtime_files],
+            tap._remote_sha256,
+        )
+        if hashes.sha256(DROPIN_PATH) != dropin_sha:
             return False, "systemd 配置已被修改"
-        if tap._remote_sha256(ssh_client, LAUNCHER_PATH) != launcher_sha:
+        if hashes.sha256(LAUNCHER_PATH) != launcher_sha:
             return False, "启动包装器已被修改"
-        for item in package.files:
-            if item.path in _RUNTIME_PATHS:
-                remote = posixpath.join(REMOTE_BASE, item.path)
-                if tap._remote_sha256(ssh_client, remote) != item.sha256:
-                    return False, f"运行资源 {item.path} 已被修改"
+        for item, remote in runtime_files:
+            if hashes.sha256(remote) != item.sha256:
+                return False, f"运行资源 {item.path} 已被修改"
         return True, ""
     except Exception as exc:
         return False, str(exc)
@@ -846,12 +856,16 @@ def get_status(
     identity = tap.get_device_identity(ssh_client)
     available = tuple(item for item in packages if item.platform == identity.platform)
     package = select_package(packages, identity)
-    marker_exists = ssh_client.file_exists(MARKER_PATH)
-    dropin_exists = ssh_client.file_exists(DROPIN_PATH)
+    presence = probe_remote(
+        ssh_client,
+        ((PROBE_EXISTS, path) for path in (MARKER_PATH, DROPIN_PATH, tap.VELLUM_BIN)),
+    )
+    marker_exists = presence.exists(MARKER_PATH)
+    dropin_exists = presence.exists(DROPIN_PATH)
     shared_exists = _xovi_standalone.has_shared_artifacts(ssh_client)
     vellum_version = None
     vellum_error = ""
-    if ssh_client.file_exists(tap.VELLUM_BIN):
+    if presence.exists(tap.VELLUM_BIN):
         try:
             vellum_version = tap._vellum_installed_version(
                 ssh_client, VELLUM_PACKAGE_NAME
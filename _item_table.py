@@ -0,0 +1,202 @@
+"""Shared model/view backing for the document and KOReader tables.
+
+Both tabs used to fill a ``QTableWidget`` with one ``QTableWidgetItem`` per
+cell and filtered by hiding rows one at a time.  ``ItemTableModel`` wraps the
+item list instead: the view only asks for the cells it paints, and each
+cell's text is computed once, on first use, then reused when sorting.
+``ItemFilterProxyModel`` filters and sorts on top of it.  Queries go through
+the model's ``SearchIndex``, and while one is active the best matches come
+first under whichever column order is in effect.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from PyQt5 import QtCore
+
+from _search_index import RANK_FUZZY, SearchIndex, normalise_search_text
+
+
+@dataclass(frozen=True)
+class TableColumn:
+    """One table column: its header and the cell text of an item."""
+
+    title: str
+    text: Callable[[Any], str]
+
+
+class ItemTableModel(QtCore.QAbstractTableModel):
+    """Read-only table over a list of items, one row per item.
+
+    *key* gives the stable identifier stored under ``Qt.UserRole`` and
+    *search_text* the name the search index matches against.
+    """
+
+    def __init__(
+        self,
+        columns: Sequence[TableColumn],
+        key: Callable[[Any], str],
+        search_text: Callable[[Any], str],
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.columns = list(columns)
+        self._key = key
+        self._search_text = search_text
+        self._items: List[Any] = []
+        self._rows: Dict[str, int] = {}
+        self._texts: Dict[tuple, str] = {}
+        self._index = SearchIndex()
+        self._index_current = True
+
+    # -- Contents --------------------------------------------------------------
+    def set_items(self, items: Sequence[Any]) -> None:
+        """Replace every row with *items*."""
+        self.beginResetModel()
+        self._items = list(items)
+        self._rows = {self._key(item): row for row, item in enumerate(self._items)}
+        self._texts = {}
+        self._index_current = False
+        self.endResetModel()
+
+    def items(self) -> List[Any]:
+        return list(self._items)
+
+    def item(self, row: int) -> Optional[Any]:
+        if 0 <= row < len(self._items):
+            return self._items[row]
+        return None
+
+    def row_for_key(self, key: str) -> Optional[int]:
+        return self._rows.get(key)
+
+    def search(self, query: str) -> Optional[Dict[int, float]]:
+        """Rank the rows matching *query*; ``None`` means every row.
+
+        The index catches up with the current items first, re-tokenising only
+        names it has not seen.
+        """
+        if not self._index_current:
+            self._index.update(
+                {self._key(item): self._search_text(item) for item in self._items}
+            )
+            self._index_current = True
+        ranks = self._index.search(query)
+        if ranks is None:
+            return None
+        return {self._rows[key]: rank for key, rank in ranks.items()}
+
+    def cell_text(self, row: int, column: int) -> str:
+        text = self._texts.get((row, column))
+        if text is None:
+            text = self._texts[(row, column)] = self.columns[column].text(self._items[row])
+        return text
+
+    # -- QAbstractTableModel ---------------------------------------------------
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._items)
+
+    def columnCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._items):
+            return None
+        if role == QtCore.Qt.DisplayRole:
+            return self.cell_text(index.row(), index.column())
+        if role == QtCore.Qt.UserRole:
+            return self._key(self._items[index.row()])
+        return None
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            if 0 <= section < len(self.columns):
+                return self.columns[section].title
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+
+
+class ItemFilterProxyModel(QtCore.QSortFilterProxyModel):
+    """Search filter and ranked text sorting over an ``ItemTableModel``."""
+
+    def __init__(self, source: ItemTableModel, parent=None):
+        super().__init__(parent)
+        self._query = ""
+        self._ranks: Optional[Dict[int, float]] = None
+        self._stale = False
+        # Set while the proxy sorts only to put the best matches first.
+        self._ranking_only = False
+        # Connected before the proxy's own reset handling, so the new rows
+        # are searched before they are filtered.
+        source.modelAboutToBeReset.connect(self._mark_stale)
+        self.setSourceModel(source)
+
+    def source(self) -> ItemTableModel:
+        return self.sourceModel()
+
+    def set_filter_text(self, text: str) -> None:
+        """Show only rows matching *text*, best matches first."""
+        query = normalise_search_text(text)
+        if query == self._query and not self._stale:
+            return
+        self._query = query
+        self._stale = False
+        self._ranks = self.source().search(query)
+        self.invalidate()
+        # A view without a sort column still shows ranked results, and
+        # returns to the model order once the query is cleared.
+        if self._ranks is not None and self.sortColumn() < 0:
+            self._ranking_only = True
+            self.sort(0)
+        elif self._ranks is None and self._ranking_only:
+            self._ranking_only = False
+            self.sort(-1)
+
+    def accepts_source_row(self, row: int) -> bool:
+        if self._stale:
+            self._stale = False
+            self._ranks = self.source().search(self._query)
+        return self._ranks is None or row in self._ranks
+
+    def item(self, row: int) -> Optional[Any]:
+        """Return the item shown at proxy *row*."""
+        if not 0 <= row < self.rowCount():
+            return None
+        return self.source().item(self.mapToSource(self.index(row, 0)).row())
+
+    def row_for_key(self, key: str) -> Optional[int]:
+        """Return the proxy row showing *key*, or ``None`` when filtered out."""
+        row = self.source().row_for_key(key)
+        if row is None:
+            return None
+        index = self.mapFromSource(self.source().index(row, 0))
+        return index.row() if index.isValid() else None
+
+    def _mark_stale(self) -> None:
+        self._stale = True
+
+    # -- QSortFilterProxyModel -------------------------------------------------
+    def filterAcceptsRow(self, source_row, source_parent) -> bool:
+        return self.accepts_source_row(source_row)
+
+    def lessThan(self, left, right) -> bool:
+        if self._ranks is not None:
+            left_rank = self._ranks.get(left.row(), RANK_FUZZY + 1)
+            right_rank = self._ranks.get(right.row(), RANK_FUZZY + 1)
+            if left_rank != right_rank:
+                # Qt inverts the result for descending columns; keep the
+                # best matches on top either way.
+                descending = self.sortOrder() == QtCore.Qt.DescendingOrder
+                return (left_rank < right_rank) != descending
+        if self._ranking_only:
+            return left.row() < right.row()
+        source = self.source()
+        return source.cell_text(left.row(), left.column()) < source.cell_text(
+            right.row(), right.column()
+        )
@@ -17,7 +17,7 @@ from enum import Enum
 from pathlib import Path
 from typing import Callable, List, Optional
 
-from _ssh import SSHClientWrapper
+from _ssh import SSHClientWrapper, TransferJob
 import _appload
 import _tap_page_turn as tap
 import _xovi_standalone as shared
@@ -738,17 +738,46 @@ def upload_file(
     progress_callback: Optional[Callable[[int, int], None]] = None,
 ) -> str:
     """Upload one local file into *remote_dir*; returns the remote path."""
+    return upload_files(
+        ssh_client,
+        [local_path],
+        remote_dir,
+        library_root,
+        overwrite=overwrite,
+        progress_callback=progress_callback,
+    )[0]
+
+
+def upload_files(
+    ssh_client: SSHClientWrapper,
+    local_paths: List[str],
+    remote_dir: str,
+    library_root: str,
+    *,
+    overwrite: bool = False,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> List[str]:
+    """Upload *local_paths* into *remote_dir* as one multi-channel batch.
+
+    Every target is validated before any byte is sent, so a name conflict
+    late in the list cannot leave a half-uploaded batch behind.  Returns the
+    remote paths in input order.
+    """
     canonical_dir = _ensure_writable(ssh_client, remote_dir, library_root)
-    remote_path = posixpath.join(canonical_dir, os.path.basename(local_path))
-    remote_exists = ssh_client.file_exists(remote_path)
-    if remote_exists:
-        _canonical_library_path(ssh_client, remote_path, library_root)
-    if not overwrite and remote_exists:
-        raise RuntimeError(f"远端已存在同名文件：{os.path.basename(local_path)}")
-    logging.info("Uploading %s -> %s", local_path, remote_path)
-    with ssh_client.sftp_session() as sftp:
-        sftp.put(local_path, remote_path, callback=progress_callback)
-    return remote_path
+    jobs: List[TransferJob] = []
+    for local_path in local_paths:
+        remote_path = posixpath.join(canonical_dir, os.path.basename(local_path))
+        remote_exists = ssh_client.file_exists(remote_path)
+        if remote_exists:
+            _canonical_library_path(ssh_client, remote_path, library_root)
+        if not overwrite and remote_exists:
+            raise RuntimeError(f"远端已存在同名文件：{os.path.basename(local_path)}")
+        jobs.append(
+            TransferJob(local_path, remote_path, max(int(os.path.getsize(local_path)), 0))
+        )
+    logging.info("Uploading %d file(s) -> %s", len(jobs), canonical_dir)
+    ssh_client.transfer_files(jobs, progress_callback=progress_callback)
+    return [job.remote_path for job in jobs]
 
 
 def download_file(
@@ -18,6 +18,7 @@ from typing import Iterable, Optional
 import _package_download
 import _tap_page_turn as tap
 import _xovi_standalone
+from _remote_probe import PROBE_EXISTS, probe_remote
 
 
 REPO_URL = "https://github.com/pretenderlu/rmtool"
@@ -502,7 +503,10 @@ def _external_specs(package: PinyinInputPackage) -> dict[str, _xovi_standalone.S
 
 
 def _has_external_payload(ssh_client) -> bool:
-    return ssh_client.file_exists(REMOTE_BASE) or ssh_client.file_exists(REMOTE_MARKER)
+    probes = probe_remote(
+        ssh_client, ((PROBE_EXISTS, path) for path in (REMOTE_BASE, REMOTE_MARKER))
+    )
+    return probes.exists(REMOTE_BASE) or probes.exists(REMOTE_MARKER)
 
 
 def _validate_external_payload(ssh_client, package: PinyinInputPackage) -> None:
@@ -16,6 +16,7 @@ from typing import Iterable, Optional
 import _package_download
 import _tap_page_turn as tap
 import _xovi_standalone as shared
+from _remote_probe import PROBE_EXISTS, probe_remote
 
 
 REPO_URL = "https://github.com/pretenderlu/rmtool"
@@ -585,15 +586,22 @@ def _validated_legacy_standalone(ssh_client, legacies):
     grouped = {}
     for legacy in legacies:
         grouped.setdefault(legacy.layout.remote_base, []).append(legacy)
+    anchors = {
+        remote_base: (
+            candidates[0].layout.remote_base,
+            candidates[0].marker_path,
+            candidates[0].layout.dropin_path,
+        )
+        for remote_base, candidates in grouped.items()
+    }
+    probes = probe_remote(
+        ssh_client,
+        ((PROBE_EXISTS, path) for paths in anchors.values() for path in paths),
+    )
     present = []
-    for candidates in grouped.values():
+    for remote_base, candidates in grouped.items():
         legacy = candidates[0]
-        paths = (
-            legacy.layout.remote_base,
-            legacy.marker_path,
-            legacy.layout.dropin_path,
-        )
-        if not any(ssh_client.file_exists(path) for path in paths):
+        if not any(probes.exists(path) for path in anchors[remote_base]):
             continue
         last_error = None
         matched = None
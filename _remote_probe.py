@@ -0,0 +1,280 @@
+"""Batched read-only probes against the device filesystem.
+
+Plugin status checks ask many small questions in a row: does a path exist,
+is it a directory, what is a file's SHA-256, what does a small marker file
+contain.  Each answer used to cost its own SFTP request or ``exec_command``
+round trip.  ``probe_remote`` answers a whole list in one shell script on
+``SSHClientWrapper`` and returns a ``ProbeResults`` lookup.  Clients that do
+not declare ``SUPPORTS_PROBE_BATCH`` get the same lookup, resolved lazily
+through the classic ``file_exists``/``exec_checked``/``open_remote`` calls
+in the order the caller asks.
+"""
+
+from __future__ import annotations
+
+import re
+import shlex
+from typing import Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+PROBE_EXISTS = "exists"
+PROBE_DIR = "dir"
+PROBE_SHA256 = "sha256"
+PROBE_READ = "read"
+PROBE_KINDS = (PROBE_EXISTS, PROBE_DIR, PROBE_SHA256, PROBE_READ)
+
+# Reads are for markers and small config files, not payloads.
+MAX_READ_BYTES = 1024 * 1024
+
+Probe = Tuple[str, str]
+Resolver = Callable[[object, str], object]
+
+_FRAME_HEADER = b"@@rmtool-probe "
+_FRAME_HEADER_RE = re.compile(rb"@@rmtool-probe (\d+) (\d+) (\d+)(?: (\d+) ([^\n]*))?\n")
+_SHA256_RE = re.compile(r"[0-9a-f]{64}")
+
+
+# One shell function per probe kind keeps each probe to a single short line,
+# so scripts listing thousands of paths stay small.  A read costs one
+# ``stat`` for its length, mtime and the size limit check, and one ``cat``.
+# A file that changes between the two no longer matches its header length;
+# the parser drops that frame and the entry is read again per call.
+_SCRIPT_PRELUDE = """\
+f() { printf '@@rmtool-probe %s %s %s\\n' "$1" "$2" "$3"; }
+e() { if [ -e "$2" ]; then f "$1" 0 0; else f "$1" 1 0; fi; echo; }
+d() { if [ -d "$2" ]; then f "$1" 0 0; else f "$1" 1 0; fi; echo; }
+s() { if h=$(sha256sum "$2" 2>/dev/null); then h=${h%% *}; f "$1" 0 ${#h}; printf '%s\\n' "$h"; else f "$1" 1 0; echo; fi; }
+r() {
+  if [ -f "$2" ] && [ -r "$2" ] && m=$(stat -c '%s %Y' "$2" 2>/dev/null); then
+    n=${m%% *}
+    if [ "$n" -le "$3" ]; then
+      printf '@@rmtool-probe %s 0 %s %s %s\\n' "$1" "$n" "${m#* }" "$2"; cat "$2" 2>/dev/null; echo
+    else f "$1" 2 0; echo; fi
+  else f "$1" 1 0; echo; fi
+}
+"""
+
+_KIND_FUNCTIONS = {PROBE_EXISTS: "e", PROBE_DIR: "d", PROBE_SHA256: "s", PROBE_READ: "r"}
+
+
+def _probe_snippet(index: int, kind: str, path: str, max_read_bytes: int) -> str:
+    function = _KIND_FUNCTIONS.get(kind)
+    if function is None:
+        raise ValueError(f"未知的探测类型：{kind}")
+    line = f"{function} {index} {shlex.quote(path)}"
+    if kind == PROBE_READ:
+        line += f" {int(max_read_bytes)}"
+    return line
+
+
+def build_probe_script(
+    probes: Sequence[Probe], max_read_bytes: int = MAX_READ_BYTES
+) -> str:
+    """Return a POSIX ``sh`` script that answers *probes* as framed records.
+
+    Every probe produces ``@@rmtool-probe <index> <status> <length>\\n``
+    followed by exactly ``length`` payload bytes and a newline.  Successful
+    reads add the file's mtime and path to the header:
+    ``@@rmtool-probe <index> 0 <length> <mtime> <path>\\n``.  Status 0
+    means success; anything else means the path is missing, unreadable or
+    over the read limit.
+    """
+    lines = [_SCRIPT_PRELUDE]
+    for index, (kind, path) in enumerate(probes):
+        lines.append(_probe_snippet(index, kind, path, max_read_bytes))
+    return "\n".join(lines) + "\n"
+
+
+class ProbeFrame(NamedTuple):
+    """One parsed probe record; reads also carry the file's mtime and path."""
+
+    status: int
+    payload: bytes
+    mtime: Optional[int] = None
+    name: Optional[str] = None
+
+
+def parse_probe_output(raw: bytes, count: int) -> List[Optional[ProbeFrame]]:
+    """Parse framed probe output into one ``ProbeFrame`` per probe index.
+
+    A frame that is malformed, cut short, overrun or missing leaves its
+    entry as ``None``; parsing resumes at the next header line, so one bad
+    record does not cost the rest of the batch.
+    """
+    frames: List[Optional[ProbeFrame]] = [None] * count
+    offset = 0
+    next_index = 0
+    while offset < len(raw):
+        match = _FRAME_HEADER_RE.match(raw, offset)
+        if match is not None:
+            index, status, length = (int(group) for group in match.groups()[:3])
+            start = match.end()
+            end = start + length
+            # Frames arrive in probe order, and each one ends right before
+            # the next header; anything else is a payload that changed
+            # length mid-read or merely looks like a header.
+            if (
+                next_index <= index < count
+                and raw[end:end + 1] == b"\n"
+                and (end + 1 == len(raw) or raw.startswith(_FRAME_HEADER, end + 1))
+            ):
+                mtime, name = match.group(4), match.group(5)
+                frames[index] = ProbeFrame(
+                    status,
+                    raw[start:end],
+                    int(mtime) if mtime is not None else None,
+                    name.decode("utf-8", "surrogateescape") if name is not None else None,
+                )
+                next_index = index + 1
+                offset = end + 1
+                continue
+        offset = raw.find(b"\n" + _FRAME_HEADER, offset)
+        if offset < 0:
+            break
+        offset += 1
+    return frames
+
+
+class ProbeResults:
+    """Answers to remote probes, keyed by ``(kind, path)``.
+
+    Probes that were not prefetched are resolved on first access through the
+    client's single-call API, so callers never need to know which mode they
+    got.  *fallbacks* maps a probe kind to a ``(ssh_client, path)`` callable
+    that replaces the built-in single-call resolver for that kind.
+    """
+
+    def __init__(
+        self,
+        ssh_client,
+        frames: Optional[Dict[Probe, Tuple[int, bytes]]] = None,
+        *,
+        fallbacks: Optional[Mapping[str, Resolver]] = None,
+    ) -> None:
+        self._ssh_client = ssh_client
+        self._frames: Dict[Probe, Tuple[int, bytes]] = dict(frames or {})
+        self._fallbacks: Dict[str, Resolver] = dict(fallbacks or {})
+        self._resolved: Dict[Probe, object] = {}
+
+    def exists(self, path: str) -> bool:
+        return self._value(PROBE_EXISTS, path)
+
+    def is_dir(self, path: str) -> bool:
+        return self._value(PROBE_DIR, path)
+
+    def sha256(self, path: str) -> str:
+        return self._value(PROBE_SHA256, path)
+
+    def read(self, path: str) -> bytes:
+        return self._value(PROBE_READ, path)
+
+    def text(self, path: str) -> str:
+        data = self.read(path)
+        return data.decode("utf-8") if isinstance(data, bytes) else data
+
+    def mtime(self, path: str) -> Optional[int]:
+        """Return the mtime a batched read of *path* reported, if any."""
+        frame = self._frames.get((PROBE_READ, path))
+        return frame.mtime if isinstance(frame, ProbeFrame) else None
+
+    def add_fallbacks(self, fallbacks: Mapping[str, Resolver]) -> None:
+        """Resolve per-call probes of the given kinds through *fallbacks*."""
+        self._fallbacks.update(fallbacks)
+
+    def _value(self, kind: str, path: str):
+        key = (kind, path)
+        if key not in self._resolved:
+            frame = self._frames.get(key)
+            if frame is None:
+                resolver = self._fallbacks.get(kind)
+                self._resolved[key] = (
+                    resolver(self._ssh_client, path)
+                    if resolver is not None
+                    else _resolve_single(self._ssh_client, kind, path)
+                )
+            else:
+                self._resolved[key] = _frame_value(kind, path, frame[0], frame[1])
+        return self._resolved[key]
+
+
+def _frame_value(kind: str, path: str, status: int, payload: bytes):
+    if kind in (PROBE_EXISTS, PROBE_DIR):
+        return status == 0
+    if kind == PROBE_SHA256:
+        digest = payload.decode("ascii", "replace") if status == 0 else ""
+        if not _SHA256_RE.fullmatch(digest):
+            raise RuntimeError(f"设备未返回 {path} 的有效 SHA-256。")
+        return digest
+    if status != 0:
+        raise IOError(f"无法读取设备文件：{path}")
+    return payload
+
+
+def _resolve_single(ssh_client, kind: str, path: str):
+    if kind == PROBE_EXISTS:
+        return ssh_client.file_exists(path)
+    if kind == PROBE_DIR:
+        _stdout, _stderr, code = ssh_client.exec_command(
+            f"[ -d {shlex.quote(path)} ]"
+        )
+        return code == 0
+    if kind == PROBE_SHA256:
+        output = ssh_client.exec_checked(f"sha256sum {shlex.quote(path)}").strip()
+        digest = output.split()[0] if output else ""
+        if not _SHA256_RE.fullmatch(digest):
+            raise RuntimeError(f"设备未返回 {path} 的有效 SHA-256。")
+        return digest
+    if kind == PROBE_READ:
+        with ssh_client.open_remote(path, "r") as remote:
+            return remote.read()
+    raise ValueError(f"未知的探测类型：{kind}")
+
+
+def supports_batch(ssh_client) -> bool:
+    """Whether *ssh_client* declares ``SUPPORTS_PROBE_BATCH = True``."""
+    return getattr(ssh_client, "SUPPORTS_PROBE_BATCH", False) is True
+
+
+def probe_remote(
+    ssh_client,
+    probes: Iterable[Probe],
+    *,
+    fallbacks: Optional[Mapping[str, Resolver]] = None,
+) -> ProbeResults:
+    """Answer *probes* in one round trip when the client supports batching.
+
+    *fallbacks* lets a feature module keep its own single-call helpers (for
+    example its ``_remote_sha256``) on the per-call path.
+    """
+    if supports_batch(ssh_client):
+        results = ssh_client.probe_batch(probes)
+        results.add_fallbacks(fallbacks or {})
+        return results
+    return ProbeResults(ssh_client, fallbacks=fallbacks)
+
+
+def probe_with_sha256(
+    ssh_client, probes: Iterable[Probe], remote_sha256: Resolver
+) -> ProbeResults:
+    """``probe_remote`` whose per-call SHA-256 probes use *remote_sha256*.
+
+    Feature modules pass their own ``_remote_sha256`` at call time, so the
+    per-call path keeps going through (and tests keep patching) that helper.
+    """
+    return probe_remote(ssh_client, probes, fallbacks={PROBE_SHA256: remote_sha256})
+
+
+def read_remote_files(ssh_client, paths: Iterable[str]) -> Dict[str, bytes]:
+    """Read many small files with one ``probe_batch`` round trip.
+
+    Files that are missing, unreadable or over the read limit are left out
+    of the result so the caller can retry them another way.
+    """
+    paths = list(dict.fromkeys(paths))
+    results = ssh_client.probe_batch([(PROBE_READ, path) for path in paths])
+    contents: Dict[str, bytes] = {}
+    for path in paths:
+        try:
+            contents[path] = results.read(path)
+        except IOError:
+            continue
+    return contents
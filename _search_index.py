@@ -0,0 +1,229 @@
+"""Prebuilt search index for document and KOReader names.
+
+Every name is indexed under three keys: the folded name itself, its full
+pinyin and its pinyin initials, so ``santi`` and ``st`` both find 三体.  All
+1- to 3-character substrings of the keys are posted to an n-gram table.  A
+query then only verifies the rows that contain every one of its n-grams
+instead of scanning the whole list.  When nothing matches, trigram overlap
+finds near misses such as typos.  ``SearchIndex.update`` re-tokenises only
+the names that changed, since pinyin conversion is the expensive part.
+
+Full pinyin needs the optional ``pypinyin`` package.  Without it, initials
+still work for the 3755 common characters of GB2312 level 1, which that
+charset orders by pinyin.
+"""
+
+from __future__ import annotations
+
+import bisect
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Mapping, Optional, Set, Tuple
+
+try:
+    import pypinyin
+except ImportError:  # pragma: no cover - optional dependency
+    pypinyin = None
+
+# Ranks of the match kinds; lower sorts first.
+RANK_EXACT = 0
+RANK_PREFIX = 1
+RANK_SUBSTRING = 2
+RANK_PINYIN_PREFIX = 3
+RANK_PINYIN_SUBSTRING = 4
+RANK_FUZZY = 5
+# Share of the query's trigrams a name must contain to count as a near miss.
+FUZZY_THRESHOLD = 0.6
+
+_GRAM_SIZE = 3
+# First GB2312 code of each pinyin initial within level 1 (0xB0A1-0xD7F9).
+_GB2312_INITIALS = (
+    (0xB0A1, "a"), (0xB0C5, "b"), (0xB2C1, "c"), (0xB4EE, "d"), (0xB6EA, "e"),
+    (0xB7A2, "f"), (0xB8C1, "g"), (0xB9FE, "h"), (0xBBF7, "j"), (0xBFA6, "k"),
+    (0xC0AC, "l"), (0xC2E8, "m"), (0xC4C3, "n"), (0xC5B6, "o"), (0xC5BE, "p"),
+    (0xC6DA, "q"), (0xC8BB, "r"), (0xC8F6, "s"), (0xCBFA, "t"), (0xCDDA, "w"),
+    (0xCEF4, "x"), (0xD1B9, "y"), (0xD4D1, "z"),
+)
+_GB2312_CODES = [code for code, _letter in _GB2312_INITIALS]
+_GB2312_LEVEL1_END = 0xD7F9
+
+
+def normalise_search_text(text: str) -> str:
+    """Fold *text* for case- and width-insensitive matching."""
+    return unicodedata.normalize("NFKC", text).casefold().strip()
+
+
+def _compact(text: str) -> str:
+    """Drop spaces and punctuation, which pinyin queries usually leave out."""
+    return "".join(char for char in text if char.isalnum())
+
+
+def _is_cjk(char: str) -> bool:
+    return "\u3400" <= char <= "\u9fff" or "\uf900" <= char <= "\ufaff"
+
+
+@lru_cache(maxsize=8192)
+def _reading(char: str) -> Tuple[Optional[str], Optional[str]]:
+    """Return ``(full pinyin, initial)`` of one CJK character, when known."""
+    if pypinyin is not None:
+        syllable = pypinyin.lazy_pinyin(char)[0]
+        if syllable and syllable.isascii() and syllable.isalpha():
+            return syllable, syllable[0]
+        return None, None
+    try:
+        encoded = char.encode("gb2312")
+    except UnicodeEncodeError:
+        return None, None
+    code = encoded[0] << 8 | encoded[1]
+    if not _GB2312_CODES[0] <= code <= _GB2312_LEVEL1_END:
+        return None, None
+    return None, _GB2312_INITIALS[bisect.bisect_right(_GB2312_CODES, code) - 1][1]
+
+
+@dataclass(frozen=True)
+class SearchKeys:
+    """The strings one name is matched against."""
+
+    name: str
+    pinyin: Optional[str] = None
+    initials: Optional[str] = None
+
+    def fields(self) -> Tuple[str, ...]:
+        return tuple(field for field in (self.name, self.pinyin, self.initials) if field)
+
+
+def search_keys(text: str) -> SearchKeys:
+    """Build the search keys of a name.
+
+    Characters without a known reading stay as they are, so a name is still
+    found by the parts of it that were converted.
+    """
+    name = normalise_search_text(text)
+    if not any(_is_cjk(char) for char in name):
+        return SearchKeys(name)
+    full: Optional[List[str]] = []
+    initials = []
+    for char in _compact(name):
+        if not _is_cjk(char):
+            initials.append(char)
+            if full is not None:
+                full.append(char)
+            continue
+        syllable, initial = _reading(char)
+        initials.append(initial or char)
+        if syllable is None:
+            full = None
+        elif full is not None:
+            full.append(syllable)
+    return SearchKeys(name, "".join(full) if full else None, "".join(initials))
+
+
+def _grams(text: str) -> Set[str]:
+    return {
+        text[start:start + size]
+        for size in range(1, _GRAM_SIZE + 1)
+        for start in range(len(text) - size + 1)
+    }
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[start:start + _GRAM_SIZE] for start in range(len(text) - _GRAM_SIZE + 1)}
+
+
+class SearchIndex:
+    """Ranked substring, pinyin and fuzzy search over named rows.
+
+    Rows are identified by stable keys, such as document ids or paths.
+    """
+
+    def __init__(self):
+        self._texts: Dict[str, str] = {}
+        self._keys: Dict[str, SearchKeys] = {}
+        self._postings: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def update(self, texts: Mapping[str, str]) -> None:
+        """Index exactly the rows of *texts*, a mapping of key to name.
+
+        Rows whose name is unchanged keep their entry.
+        """
+        for key in [key for key, text in self._texts.items() if texts.get(key) != text]:
+            self._remove(key)
+        for key, text in texts.items():
+            if key not in self._texts:
+                self._add(key, text)
+
+    def _add(self, key: str, text: str) -> None:
+        keys = search_keys(text)
+        self._texts[key] = text
+        self._keys[key] = keys
+        for gram in set().union(*(_grams(field) for field in keys.fields())):
+            self._postings.setdefault(gram, set()).add(key)
+
+    def _remove(self, key: str) -> None:
+        del self._texts[key]
+        keys = self._keys.pop(key)
+        for gram in set().union(*(_grams(field) for field in keys.fields())):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(key)
+                if not posting:
+                    del self._postings[gram]
+
+    def _candidates(self, query: str) -> Set[str]:
+        """Keys whose fields may contain *query*: they hold all its n-grams."""
+        if not query:
+            return set()
+        if len(query) <= _GRAM_SIZE:
+            return set(self._postings.get(query, ()))
+        postings = sorted((self._postings.get(gram, set()) for gram in _trigrams(query)), key=len)
+        return set(postings[0]).intersection(*postings[1:])
+
+    def search(self, query: str) -> Optional[Dict[str, float]]:
+        """Rank the rows matching *query*; ``None`` means no filter.
+
+        Lower ranks are better matches; see the ``RANK_*`` constants.
+        """
+        query = normalise_search_text(query)
+        if not query:
+            return None
+        compact = _compact(query)
+        ranks: Dict[str, float] = {}
+        for key in self._candidates(query) | self._candidates(compact):
+            rank = self._rank(self._keys[key], query, compact)
+            if rank is not None:
+                ranks[key] = rank
+
+        # Near misses only stand in when nothing matches outright; names
+        # sharing an extension would otherwise all count as typos.
+        trigrams = _trigrams(query)
+        if not ranks and len(trigrams) > 1:
+            shared: Dict[str, int] = {}
+            for gram in trigrams:
+                for key in self._postings.get(gram, ()):
+                    shared[key] = shared.get(key, 0) + 1
+            for key, count in shared.items():
+                score = count / len(trigrams)
+                if score >= FUZZY_THRESHOLD:
+                    ranks[key] = RANK_FUZZY + 1.0 - score
+        return ranks
+
+    @staticmethod
+    def _rank(keys: SearchKeys, query: str, compact: str) -> Optional[int]:
+        if keys.name == query:
+            return RANK_EXACT
+        if keys.name.startswith(query):
+            return RANK_PREFIX
+        if query in keys.name:
+            return RANK_SUBSTRING
+        if not compact:
+            return None
+        pinyin_fields = [field for field in (keys.pinyin, keys.initials) if field]
+        if any(field.startswith(compact) for field in pinyin_fields):
+            return RANK_PINYIN_PREFIX
+        if any(compact in field for field in pinyin_fields):
+            return RANK_PINYIN_SUBSTRING
+        return None
@@ -7,18 +7,31 @@ require_connection decorator live here to keep rmtool.py focused on UI.
 import inspect
 import logging
 import os
+import posixpath
+import queue
+import shlex
 import socket
 import stat
+import tarfile
 import threading
+import time
 from contextlib import contextmanager
+from dataclasses import dataclass
 from functools import wraps
 from pathlib import Path
-from typing import Callable, Dict, Iterator, Optional, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import paramiko
 from PyQt5 import QtCore, QtWidgets
 
 from _dialogs import show_warning
+from _remote_probe import (
+    MAX_READ_BYTES,
+    Probe,
+    ProbeResults,
+    build_probe_script,
+    parse_probe_output,
+)
 
 
 def _get_known_hosts_path():
@@ -77,6 +90,28 @@ def require_connection(method):
     return wrapper
 
 
+@dataclass(frozen=True)
+class TransferJob:
+    """One local file to upload to *remote_path*; *size* drives progress."""
+
+    local_path: str
+    remote_path: str
+    size: int
+
+
+class _CountingReader:
+    """File wrapper that reports every chunk ``tarfile`` reads from it."""
+
+    def __init__(self, handle, on_read: Callable[[int], None]):
+        self._handle = handle
+        self._on_read = on_read
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._handle.read(size)
+        self._on_read(len(data))
+        return data
+
+
 class UnknownHostKeyError(RuntimeError):
     def __init__(
         self,
@@ -100,11 +135,40 @@ class UnknownHostKeyError(RuntimeError):
 class SSHClientWrapper(QtCore.QObject):
     connection_changed = QtCore.pyqtSignal(bool)
 
+    # paramiko sends a keepalive request on its own transport thread at this
+    # interval, so a dead link surfaces as an inactive transport without the
+    # command path writing heartbeat packets.
+    KEEPALIVE_INTERVAL = 30
+    # How often the liveness monitor samples the transport's active flag.
+    LIVENESS_POLL_INTERVAL = 2.0
+    # Upper bound on SFTP channels a bulk upload opens on the one transport.
+    # dropbear has dropped connections under bursts of simultaneous channels
+    # (see MainWindow._start_post_connect_refresh), so keep this small and
+    # open the channels one after another.
+    TRANSFER_CHANNELS = 3
+    TRANSFER_RETRIES = 2
+    # Capabilities callers check before taking a bulk path; clients without
+    # them (test fakes, mocks) are served through the single-call API.
+    SUPPORTS_PROBE_BATCH = True
+    SUPPORTS_TAR_UPLOAD = True
+
     def __init__(self, parent: Optional[QtCore.QObject] = None):
         super().__init__(parent)
         self._transport_lock = threading.RLock()
         self._state_lock = threading.RLock()
         self._client: Optional[paramiko.SSHClient] = None
+        # One long-lived SFTP channel per connection.  Every SFTP user is
+        # already serialized by _transport_lock, so a single channel is the
+        # whole pool; reopening it per call costs a full round trip on
+        # dropbear over Wi-Fi.
+        self._sftp: Optional[paramiko.SFTPClient] = None
+        self._sftp_owner: Optional[paramiko.SSHClient] = None
+        self._channel_stats: Dict[str, int] = {
+            "sftp_opened": 0,
+            "sftp_reused": 0,
+            "exec_opened": 0,
+        }
+        self._monitor_stop: Optional[threading.Event] = None
         self.connection_info: Dict[str, str] = {}
 
     def _build_client(self) -> paramiko.SSHClient:
@@ -225,10 +289,11 @@ class SSHClientWrapper(QtCore.QObject):
                 self._apply_trusted_host_key(client, host, host_key)
                 self._connect_client(client, host, password, timeout)
 
-            # Enable TCP keepalive so the connection survives idle periods
+            # Keepalive requests keep idle connections open and let paramiko
+            # notice a dead link; the monitor turns that into a disconnect.
             transport = client.get_transport()
             if transport:
-                transport.set_keepalive(30)
+                transport.set_keepalive(self.KEEPALIVE_INTERVAL)
             with self._state_lock:
                 self._client = client
                 self.connection_info = {
@@ -237,55 +302,171 @@ class SSHClientWrapper(QtCore.QObject):
                     "device_name": device_name,
                 }
                 self.connection_changed.emit(True)
+            self._start_liveness_monitor(client)
 
     def close(self) -> None:
         # Do not wait for a long-running command or transfer here.  Closing the
         # underlying client is the cancellation path used by the UI; the
         # in-flight operation will fail in its worker while new operations see
         # the cleared client after they acquire the transport lock.
+        self._stop_liveness_monitor()
         with self._state_lock:
             client, self._client = self._client, None
+            sftp = self._detach_sftp()
             self.connection_info = {}
             self.connection_changed.emit(False)
+        self._close_sftp(sftp)
         if client:
             try:
                 client.close()
             except Exception:
                 pass
 
+    @staticmethod
+    def _transport_alive(client: paramiko.SSHClient) -> bool:
+        # Only reads paramiko's cached active flag; nothing is sent on the wire.
+        try:
+            transport = client.get_transport()
+            return transport is not None and transport.is_active()
+        except Exception:
+            return False
+
+    def _mark_disconnected(self, client: paramiko.SSHClient) -> bool:
+        """Drop *client* if it is still current; return whether it was."""
+        with self._state_lock:
+            if self._client is not client:
+                return False
+            sftp = self._detach_sftp()
+            self._client = None
+            self.connection_info = {}
+            self.connection_changed.emit(False)
+        self._close_sftp(sftp)
+        return True
+
     def ensure_client(self) -> paramiko.SSHClient:
         with self._transport_lock:
             with self._state_lock:
                 client = self._client
             if not client:
                 raise RuntimeError("未连接到设备")
-            # Heartbeat: verify the underlying transport is still alive
-            try:
-                transport = client.get_transport()
-                if transport is None or not transport.is_active():
-                    raise RuntimeError("transport dead")
-                transport.send_ignore()
-            except Exception:
-                with self._state_lock:
-                    if self._client is client:
-                        self._client = None
-                        self.connection_info = {}
-                        self.connection_changed.emit(False)
+            if not self._transport_alive(client):
+                self._mark_disconnected(client)
                 raise RuntimeError("连接已断开，请重新连接")
             return client
 
+    # -- Liveness monitor ----------------------------------------------------
+    def _start_liveness_monitor(self, client: paramiko.SSHClient) -> None:
+        self._stop_liveness_monitor()
+        stop = threading.Event()
+        with self._state_lock:
+            self._monitor_stop = stop
+        thread = threading.Thread(
+            target=self._watch_liveness,
+            args=(client, stop),
+            name="rmtool-ssh-liveness",
+            daemon=True,
+        )
+        thread.start()
+
+    def _stop_liveness_monitor(self) -> None:
+        with self._state_lock:
+            stop, self._monitor_stop = self._monitor_stop, None
+        if stop is not None:
+            stop.set()
+
+    def _watch_liveness(
+        self, client: paramiko.SSHClient, stop: threading.Event
+    ) -> None:
+        # Never takes the transport lock, so a long transfer cannot delay
+        # noticing that its link has gone away.
+        while not stop.wait(self.LIVENESS_POLL_INTERVAL):
+            with self._state_lock:
+                if self._client is not client:
+                    return
+            if not self._transport_alive(client):
+                if self._mark_disconnected(client):
+                    logging.warning("SSH transport went inactive; marked disconnected")
+                return
+
+    # -- SFTP channel reuse --------------------------------------------------
+    def channel_stats(self) -> Dict[str, int]:
+        """Return a snapshot of SSH channel opens and SFTP channel reuses."""
+        with self._state_lock:
+            return dict(self._channel_stats)
+
+    def _detach_sftp(self) -> Optional[paramiko.SFTPClient]:
+        with self._state_lock:
+            sftp, self._sftp = self._sftp, None
+            self._sftp_owner = None
+            return sftp
+
+    @staticmethod
+    def _close_sftp(sftp: Optional[paramiko.SFTPClient]) -> None:
+        if sftp is None:
+            return
+        try:
+            sftp.close()
+        except Exception:
+            logging.exception("Failed to close SFTP session")
+
+    @staticmethod
+    def _sftp_is_healthy(sftp: paramiko.SFTPClient) -> bool:
+        try:
+            channel = sftp.get_channel()
+            if channel is None or channel.closed:
+                return False
+            transport = channel.get_transport()
+            return transport is not None and transport.is_active()
+        except Exception:
+            return False
+
+    def _acquire_sftp(
+        self, client: paramiko.SSHClient
+    ) -> Tuple[paramiko.SFTPClient, bool]:
+        """Return ``(sftp, pooled)``; unpooled channels are closed on release."""
+        with self._state_lock:
+            sftp = self._sftp
+            if (
+                sftp is not None
+                and self._sftp_owner is client
+                and self._sftp_is_healthy(sftp)
+            ):
+                self._channel_stats["sftp_reused"] += 1
+                return sftp, True
+            stale = self._detach_sftp()
+        self._close_sftp(stale)
+        sftp = client.open_sftp()
+        with self._state_lock:
+            self._channel_stats["sftp_opened"] += 1
+            if self._client is not client:
+                return sftp, False
+            self._sftp = sftp
+            self._sftp_owner = client
+        return sftp, True
+
+    def _release_sftp(self, sftp: paramiko.SFTPClient, pooled: bool) -> None:
+        # Keep the channel only while it is still the pooled one and healthy.
+        # A pooled channel that was detached meanwhile has already been closed
+        # by close() or ensure_client().
+        with self._state_lock:
+            if pooled:
+                if self._sftp is not sftp:
+                    return
+                if self._sftp_is_healthy(sftp):
+                    return
+                self._detach_sftp()
+        self._close_sftp(sftp)
+
     @contextmanager
     def sftp_session(self) -> Iterator[paramiko.SFTPClient]:
+        """Yield the connection's shared SFTP channel, opening it on demand."""
         with self._transport_lock:
             client = self.ensure_client()
-            sftp = client.open_sftp()
+            sftp, pooled = self._acquire_sftp(client)
             try:
                 yield sftp
             finally:
-                try:
-                    sftp.close()
-                except Exception:
-                    logging.exception("Failed to close SFTP session")
+                self._release_sftp(sftp, pooled)
 
     def is_connected(self) -> bool:
         # This method is called by UI-thread guards.  It must remain a quick
@@ -294,11 +475,7 @@ class SSHClientWrapper(QtCore.QObject):
             client = self._client
         if not client:
             return False
-        try:
-            transport = client.get_transport()
-            return transport is not None and transport.is_active()
-        except Exception:
-            return False
+        return self._transport_alive(client)
 
     # -- Command execution ---------------------------------------------------
     def exec_command(self, command: str) -> Tuple[str, str, int]:
@@ -307,6 +484,8 @@ class SSHClientWrapper(QtCore.QObject):
             client = self.ensure_client()
             logging.info("Executing command: %s", command)
             _stdin, stdout, stderr = client.exec_command(command)
+            with self._state_lock:
+                self._channel_stats["exec_opened"] += 1
             exit_code = stdout.channel.recv_exit_status()
             return (
                 stdout.read().decode("utf-8"),
@@ -314,6 +493,41 @@ class SSHClientWrapper(QtCore.QObject):
                 exit_code,
             )
 
+    def probe_batch(
+        self,
+        probes: Iterable[Probe],
+        max_read_bytes: int = MAX_READ_BYTES,
+    ) -> ProbeResults:
+        """Answer read-only *probes* with a single ``exec_command`` round trip.
+
+        The probe script is fed to ``sh -s`` on stdin so the batch size is not
+        bounded by the server's command-line limit.
+        """
+        probes = list(dict.fromkeys(probes))
+        if not probes:
+            return ProbeResults(self)
+        script = build_probe_script(probes, max_read_bytes)
+        with self._transport_lock:
+            client = self.ensure_client()
+            logging.info("Executing %d batched remote probes", len(probes))
+            stdin, stdout, stderr = client.exec_command("sh -s")
+            with self._state_lock:
+                self._channel_stats["exec_opened"] += 1
+            stdin.write(script.encode("utf-8"))
+            stdin.channel.shutdown_write()
+            raw = stdout.read()
+            error = stderr.read()
+            exit_code = stdout.channel.recv_exit_status()
+        if exit_code != 0:
+            message = error.decode("utf-8", "replace").strip() or f"exit code {exit_code}"
+            raise RuntimeError(f"命令执行失败: {message}")
+        frames = parse_probe_output(raw, len(probes))
+        # Entries whose frame could not be parsed are answered per call.
+        return ProbeResults(
+            self,
+            {probe: frame for probe, frame in zip(probes, frames) if frame is not None},
+        )
+
     def exec_checked(self, command: str) -> str:
         """Execute *command* and raise on non-zero exit code.  Returns stdout."""
         stdout, stderr, code = self.exec_command(command)
@@ -328,6 +542,219 @@ class SSHClientWrapper(QtCore.QObject):
             logging.info("Transferring %s -> %s", local_path, remote_path)
             sftp.put(local_path, remote_path)
 
+    def transfer_files(
+        self,
+        jobs: Sequence[TransferJob],
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        *,
+        max_channels: Optional[int] = None,
+        retries: Optional[int] = None,
+    ) -> None:
+        """Upload *jobs* over up to *max_channels* parallel SFTP channels.
+
+        Files are pulled from a shared queue, so one slow file never stalls
+        the rest of the batch.  Each file is retried up to *retries* times on
+        a fresh channel.  *progress_callback* receives aggregate
+        ``(transferred, total)`` bytes and may be called from worker threads.
+        The transport lock is held for the whole batch so no other task opens
+        channels meanwhile.  The first unrecoverable error is re-raised after
+        all workers stop.
+        """
+        jobs = list(jobs)
+        if not jobs:
+            return
+        max_channels = self.TRANSFER_CHANNELS if max_channels is None else max_channels
+        retries = self.TRANSFER_RETRIES if retries is None else retries
+        channel_count = max(1, min(int(max_channels), len(jobs)))
+        total = sum(max(job.size, 0) for job in jobs) or 1
+        progress_lock = threading.Lock()
+        transferred: Dict[int, int] = {}
+        pending: "queue.Queue[Tuple[int, TransferJob]]" = queue.Queue()
+        for index, job in enumerate(jobs):
+            pending.put((index, job))
+        failed = threading.Event()
+        errors: List[BaseException] = []
+
+        def report(index: int, done: int) -> None:
+            with progress_lock:
+                transferred[index] = done
+                current = min(sum(transferred.values()), total)
+            if progress_callback:
+                progress_callback(current, total)
+
+        with self._transport_lock:
+            client = self.ensure_client()
+            channels: List[Optional[paramiko.SFTPClient]] = []
+            try:
+                for _ in range(channel_count):
+                    channels.append(self._open_transfer_channel(client))
+            except Exception:
+                for channel in channels:
+                    self._close_sftp(channel)
+                raise
+            if progress_callback:
+                progress_callback(0, total)
+
+            def run(slot: int) -> None:
+                while not failed.is_set():
+                    try:
+                        index, job = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    size = max(job.size, 0)
+                    for attempt in range(retries + 1):
+                        try:
+                            if channels[slot] is None:
+                                channels[slot] = self._open_transfer_channel(client)
+                            logging.info(
+                                "Transferring %s -> %s", job.local_path, job.remote_path
+                            )
+                            channels[slot].put(
+                                job.local_path,
+                                job.remote_path,
+                                callback=lambda done, _total, index=index, size=size: (
+                                    report(index, min(done, size))
+                                ),
+                            )
+                            report(index, size)
+                            break
+                        except Exception as exc:
+                            report(index, 0)
+                            self._close_sftp(channels[slot])
+                            channels[slot] = None
+                            if attempt >= retries or not self._transport_alive(client):
+                                with progress_lock:
+                                    errors.append(exc)
+                                failed.set()
+                                return
+                            logging.warning(
+                                "Retrying upload of %s (%d/%d): %s",
+                                job.local_path,
+                                attempt + 1,
+                                retries,
+                                exc,
+                            )
+
+            workers = [
+                threading.Thread(
+                    target=run, args=(slot,), name=f"rmtool-sftp-{slot}", daemon=True
+                )
+                for slot in range(channel_count)
+            ]
+            try:
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+            finally:
+                for channel in channels:
+                    self._close_sftp(channel)
+        if errors:
+            raise errors[0]
+        if progress_callback:
+            progress_callback(total, total)
+
+    def upload_tar(
+        self,
+        remote_root: str,
+        jobs: Sequence[TransferJob],
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        *,
+        directories: Sequence[str] = (),
+    ) -> None:
+        """Stream *jobs* into *remote_root* through one ``tar -x`` channel.
+
+        The archive is generated while it is written to the channel, so no
+        temporary tar file exists on either side.  *directories* are created
+        even when empty.  Every remote path must live under *remote_root*.
+        *progress_callback* receives ``(transferred, total)`` file bytes.
+        """
+        jobs = list(jobs)
+        if not jobs and not directories:
+            return
+        root = posixpath.normpath(remote_root)
+
+        def member_name(remote_path: str) -> str:
+            name = posixpath.relpath(posixpath.normpath(remote_path), root)
+            if name == "." or name == ".." or name.startswith("../"):
+                raise ValueError(f"路径不在上传目录内：{remote_path}")
+            return name
+
+        members = [(job, member_name(job.remote_path)) for job in jobs]
+        folders = [member_name(path) for path in directories]
+        total = sum(max(job.size, 0) for job in jobs) or 1
+        sent = 0
+
+        def report(count: int) -> None:
+            nonlocal sent
+            sent += count
+            if progress_callback:
+                progress_callback(min(sent, total), total)
+
+        command = f"tar -x -o -f - -C {shlex.quote(root)}"
+        with self._transport_lock:
+            client = self.ensure_client()
+            logging.info(
+                "Streaming %d file(s) to %s via tar", len(members), root
+            )
+            stdin, stdout, stderr = client.exec_command(command)
+            with self._state_lock:
+                self._channel_stats["exec_opened"] += 1
+            if progress_callback:
+                progress_callback(0, total)
+            write_error: Optional[BaseException] = None
+            try:
+                self._write_tar_stream(stdin, members, folders, report)
+            except Exception as exc:
+                # tar exiting early closes the channel under us; its stderr
+                # below explains why better than the broken pipe does.
+                write_error = exc
+            finally:
+                stdin.channel.shutdown_write()
+            error = stderr.read()
+            stdout.read()
+            exit_code = stdout.channel.recv_exit_status()
+        if exit_code != 0:
+            message = error.decode("utf-8", "replace").strip() or f"exit code {exit_code}"
+            raise RuntimeError(f"命令执行失败: {message}")
+        if write_error is not None:
+            raise write_error
+        if progress_callback:
+            progress_callback(total, total)
+
+    @staticmethod
+    def _write_tar_stream(
+        stream,
+        members: Sequence[Tuple[TransferJob, str]],
+        directories: Sequence[str],
+        on_read: Callable[[int], None],
+    ) -> None:
+        now = int(time.time())
+        with tarfile.open(
+            fileobj=stream, mode="w|", format=tarfile.USTAR_FORMAT
+        ) as archive:
+            for name in sorted(set(directories), key=lambda value: value.count("/")):
+                info = tarfile.TarInfo(name)
+                info.type = tarfile.DIRTYPE
+                info.mode = 0o755
+                info.mtime = now
+                archive.addfile(info)
+            for job, name in members:
+                info = tarfile.TarInfo(name)
+                info.size = os.path.getsize(job.local_path)
+                info.mode = 0o644
+                info.mtime = now
+                with open(job.local_path, "rb") as handle:
+                    archive.addfile(info, _CountingReader(handle, on_read))
+
+    def _open_transfer_channel(
+        self, client: paramiko.SSHClient
+    ) -> paramiko.SFTPClient:
+        sftp = client.open_sftp()
+        with self._state_lock:
+            self._channel_stats["sftp_opened"] += 1
+        return sftp
+
     def file_exists(self, remote_path: str) -> bool:
         with self.sftp_session() as sftp:
             try:
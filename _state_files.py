@@ -0,0 +1,76 @@
+"""File helpers shared by the on-disk caches under the app state directory.
+
+The document index, cover cache, export mirror and rendered-page cache only
+make things faster.  An I/O error while reading or writing one of them is
+logged and treated as a miss, and never fails the refresh, preview or export
+that was using it.  These helpers take care of the parts they have in
+common: turning device keys into path names, atomic writes, and one shared
+instance per path per process.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Generic, Iterator, TypeVar
+
+T = TypeVar("T")
+
+_UNSAFE_NAME_CHARS = re.compile(r"[^A-Za-z0-9._-]")
+
+
+def safe_name(value: str) -> str:
+    """Return *value* as one path component: a device key, document id, ..."""
+    return _UNSAFE_NAME_CHARS.sub("_", value).strip(".") or "device"
+
+
+@contextmanager
+def atomic_path(path: Path, suffix: str = ".tmp") -> Iterator[Path]:
+    """Yield a hidden temp file next to *path* that replaces it on success.
+
+    Readers see the old file or the new one, never a partial write.  On
+    error the temp file is removed and the exception propagates.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=suffix, dir=path.parent)
+    os.close(fd)
+    try:
+        yield Path(temp_name)
+        os.replace(temp_name, path)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except OSError:
+            pass
+        raise
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Write *data* to *path* through :func:`atomic_path`."""
+    with atomic_path(path) as temp_path:
+        temp_path.write_bytes(data)
+
+
+class SharedInstances(Generic[T]):
+    """One instance per path per process, created by *factory* on first use.
+
+    Every tab and worker that opens the same cache gets the same object, so
+    they share its lock and in-memory state.
+    """
+
+    def __init__(self, factory: Callable[[Path], T]):
+        self._factory = factory
+        self._instances: Dict[Path, T] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: Path) -> T:
+        with self._lock:
+            instance = self._instances.get(path)
+            if instance is None:
+                instance = self._instances[path] = self._factory(path)
+            return instance
@@ -1,5 +1,6 @@
 """DocumentsTab extracted from rmtool.py."""
 
+import contextlib
 import json
 import logging
 import os
@@ -8,8 +9,9 @@ import shlex
 import shutil
 import stat
 import tempfile
+import threading
 import uuid
-import zipfile
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
@@ -19,11 +21,54 @@ import paramiko
 from PIL import Image
 from PyQt5 import QtCore, QtGui, QtWidgets, sip
 
+from _cover_cache import CoverSource, fetch_covers
 from _dialogs import ask_confirmation, show_error, show_info, show_warning
-from _ssh import SSHClientWrapper, require_connection
+from _item_table import ItemFilterProxyModel, ItemTableModel, TableColumn
+from _ssh import SSHClientWrapper, TransferJob, require_connection
 import rmtool as _rmtool  # late-bound access to avoid circular import
 
 
+# Batches with at least this many documents upload as one tar stream when
+# the client supports it; single documents keep the retrying SFTP path.
+_TAR_STREAM_MIN_PACKAGES = 2
+
+
+def _supports_tar_stream(ssh_client) -> bool:
+    return getattr(ssh_client, "SUPPORTS_TAR_UPLOAD", False) is True
+
+
+# Decoded covers kept in memory for instant previews, and how many visible
+# rows above and below the selection get their cover fetched in advance.
+_PREVIEW_MEMORY_ENTRIES = 64
+_PREVIEW_PREFETCH_ROWS = 2
+
+
+class _PreviewPixmapCache:
+    """Least recently used decoded previews, keyed by document and thumbnail stamp."""
+
+    def __init__(self, capacity: int = _PREVIEW_MEMORY_ENTRIES):
+        self.capacity = capacity
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[QtGui.QPixmap, bytes]]" = OrderedDict()
+
+    def get(self, identifier: str, stamp: str) -> Optional[Tuple[QtGui.QPixmap, bytes]]:
+        entry = self._entries.get((identifier, stamp))
+        if entry is not None:
+            self._entries.move_to_end((identifier, stamp))
+        return entry
+
+    def put(self, identifier: str, stamp: str, pixmap: QtGui.QPixmap, cover: bytes) -> None:
+        self._entries[(identifier, stamp)] = (pixmap, cover)
+        self._entries.move_to_end((identifier, stamp))
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self._entries
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
 @dataclass
 class _PreparedDocumentUpload:
     identifier: str
@@ -199,12 +244,11 @@ class _DocumentTransferService:
         started_identifiers: List[str],
         progress_callback: Optional[Callable[[int, int], None]],
     ) -> None:
-        total_size = sum(package.total_size for package in packages)
-        total_for_progress = total_size if total_size > 0 else 1
-        uploaded = 0
-        if progress_callback:
-            progress_callback(0, total_for_progress)
-
+        if len(packages) >= _TAR_STREAM_MIN_PACKAGES and _supports_tar_stream(
+            self.ssh_client
+        ):
+            self._stream_packages(packages, started_identifiers, progress_callback)
+            return
         with self.ssh_client.sftp_session() as sftp:
             for package in packages:
                 started_identifiers.append(package.identifier)
@@ -214,22 +258,36 @@ class _DocumentTransferService:
                     except IOError:
                         sftp.mkdir(remote_dir)
 
-                for local_path, remote_path, size in package.files:
-                    offset = uploaded
-
-                    def _put_callback(transferred, _total, offset=offset, size=size):
-                        if progress_callback:
-                            progress_callback(
-                                offset + min(transferred, size), total_for_progress
-                            )
-
-                    sftp.put(local_path, remote_path, callback=_put_callback)
-                    uploaded += size
-                    if progress_callback:
-                        progress_callback(uploaded, total_for_progress)
+        # Files of every package share one queue, so small .metadata/.content
+        # files upload alongside the large documents instead of between them.
+        jobs = [
+            TransferJob(local_path, remote_path, size)
+            for package in packages
+            for local_path, remote_path, size in package.files
+        ]
+        self.ssh_client.transfer_files(jobs, progress_callback=progress_callback)
 
-        if progress_callback:
-            progress_callback(total_for_progress, total_for_progress)
+    def _stream_packages(
+        self,
+        packages: List[_PreparedDocumentUpload],
+        started_identifiers: List[str],
+        progress_callback: Optional[Callable[[int, int], None]],
+    ) -> None:
+        # One tar pipe replaces a stat/mkdir/put round trip per file and
+        # directory, which dominates batches of many small documents.
+        started_identifiers.extend(package.identifier for package in packages)
+        self.ssh_client.upload_tar(
+            self.document_root,
+            [
+                TransferJob(local_path, remote_path, size)
+                for package in packages
+                for local_path, remote_path, size in package.files
+            ],
+            progress_callback=progress_callback,
+            directories=[
+                remote_dir for package in packages for remote_dir in package.remote_dirs
+            ],
+        )
 
     def _cleanup_remote_uploads(self, identifiers: List[str]) -> None:
         for identifier in identifiers:
@@ -241,16 +299,58 @@ class _DocumentTransferService:
                 logging.exception("Failed to clean partial document upload %s", identifier)
 
 
-def _safe_extract_archive(archive_path: Path, target_dir: Path) -> None:
-    if not zipfile.is_zipfile(archive_path):
-        return
-    target_root = target_dir.resolve()
-    with zipfile.ZipFile(archive_path) as archive:
-        for member in archive.infolist():
-            destination = (target_dir / member.filename).resolve()
-            if target_root != destination and target_root not in destination.parents:
-                raise RuntimeError(f"导出文件包含不安全路径：{member.filename}")
-        archive.extractall(target_dir)
+def _export_source_names(item: _rmtool.DocumentItem) -> set:
+    # Every source that may contain handwritten note strokes.  Newer
+    # reMarkable exports can store the pages inside .note/.zip archives
+    # rather than the bare uuid directory.
+    return {
+        item.identifier,
+        f"{item.identifier}.content",
+        f"{item.identifier}.note",
+        f"{item.identifier}.zip",
+    }
+
+
+def _download_export_sources(ssh_client, item: _rmtool.DocumentItem, tmpdir: str) -> str:
+    export_names = _export_source_names(item)
+    with ssh_client.sftp_session() as sftp:
+        entries = sftp.listdir_attr(_rmtool.DOCUMENT_ROOT)
+        for entry in entries:
+            if entry.filename not in export_names:
+                continue
+            remote_path = f"{_rmtool.DOCUMENT_ROOT}/{entry.filename}"
+            local_path = os.path.join(tmpdir, entry.filename)
+            if stat.S_ISDIR(entry.st_mode):
+                ssh_client._download_directory_recursive(sftp, remote_path, local_path)
+            else:
+                Path(local_path).parent.mkdir(parents=True, exist_ok=True)
+                sftp.get(remote_path, local_path)
+    # .note/.zip archives stay packed; rmrl reads their pages in place.
+    return tmpdir
+
+
+def _sync_export_mirror(ssh_client, item: _rmtool.DocumentItem, mirror) -> str:
+    """Update the local mirror of *item* and return it as render source.
+
+    Only files that changed on the device are downloaded.
+    """
+    export_names = _export_source_names(item)
+    with ssh_client.sftp_session() as sftp:
+        entries = [
+            entry
+            for entry in sftp.listdir_attr(_rmtool.DOCUMENT_ROOT)
+            if entry.filename in export_names
+        ]
+        result = mirror.sync(ssh_client, sftp, _rmtool.DOCUMENT_ROOT, entries)
+    _rmtool.trim_export_mirrors(ssh_client, keep=mirror)
+    logging.info(
+        "Export mirror for %s: %d downloaded, %d reused, %d removed",
+        item.identifier,
+        len(result.downloaded),
+        result.reused,
+        len(result.removed),
+    )
+    return str(mirror.root)
 
 
 class DocumentsTab(QtWidgets.QWidget):
@@ -265,6 +365,13 @@ class DocumentsTab(QtWidgets.QWidget):
         self._documents_by_id: Dict[str, _rmtool.DocumentItem] = {}
         self._current_preview_request: Optional[str] = None
         self._preview_cover: Optional[bytes] = None
+        self._preview_pixmaps = _PreviewPixmapCache()
+        # Cover thumbnails resolved so far for the documents list they were
+        # listed for, ``None`` for documents without one; a new list
+        # (refresh) makes them stale.
+        self._cover_sources: Optional[Tuple[list, Dict[str, Optional[CoverSource]]]] = None
+        self._cover_sources_lock = threading.Lock()
+        self._prefetching_previews: set = set()
         self._active_progress: Optional[QtWidgets.QProgressDialog] = None
         self._progress_label_base: str = ""
         self._connected = False
@@ -297,8 +404,22 @@ class DocumentsTab(QtWidgets.QWidget):
         self.preview_image.setWordWrap(True)
         self.preview_image.set_corner_radius(_rmtool.INNER_PANEL_RADIUS)
 
-        self.table = QtWidgets.QTableWidget(0, 3)
-        self.table.setHorizontalHeaderLabels(["名称", "类型", "更新时间"])
+        self.table_model = ItemTableModel(
+            [
+                TableColumn("名称", lambda item: item.name),
+                TableColumn("类型", lambda item: item.doc_type),
+                TableColumn(
+                    "更新时间",
+                    lambda item: item.updated.strftime("%Y-%m-%d %H:%M") if item.updated else "",
+                ),
+            ],
+            key=lambda item: item.identifier,
+            search_text=lambda item: item.name,
+            parent=self,
+        )
+        self.table_proxy = ItemFilterProxyModel(self.table_model, self)
+        self.table = QtWidgets.QTableView()
+        self.table.setModel(self.table_proxy)
         self.table.horizontalHeader().setStretchLastSection(True)
         self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
         self.table.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
@@ -429,17 +550,10 @@ class DocumentsTab(QtWidgets.QWidget):
 
     # -- Search / filter -------------------------------------------------------
     def _apply_filter(self, text: str) -> None:
-        text = text.strip().lower()
-        for row in range(self.table.rowCount()):
-            item = self._document_for_row(row)
-            visible = bool(item) and (not text or text in item.name.lower())
-            self.table.setRowHidden(row, not visible)
-
         selected = self._selected_document()
-        if selected:
-            selected_row = self._row_for_document(selected.identifier)
-            if selected_row is not None and self.table.isRowHidden(selected_row):
-                self.table.clearSelection()
+        self.table_proxy.set_filter_text(text)
+        if selected and self._row_for_document(selected.identifier) is None:
+            self.table.clearSelection()
 
         self._update_results_summary()
         self._update_action_state()
@@ -450,6 +564,8 @@ class DocumentsTab(QtWidgets.QWidget):
             # Invalidate results of workers started before the disconnect so a
             # stale list from the previous connection is never applied.
             self._connection_generation += 1
+            # The next connection may be another device with other covers.
+            self._preview_pixmaps.clear()
         self._connected = connected
         self.refresh_button.setEnabled(connected)
         self.upload_button.setEnabled(connected)
@@ -457,26 +573,16 @@ class DocumentsTab(QtWidgets.QWidget):
         self._update_empty_state()
 
     def _document_for_row(self, row: int) -> Optional[_rmtool.DocumentItem]:
-        item = self.table.item(row, 0)
-        if item is None:
-            return None
-        identifier = item.data(QtCore.Qt.UserRole)
-        if not identifier:
-            return None
-        return self._documents_by_id.get(str(identifier))
+        return self.table_proxy.item(row)
 
     def _row_for_document(self, identifier: str) -> Optional[int]:
-        for row in range(self.table.rowCount()):
-            item = self.table.item(row, 0)
-            if item is not None and item.data(QtCore.Qt.UserRole) == identifier:
-                return row
-        return None
+        return self.table_proxy.row_for_key(identifier)
 
     def _selected_document(self) -> Optional[_rmtool.DocumentItem]:
         indexes = self.table.selectionModel().selectedRows()
         if not indexes:
             return None
-        current_row = self.table.currentRow()
+        current_row = self.table.currentIndex().row()
         if current_row >= 0 and any(index.row() == current_row for index in indexes):
             return self._document_for_row(current_row)
         return self._document_for_row(sorted(index.row() for index in indexes)[0])
@@ -491,7 +597,7 @@ class DocumentsTab(QtWidgets.QWidget):
         return documents
 
     def _visible_document_count(self) -> int:
-        return sum(0 if self.table.isRowHidden(row) else 1 for row in range(self.table.rowCount()))
+        return self.table_proxy.rowCount()
 
     def _update_results_summary(self) -> None:
         visible = self._visible_document_count()
@@ -661,24 +767,22 @@ class DocumentsTab(QtWidgets.QWidget):
         self.thread_pool.start(worker)
 
     def _load_documents(self) -> List[_rmtool.DocumentItem]:
-        """Load document list using a single SFTP session for efficiency."""
+        """Load document list using a single SFTP session for efficiency.
+
+        The listing also drops the export mirrors of deleted notebooks.
+        """
         with self.ssh_client.sftp_session() as sftp:
-            return _rmtool.load_document_items(sftp)
+            try:
+                entries = sftp.listdir_attr(_rmtool.DOCUMENT_ROOT)
+            except IOError:
+                return []
+            _rmtool.prune_export_mirrors(self.ssh_client, entries)
+            return _rmtool.load_device_documents(self.ssh_client, sftp, entries)
 
     def _on_documents_loaded(self, documents: List[_rmtool.DocumentItem]):
         self.documents = documents
         self._documents_by_id = {item.identifier: item for item in documents}
-        sorting_enabled = self.table.isSortingEnabled()
-        self.table.setSortingEnabled(False)
-        self.table.setRowCount(len(documents))
-        for row, item in enumerate(documents):
-            name_item = QtWidgets.QTableWidgetItem(item.name)
-            name_item.setData(QtCore.Qt.UserRole, item.identifier)
-            self.table.setItem(row, 0, name_item)
-            self.table.setItem(row, 1, QtWidgets.QTableWidgetItem(item.doc_type))
-            updated_text = item.updated.strftime("%Y-%m-%d %H:%M") if item.updated else ""
-            self.table.setItem(row, 2, QtWidgets.QTableWidgetItem(updated_text))
-        self.table.setSortingEnabled(sorting_enabled)
+        self.table_model.set_items(documents)
         self.table.clearSelection()
         self._current_preview_request = None
         self.preview.clear()
@@ -709,9 +813,14 @@ class DocumentsTab(QtWidgets.QWidget):
             f"可用资源: {', '.join(item.available_assets) if item.available_assets else '无'}",
         ]
         self.preview.setPlainText("\n".join(meta_text))
-        self._set_preview_placeholder("加载预览中...")
         self._current_preview_request = item.identifier
         request_id = item.identifier
+        cached = self._cached_preview(request_id)
+        if cached is not None:
+            self._show_preview(*cached)
+            self._prefetch_adjacent_previews()
+            return
+        self._set_preview_placeholder("加载预览中...")
         worker = _rmtool.Worker(self._fetch_preview_cover, item)
 
         # Closures with a liveness guard: a functools.partial would still be
@@ -731,6 +840,7 @@ class DocumentsTab(QtWidgets.QWidget):
         worker.signals.finished.connect(on_finished)
         worker.signals.error.connect(on_error)
         self.thread_pool.start(worker)
+        self._prefetch_adjacent_previews()
 
     # -- Upload ----------------------------------------------------------------
     def upload_document(self):
@@ -1015,10 +1125,11 @@ class DocumentsTab(QtWidgets.QWidget):
 
     def _scan_orphan_thumbnails(self) -> _OrphanThumbnailScan:
         with self.ssh_client.sftp_session() as sftp:
+            entries = sftp.listdir_attr(_rmtool.DOCUMENT_ROOT)
             active_ids = {
-                item.identifier for item in _rmtool.load_document_items(sftp)
+                item.identifier
+                for item in _rmtool.load_device_documents(self.ssh_client, sftp, entries)
             }
-            entries = sftp.listdir_attr(_rmtool.DOCUMENT_ROOT)
             candidate_ids = []
             file_count = 0
             total_bytes = 0
@@ -1094,10 +1205,11 @@ class DocumentsTab(QtWidgets.QWidget):
     def _delete_orphan_thumbnails(self, scan: _OrphanThumbnailScan) -> int:
         deleted_count = 0
         with self.ssh_client.sftp_session() as sftp:
+            entries = sftp.listdir_attr(_rmtool.DOCUMENT_ROOT)
             active_ids = {
-                item.identifier for item in _rmtool.load_document_items(sftp)
+                item.identifier
+                for item in _rmtool.load_device_documents(self.ssh_client, sftp, entries)
             }
-            entries = sftp.listdir_attr(_rmtool.DOCUMENT_ROOT)
             directory_names = {
                 entry.filename
                 for entry in entries
@@ -1130,6 +1242,7 @@ class DocumentsTab(QtWidgets.QWidget):
         if not save_path:
             return
         worker = _rmtool.Worker(self._perform_export, item, save_path)
+        worker.kwargs["progress_callback"] = worker.signals.progress.emit
 
         def on_finished(_result):
             if sip.isdeleted(self):
@@ -1150,72 +1263,193 @@ class DocumentsTab(QtWidgets.QWidget):
             self._close_progress_dialog()
             self._on_error(exc)
 
+        worker.signals.progress.connect(self._update_progress_dialog)
         worker.signals.finished.connect(on_finished)
         worker.signals.error.connect(on_error)
         self._show_progress_dialog("导出 PDF", f'正在渲染「{item.name}」…')
         self.thread_pool.start(worker)
 
-    def _perform_export(self, item: _rmtool.DocumentItem, save_path: str):
+    def _perform_export(
+        self,
+        item: _rmtool.DocumentItem,
+        save_path: str,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+    ):
         from rmrl import render_notebook_to_pdf
 
+        mirror = _rmtool.export_mirror_for(self.ssh_client, item.identifier)
         tmpdir = tempfile.mkdtemp()
         try:
-            # Download every source that may contain handwritten note strokes.
-            # Newer reMarkable exports can store the pages inside .note/.zip
-            # archives rather than the bare uuid directory.
-            export_names = {
-                item.identifier,
-                f"{item.identifier}.content",
-                f"{item.identifier}.note",
-                f"{item.identifier}.zip",
-            }
-            archives: List[Path] = []
-            with self.ssh_client.sftp_session() as sftp:
-                entries = sftp.listdir_attr(_rmtool.DOCUMENT_ROOT)
-                for entry in entries:
-                    if entry.filename not in export_names:
-                        continue
-                    remote_path = f"{_rmtool.DOCUMENT_ROOT}/{entry.filename}"
-                    local_path = os.path.join(tmpdir, entry.filename)
-                    if stat.S_ISDIR(entry.st_mode):
-                        self.ssh_client._download_directory_recursive(
-                            sftp, remote_path, local_path
-                        )
-                    else:
-                        Path(local_path).parent.mkdir(parents=True, exist_ok=True)
-                        sftp.get(remote_path, local_path)
-                        if entry.filename.endswith((".note", ".zip")):
-                            archives.append(Path(local_path))
-
-            for archive_path in archives:
-                _safe_extract_archive(archive_path, Path(tmpdir))
-
-            render_notebook_to_pdf(tmpdir, save_path, workspace=tmpdir)
+            with mirror.lock if mirror is not None else contextlib.nullcontext():
+                if mirror is not None:
+                    source = _sync_export_mirror(self.ssh_client, item, mirror)
+                else:
+                    source = _download_export_sources(self.ssh_client, item, tmpdir)
+                render_notebook_to_pdf(
+                    source,
+                    save_path,
+                    workspace=tmpdir,
+                    progress_callback=progress_callback,
+                    cache=_rmtool.render_cache(),
+                )
         finally:
             shutil.rmtree(tmpdir, ignore_errors=True)
 
     # -- Preview ---------------------------------------------------------------
+    def _known_cover_sources(self, documents: list) -> Dict[str, Optional[CoverSource]]:
+        with self._cover_sources_lock:
+            cover_sources = self._cover_sources
+        if cover_sources is None or cover_sources[0] is not documents:
+            return {}
+        return cover_sources[1]
+
+    def _preview_sources(self, identifiers: List[str]) -> Dict[str, CoverSource]:
+        """Return the cover thumbnails of *identifiers*, listing each once.
+
+        Only ids not yet resolved for the current list are listed on the
+        device, and the lock is not held while that runs.
+        """
+        documents = self.documents
+        documents_by_id = self._documents_by_id
+        known = self._known_cover_sources(documents)
+        items = [
+            documents_by_id[identifier]
+            for identifier in dict.fromkeys(identifiers)
+            if identifier not in known and identifier in documents_by_id
+        ]
+        if items:
+            with self.ssh_client.sftp_session() as sftp:
+                found = _rmtool.list_document_covers(self.ssh_client, sftp, items)
+            resolved = {item.identifier: found.get(item.identifier) for item in items}
+            with self._cover_sources_lock:
+                cover_sources = self._cover_sources
+                if cover_sources is not None and cover_sources[0] is documents:
+                    known = cover_sources[1]
+                # A fresh mapping, so readers of the previous one never see
+                # it change under them.
+                known = {**known, **resolved}
+                if self.documents is documents:
+                    self._cover_sources = (documents, known)
+        return {
+            identifier: known[identifier]
+            for identifier in identifiers
+            if known.get(identifier) is not None
+        }
+
+    def _preview_stamp(self, identifier: str) -> Optional[str]:
+        source = self._known_cover_sources(self.documents).get(identifier)
+        return source.stamp if source is not None else None
+
+    def _load_preview_covers(self, identifiers: List[str]) -> Dict[str, Optional[bytes]]:
+        """Return normalised covers from the disk cache, fetching the misses."""
+        sources = self._preview_sources(identifiers)
+        cache = _rmtool.cover_cache_for(self.ssh_client)
+        covers: Dict[str, Optional[bytes]] = {}
+        missing = []
+        for identifier in identifiers:
+            source = sources.get(identifier)
+            cover = cache.get(source) if cache is not None and source is not None else None
+            covers[identifier] = cover
+            if source is not None and cover is None:
+                missing.append(source)
+        for batch in fetch_covers(
+            missing, lambda batch: _rmtool.read_cover_files(self.ssh_client, batch), cache
+        ):
+            covers.update(batch)
+        return covers
+
     def _fetch_preview_cover(self, item: _rmtool.DocumentItem) -> Optional[bytes]:
-        """Download the first thumbnail (cover) using a single SFTP session."""
-        with self.ssh_client.sftp_session() as sftp:
-            return _rmtool.read_document_cover(sftp, item)
+        """Return the cover of *item* from the disk cache or the device."""
+        return self._load_preview_covers([item.identifier]).get(item.identifier)
+
+    def _cached_preview(self, identifier: str) -> Optional[Tuple[QtGui.QPixmap, bytes]]:
+        stamp = self._preview_stamp(identifier)
+        if stamp is None:
+            return None
+        return self._preview_pixmaps.get(identifier, stamp)
+
+    def _remember_preview(self, identifier: str, cover: bytes) -> Optional[QtGui.QPixmap]:
+        image = QtGui.QImage.fromData(cover)
+        if image.isNull():
+            return None
+        pixmap = QtGui.QPixmap.fromImage(image)
+        stamp = self._preview_stamp(identifier)
+        if stamp is not None:
+            self._preview_pixmaps.put(identifier, stamp, pixmap, cover)
+        return pixmap
+
+    def _adjacent_document_ids(self) -> List[str]:
+        """Visible documents next to the current row, nearest first."""
+        current = self.table.currentIndex().row()
+        if current < 0:
+            return []
+        above = list(range(current - 1, max(current - 1 - _PREVIEW_PREFETCH_ROWS, -1), -1))
+        below = list(
+            range(current + 1, min(current + 1 + _PREVIEW_PREFETCH_ROWS, self.table_proxy.rowCount()))
+        )
+        identifiers = []
+        for index in range(_PREVIEW_PREFETCH_ROWS):
+            for rows in (below, above):
+                if index < len(rows):
+                    item = self._document_for_row(rows[index])
+                    if item is not None:
+                        identifiers.append(item.identifier)
+        return identifiers
+
+    def _prefetch_adjacent_previews(self) -> None:
+        identifiers = [
+            identifier
+            for identifier in self._adjacent_document_ids()
+            if identifier not in self._prefetching_previews
+            and self._cached_preview(identifier) is None
+        ]
+        if not identifiers or not self._connected:
+            return
+        self._prefetching_previews.update(identifiers)
+        worker = _rmtool.Worker(self._load_preview_covers, identifiers)
+
+        def on_finished(covers):
+            if sip.isdeleted(self):
+                return
+            self._prefetching_previews.difference_update(identifiers)
+            for identifier, cover in covers.items():
+                if cover:
+                    self._remember_preview(identifier, cover)
+
+        def on_error(exc: Exception):
+            if sip.isdeleted(self):
+                return
+            self._prefetching_previews.difference_update(identifiers)
+            logging.debug("Preview prefetch failed: %s", exc)
+
+        worker.signals.finished.connect(on_finished)
+        worker.signals.error.connect(on_error)
+        self.thread_pool.start(worker)
+
+    def _show_preview(self, pixmap: QtGui.QPixmap, cover: bytes) -> None:
+        self._preview_cover = cover
+        self.preview_image.setPixmap(pixmap)
+        self.preview_image.setText("")
+        self._preview_stack.setCurrentIndex(1)
+        self._image_btn.setChecked(True)
 
     def _on_preview_loaded(self, identifier: str, cover: Optional[bytes]):
         if identifier != self._current_preview_request:
+            if cover:
+                self._remember_preview(identifier, cover)
             return
         if not cover:
             self._set_preview_placeholder("暂无可用预览")
             return
-        self._preview_cover = cover
-        image = QtGui.QImage.fromData(cover)
-        if image.isNull():
+        pixmap = self._remember_preview(identifier, cover)
+        if pixmap is None:
+            self._preview_cover = cover
             self.preview_image.clear_preview()
             self.preview_image.setText("无法解析预览图像")
-        else:
-            self.preview_image.setPixmap(QtGui.QPixmap.fromImage(image))
-            self.preview_image.setText("")
-        self._preview_stack.setCurrentIndex(1)
-        self._image_btn.setChecked(True)
+            self._preview_stack.setCurrentIndex(1)
+            self._image_btn.setChecked(True)
+            return
+        self._show_preview(pixmap, cover)
 
     def _on_preview_error(self, identifier: str, exc: Exception):
         if identifier != self._current_preview_request:
@@ -9,6 +9,7 @@ from typing import Callable, List, Optional
 from PyQt5 import QtCore, QtWidgets, sip
 
 from _dialogs import ask_confirmation, show_error, show_info, show_warning
+from _item_table import ItemFilterProxyModel, ItemTableModel, TableColumn
 from _ssh import SSHClientWrapper, require_connection
 import _koreader
 import _appload
@@ -129,8 +130,27 @@ class KOReaderTab(QtWidgets.QWidget):
         self.path_edit.setPlaceholderText("设备上的目录路径，回车跳转")
 
         # --- Table ---
-        self.table = QtWidgets.QTableWidget(0, 4)
-        self.table.setHorizontalHeaderLabels(["名称", "类型", "大小", "修改时间"])
+        self.table_model = ItemTableModel(
+            [
+                TableColumn("名称", lambda entry: entry.name),
+                TableColumn("类型", lambda entry: "文件夹" if entry.is_dir else "文件"),
+                TableColumn(
+                    "大小", lambda entry: "" if entry.is_dir else self._format_bytes(entry.size)
+                ),
+                TableColumn(
+                    "修改时间",
+                    lambda entry: datetime.fromtimestamp(entry.mtime).strftime("%Y-%m-%d %H:%M")
+                    if entry.mtime
+                    else "",
+                ),
+            ],
+            key=lambda entry: entry.path,
+            search_text=lambda entry: entry.name,
+            parent=self,
+        )
+        self.table_proxy = ItemFilterProxyModel(self.table_model, self)
+        self.table = QtWidgets.QTableView()
+        self.table.setModel(self.table_proxy)
         self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
         self.table.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
         self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
@@ -226,18 +246,13 @@ class KOReaderTab(QtWidgets.QWidget):
 
     # -- Search / filter -------------------------------------------------------
     def _apply_filter(self, text: str) -> None:
-        text = text.strip().lower()
-        for row in range(self.table.rowCount()):
-            entry = self._entry_for_row(row)
-            visible = bool(entry) and (not text or text in entry.name.lower())
-            self.table.setRowHidden(row, not visible)
+        selected = self._selected_entries()
+        self.table_proxy.set_filter_text(text)
 
         # Never keep a hidden row selected: the user could delete or download
         # entries they can no longer see (mirrors DocumentsTab._apply_filter).
-        for index in self.table.selectionModel().selectedRows():
-            if self.table.isRowHidden(index.row()):
-                self.table.clearSelection()
-                break
+        if any(self.table_proxy.row_for_key(entry.path) is None for entry in selected):
+            self.table.clearSelection()
 
         self._update_results_summary()
         self._update_action_state()
@@ -254,7 +269,7 @@ class KOReaderTab(QtWidgets.QWidget):
             self._loaded_once = False
             self.entries = []
             self._entries_by_path = {}
-            self.table.setRowCount(0)
+            self.table_model.set_items([])
             self.path_edit.clear()
             self._appload_status = None
             self._managed_status = None
@@ -655,13 +670,7 @@ class KOReaderTab(QtWidgets.QWidget):
 
     # -- Selection helpers -----------------------------------------------------
     def _entry_for_row(self, row: int) -> Optional[_koreader.KOReaderEntry]:
-        item = self.table.item(row, 0)
-        if item is None:
-            return None
-        path = item.data(QtCore.Qt.UserRole)
-        if not path:
-            return None
-        return self._entries_by_path.get(str(path))
+        return self.table_proxy.item(row)
 
     def _selected_entries(self) -> List[_koreader.KOReaderEntry]:
         rows = sorted({index.row() for index in self.table.selectionModel().selectedRows()})
@@ -673,9 +682,7 @@ class KOReaderTab(QtWidgets.QWidget):
         return entries
 
     def _visible_entry_count(self) -> int:
-        return sum(
-            0 if self.table.isRowHidden(row) else 1 for row in range(self.table.rowCount())
-        )
+        return self.table_proxy.rowCount()
 
     def _update_results_summary(self) -> None:
         self.results_summary_label.setText(
@@ -790,22 +797,7 @@ class KOReaderTab(QtWidgets.QWidget):
         self.entries = entries
         self._entries_by_path = {entry.path: entry for entry in entries}
         self.path_edit.setText(directory)
-        self.table.setRowCount(len(entries))
-        for row, entry in enumerate(entries):
-            name_item = QtWidgets.QTableWidgetItem(entry.name)
-            name_item.setData(QtCore.Qt.UserRole, entry.path)
-            self.table.setItem(row, 0, name_item)
-            self.table.setItem(
-                row, 1, QtWidgets.QTableWidgetItem("文件夹" if entry.is_dir else "文件")
-            )
-            size_text = "" if entry.is_dir else self._format_bytes(entry.size)
-            self.table.setItem(row, 2, QtWidgets.QTableWidgetItem(size_text))
-            updated_text = (
-                datetime.fromtimestamp(entry.mtime).strftime("%Y-%m-%d %H:%M")
-                if entry.mtime
-                else ""
-            )
-            self.table.setItem(row, 3, QtWidgets.QTableWidgetItem(updated_text))
+        self.table_model.set_items(entries)
         self.table.clearSelection()
         self._apply_filter(self.search_edit.text())
         if install_dir is None:
@@ -951,27 +943,14 @@ class KOReaderTab(QtWidgets.QWidget):
         overwrite: bool,
         progress_callback: Optional[Callable[[int, int], None]] = None,
     ) -> None:
-        sizes = [max(int(os.path.getsize(path)), 0) for path in file_paths]
-        total = sum(sizes)
-        completed = 0
-        for path, size in zip(file_paths, sizes):
-            offset = completed
-
-            def on_file_progress(transferred: int, _total: int, offset=offset):
-                if progress_callback:
-                    progress_callback(offset + transferred, total)
-
-            _koreader.upload_file(
-                self.ssh_client,
-                path,
-                remote_dir,
-                library_root,
-                overwrite=overwrite,
-                progress_callback=on_file_progress if progress_callback else None,
-            )
-            completed += size
-        if progress_callback and total > 0:
-            progress_callback(total, total)
+        _koreader.upload_files(
+            self.ssh_client,
+            file_paths,
+            remote_dir,
+            library_root,
+            overwrite=overwrite,
+            progress_callback=progress_callback,
+        )
 
     # -- Download ----------------------------------------------------------------
     @require_connection
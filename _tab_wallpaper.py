@@ -6,13 +6,15 @@ import os
 import posixpath
 import random
 import tempfile
+import threading
 from dataclasses import dataclass
 from io import BytesIO
-from typing import Dict, List, Optional, Sequence, Set, Tuple
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
 from PIL import Image, ImageDraw, ImageFont, ImageOps
 from PyQt5 import QtCore, QtGui, QtWidgets, sip
 
+from _cover_cache import CoverSource, fetch_covers
 from _dialogs import show_error, show_info, show_warning
 from _ssh import SSHClientWrapper, remount_rw, require_connection
 import rmtool as _rmtool  # late-bound access to avoid circular import
@@ -57,6 +59,8 @@ _DEVICE_FRAME_PROFILES = {
     ),
 }
 _MAX_COVER_WALL_ITEMS = 12
+# Longest side of the draft previews rendered while a crop slider is held.
+_DRAFT_PREVIEW_SIZE = 720
 _COVER_WALL_LAYOUTS = (
     ("hero_obi", "F / 主书腰封"),
     ("poster_wall", "G / 满格海报墙"),
@@ -102,11 +106,19 @@ class _CoverWallEntry:
     cover: Optional[bytes]
 
 
+@dataclass
+class _CoverWallScan:
+    entries: List[_CoverWallEntry]
+    # Covers missing from the local cache, fetched after the dialog opens.
+    pending: List[CoverSource]
+
+
 def compose_device_frame_preview(
     wallpaper: Image.Image,
     frame: Image.Image,
     screen_rect: Tuple[float, float, float, float],
     orientation: str,
+    resample: int = Image.Resampling.LANCZOS,
 ) -> Image.Image:
     """Place a processed wallpaper beneath a device frame at native size."""
     if orientation not in {"portrait", "landscape"}:
@@ -130,7 +142,7 @@ def compose_device_frame_preview(
     screen = ImageOps.fit(
         screen,
         (right - left, bottom - top),
-        method=Image.Resampling.LANCZOS,
+        method=resample,
     )
 
     device = Image.new("RGBA", body_size, (0, 0, 0, 0))
@@ -141,15 +153,144 @@ def compose_device_frame_preview(
     return device
 
 
-def _usable_cover_data(data: Optional[bytes]) -> Optional[bytes]:
-    if not data:
-        return None
-    try:
-        with Image.open(BytesIO(data)) as image:
-            image.verify()
-        return data
-    except Exception:
-        return None
+def process_wallpaper(
+    source: Image.Image,
+    resolution: Tuple[int, int],
+    mode: str,
+    offset: Tuple[int, int] = (0, 0),
+    resample: int = Image.LANCZOS,
+) -> Image.Image:
+    """Fit *source* to *resolution* by padding, stretching or cropping.
+
+    *offset* positions the crop; each axis runs from -100 to 100.
+    """
+    target_w, target_h = resolution
+    if mode == "pad":
+        image = source.copy()
+        image.thumbnail((target_w, target_h), resample)
+        new_img = Image.new("RGB", (target_w, target_h), color="white")
+        position = (
+            (target_w - image.size[0]) // 2,
+            (target_h - image.size[1]) // 2,
+        )
+        new_img.paste(image, position)
+        return new_img
+    if mode == "stretch":
+        return source.resize((target_w, target_h), resample)
+
+    scale = max(target_w / source.width, target_h / source.height)
+    new_size = (int(source.width * scale), int(source.height * scale))
+    range_x = max(new_size[0] - target_w, 0)
+    range_y = max(new_size[1] - target_h, 0)
+    norm_x = (offset[0] + 100) / 200
+    norm_y = (offset[1] + 100) / 200
+    left = int(range_x * norm_x)
+    top = int(range_y * norm_y)
+    # Resample only the part of the source that stays after cropping.
+    box = (
+        left / scale,
+        top / scale,
+        min((left + target_w) / scale, source.width),
+        min((top + target_h) / scale, source.height),
+    )
+    return source.resize((target_w, target_h), resample, box=box)
+
+
+@dataclass(frozen=True)
+class _WallpaperPreviewRequest:
+    source: Image.Image
+    resolution: Tuple[int, int]
+    mode: str
+    offset: Tuple[int, int]
+    orientation: str
+    # Device frame asset and its normalized screen rectangle, if framed.
+    frame_path: Optional[str] = None
+    screen_rect: Optional[Tuple[float, float, float, float]] = None
+    draft: bool = False
+
+
+class _WallpaperPreviewRenderer:
+    """Renders wallpaper previews on a worker thread, one request at a time.
+
+    A full preview matches the uploaded wallpaper.  A draft scales the
+    source, target and device frame down to ``_DRAFT_PREVIEW_SIZE`` first
+    and resamples bilinearly, so it keeps up with a dragged slider.  The
+    scaled copies are kept for the next draft.
+    """
+
+    def __init__(self):
+        self._draft_source: Optional[Tuple[Image.Image, Tuple[int, int], Image.Image]] = None
+        self._draft_frames: Dict[str, Image.Image] = {}
+
+    def forget(self, source: Image.Image) -> None:
+        """Drop the draft copy of *source*."""
+        cached = self._draft_source
+        if cached is not None and cached[0] is source:
+            self._draft_source = None
+
+    def render(self, request: _WallpaperPreviewRequest) -> QtGui.QImage:
+        source = request.source
+        resolution = request.resolution
+        resample = Image.LANCZOS
+        if request.draft:
+            scale = min(1.0, _DRAFT_PREVIEW_SIZE / max(resolution))
+            resolution = (
+                max(1, round(resolution[0] * scale)),
+                max(1, round(resolution[1] * scale)),
+            )
+            source = self._scaled_source(source, resolution)
+            resample = Image.BILINEAR
+        processed = process_wallpaper(source, resolution, request.mode, request.offset, resample)
+        if processed.mode != "RGB":
+            processed = processed.convert("RGB")
+        preview = processed
+        if request.frame_path is not None:
+            try:
+                frame = self._frame(request.frame_path, request.draft)
+                preview = compose_device_frame_preview(
+                    processed,
+                    frame,
+                    request.screen_rect,
+                    request.orientation,
+                    resample,
+                )
+            except (OSError, ValueError):
+                logging.warning(
+                    "Unable to load device frame preview from %s",
+                    request.frame_path,
+                    exc_info=True,
+                )
+        if preview.mode != "RGBA":
+            preview = preview.convert("RGBA")
+        data = preview.tobytes("raw", "RGBA")
+        image = QtGui.QImage(
+            data, preview.width, preview.height, preview.width * 4, QtGui.QImage.Format_RGBA8888
+        )
+        # The QImage only borrows *data*; copy it before the bytes go away.
+        return image.copy()
+
+    def _scaled_source(self, source: Image.Image, resolution: Tuple[int, int]) -> Image.Image:
+        # Keep a little more than the draft target needs so crops stay sharp.
+        factor = min(1.0, 1.5 * max(resolution[0] / source.width, resolution[1] / source.height))
+        size = (max(1, round(source.width * factor)), max(1, round(source.height * factor)))
+        cached = self._draft_source
+        if cached is not None and cached[0] is source and cached[1] == size:
+            return cached[2]
+        scaled = source.resize(size, Image.BILINEAR, reducing_gap=2.0) if factor < 1.0 else source
+        self._draft_source = (source, size, scaled)
+        return scaled
+
+    def _frame(self, path: str, draft: bool) -> Image.Image:
+        if draft:
+            frame = self._draft_frames.get(path)
+            if frame is not None:
+                return frame
+        with Image.open(path) as opened:
+            frame = opened.convert("RGBA")
+        if draft:
+            frame.thumbnail((_DRAFT_PREVIEW_SIZE, _DRAFT_PREVIEW_SIZE), Image.BILINEAR)
+            self._draft_frames[path] = frame
+        return frame
 
 
 def _fit_cover_wall_text(
@@ -636,9 +777,19 @@ def compose_cover_wallpaper(
 
 
 class _CoverWallDialog(QtWidgets.QDialog):
-    def __init__(self, entries: Sequence[_CoverWallEntry], parent=None):
+    _DEFAULT_SELECTION = 9
+
+    def __init__(
+        self,
+        entries: Sequence[_CoverWallEntry],
+        parent=None,
+        loading: Iterable[str] = (),
+    ):
         super().__init__(parent)
         self.entries = list(entries)
+        self._loading = set(loading)
+        self._rows = {entry.item.identifier: row for row, entry in enumerate(self.entries)}
+        self._auto_checked = 0
         self.setWindowTitle("生成封面墙")
         self.resize(720, 620)
 
@@ -659,30 +810,8 @@ class _CoverWallDialog(QtWidgets.QDialog):
         self.table.horizontalHeader().setSectionResizeMode(1, QtWidgets.QHeaderView.Stretch)
         self.table.horizontalHeader().setSectionResizeMode(2, QtWidgets.QHeaderView.ResizeToContents)
 
-        valid_seen = 0
         for row, entry in enumerate(self.entries):
-            selector = QtWidgets.QTableWidgetItem()
-            selector.setData(QtCore.Qt.UserRole, row)
-            if entry.cover:
-                selector.setFlags(QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsUserCheckable)
-                selector.setCheckState(
-                    QtCore.Qt.Checked if valid_seen < 9 else QtCore.Qt.Unchecked
-                )
-                valid_seen += 1
-            else:
-                selector.setFlags(QtCore.Qt.NoItemFlags)
-                selector.setCheckState(QtCore.Qt.Unchecked)
-            self.table.setItem(row, 0, selector)
-
-            name_item = QtWidgets.QTableWidgetItem(entry.item.name)
-            if entry.cover:
-                image = QtGui.QImage.fromData(entry.cover)
-                if not image.isNull():
-                    name_item.setIcon(QtGui.QIcon(QtGui.QPixmap.fromImage(image)))
-            else:
-                name_item.setText(f"{entry.item.name}（无可用封面）")
-                name_item.setForeground(QtGui.QBrush(QtGui.QColor("#888888")))
-            self.table.setItem(row, 1, name_item)
+            self._fill_row(row)
             updated = entry.item.updated.strftime("%Y-%m-%d %H:%M") if entry.item.updated else ""
             self.table.setItem(row, 2, QtWidgets.QTableWidgetItem(updated))
             self.table.setRowHeight(row, 64)
@@ -710,6 +839,48 @@ class _CoverWallDialog(QtWidgets.QDialog):
         layout.addWidget(self.selection_label)
         layout.addWidget(buttons)
 
+    def _fill_row(self, row: int) -> None:
+        entry = self.entries[row]
+        selector = QtWidgets.QTableWidgetItem()
+        selector.setData(QtCore.Qt.UserRole, row)
+        if entry.cover:
+            selector.setFlags(QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsUserCheckable)
+            checked = self._auto_checked < self._DEFAULT_SELECTION
+            selector.setCheckState(QtCore.Qt.Checked if checked else QtCore.Qt.Unchecked)
+            self._auto_checked += 1
+        else:
+            selector.setFlags(QtCore.Qt.NoItemFlags)
+            selector.setCheckState(QtCore.Qt.Unchecked)
+        self.table.setItem(row, 0, selector)
+
+        name_item = QtWidgets.QTableWidgetItem(entry.item.name)
+        if entry.cover:
+            image = QtGui.QImage.fromData(entry.cover)
+            if not image.isNull():
+                name_item.setIcon(QtGui.QIcon(QtGui.QPixmap.fromImage(image)))
+        else:
+            if entry.item.identifier in self._loading:
+                name_item.setText(f"{entry.item.name}（正在读取封面…）")
+            else:
+                name_item.setText(f"{entry.item.name}（无可用封面）")
+            name_item.setForeground(QtGui.QBrush(QtGui.QColor("#888888")))
+        self.table.setItem(row, 1, name_item)
+
+    def add_covers(self, covers: Dict[str, Optional[bytes]]) -> None:
+        """Fill in covers that arrived after the dialog opened."""
+        for identifier, cover in covers.items():
+            row = self._rows.get(identifier)
+            if row is None or identifier not in self._loading:
+                continue
+            self._loading.discard(identifier)
+            self.entries[row] = _CoverWallEntry(self.entries[row].item, cover)
+            self._fill_row(row)
+        self._update_selection_label()
+
+    def finish_loading(self) -> None:
+        """Mark covers that never arrived as unavailable."""
+        self.add_covers({identifier: None for identifier in list(self._loading)})
+
     def selected_entries(self) -> List[_CoverWallEntry]:
         selected = []
         for row, entry in enumerate(self.entries):
@@ -719,9 +890,10 @@ class _CoverWallDialog(QtWidgets.QDialog):
         return selected
 
     def _update_selection_label(self, _item=None) -> None:
-        self.selection_label.setText(
-            f"已选择 {len(self.selected_entries())} / {_MAX_COVER_WALL_ITEMS} 个封面"
-        )
+        text = f"已选择 {len(self.selected_entries())} / {_MAX_COVER_WALL_ITEMS} 个封面"
+        if self._loading:
+            text += f"（还有 {len(self._loading)} 个封面正在读取）"
+        self.selection_label.setText(text)
 
     def accept(self) -> None:
         count = len(self.selected_entries())
@@ -742,6 +914,9 @@ class WallpaperTab(QtWidgets.QWidget):
         self.device_profile = "reMarkable Paper Pro"
         self.image_path: Optional[str] = None
         self._cached_source_image: Optional[Image.Image] = None
+        self._preview_renderer = _WallpaperPreviewRenderer()
+        self._preview_running = False
+        self._pending_preview: Optional[_WallpaperPreviewRequest] = None
         self.current_resolution: Tuple[int, int] = _rmtool.DEVICE_PROFILES["reMarkable Paper Pro"]
         self._unavailable_wallpaper_paths: Set[str] = set()
         self._carousel_blank_active = False
@@ -950,8 +1125,9 @@ class WallpaperTab(QtWidgets.QWidget):
         self.mode_combo.currentIndexChanged.connect(self._on_mode_changed)
         self.orientation_combo.currentIndexChanged.connect(self._on_orientation_changed)
         self.frame_preview_checkbox.toggled.connect(self._render_preview)
-        self.offset_x_slider.valueChanged.connect(self._render_preview)
-        self.offset_y_slider.valueChanged.connect(self._render_preview)
+        for slider in (self.offset_x_slider, self.offset_y_slider):
+            slider.valueChanged.connect(self._on_offset_changed)
+            slider.sliderReleased.connect(self._render_preview)
         self.variant_group.buttonClicked.connect(self._on_variant_selected)
         self.blank_carousel_checkbox.toggled.connect(self._on_blank_carousel_toggled)
         self.ssh_client.connection_changed.connect(self._on_connection_changed)
@@ -1473,22 +1649,63 @@ class WallpaperTab(QtWidgets.QWidget):
         worker.signals.error.connect(self._on_cover_wall_entries_error)
         self.thread_pool.start(worker)
 
-    def _load_cover_wall_entries(self) -> List[_CoverWallEntry]:
+    def _load_cover_wall_entries(self) -> _CoverWallScan:
+        cache = _rmtool.cover_cache_for(self.ssh_client)
         with self.ssh_client.sftp_session() as sftp:
-            entries = []
-            for item in _rmtool.load_document_items(sftp):
-                cover = _usable_cover_data(_rmtool.read_document_cover(sftp, item))
-                entries.append(_CoverWallEntry(item, cover))
-            return entries
+            items = _rmtool.load_device_documents(self.ssh_client, sftp)
+            sources = _rmtool.list_document_covers(self.ssh_client, sftp, items)
+        entries = []
+        pending = []
+        for item in items:
+            source = sources.get(item.identifier)
+            cover = cache.get(source) if cache is not None and source is not None else None
+            entries.append(_CoverWallEntry(item, cover))
+            if source is not None and cover is None:
+                pending.append(source)
+        return _CoverWallScan(entries, pending)
+
+    def _fetch_cover_wall_covers(
+        self,
+        sources: List[CoverSource],
+        cancelled: threading.Event,
+        on_covers=None,
+    ) -> int:
+        """Fetch *sources* batch by batch, handing each batch to *on_covers*."""
+        cache = _rmtool.cover_cache_for(self.ssh_client)
+        fetched = 0
+        for covers in fetch_covers(
+            sources, lambda batch: _rmtool.read_cover_files(self.ssh_client, batch), cache
+        ):
+            fetched += len(covers)
+            if on_covers:
+                on_covers(covers)
+            if cancelled.is_set():
+                break
+        return fetched
 
-    def _on_cover_wall_entries_loaded(self, entries: List[_CoverWallEntry]) -> None:
+    def _on_cover_wall_entries_loaded(self, scan: _CoverWallScan) -> None:
         self._close_cover_wall_progress()
-        if not any(entry.cover for entry in entries):
+        if not scan.pending and not any(entry.cover for entry in scan.entries):
             show_warning(self, _rmtool.APP_NAME, "设备上没有可用于生成封面墙的文档缩略图。")
             return
 
-        dialog = _CoverWallDialog(entries, self)
-        if dialog.exec_() != QtWidgets.QDialog.Accepted:
+        dialog = _CoverWallDialog(
+            scan.entries, self, loading=[source.identifier for source in scan.pending]
+        )
+        cancelled = threading.Event()
+        if scan.pending:
+            worker = _rmtool.Worker(self._fetch_cover_wall_covers, scan.pending, cancelled)
+            worker.kwargs["on_covers"] = worker.signals.partial.emit
+            worker.signals.partial.connect(dialog.add_covers)
+            worker.signals.finished.connect(lambda _count: dialog.finish_loading())
+            worker.signals.error.connect(self._on_cover_wall_fetch_error)
+            worker.signals.error.connect(lambda _exc: dialog.finish_loading())
+            self.thread_pool.start(worker)
+        try:
+            accepted = dialog.exec_() == QtWidgets.QDialog.Accepted
+        finally:
+            cancelled.set()
+        if not accepted:
             return
         try:
             self._apply_cover_wall(
@@ -1501,6 +1718,9 @@ class WallpaperTab(QtWidgets.QWidget):
             logging.exception("Unable to compose cover wall")
             show_error(self, _rmtool.APP_NAME, f"生成封面墙失败：{exc}")
 
+    def _on_cover_wall_fetch_error(self, exc: Exception) -> None:
+        logging.error("Unable to fetch document covers: %s", exc)
+
     def _on_cover_wall_entries_error(self, exc: Exception) -> None:
         self._close_cover_wall_progress()
         logging.error("Unable to load document covers: %s", exc)
@@ -1541,11 +1761,15 @@ class WallpaperTab(QtWidgets.QWidget):
     def _set_source_image(self, image: Image.Image, description: str) -> None:
         previous = self._cached_source_image
         self._cached_source_image = image
+        # A running preview may still be reading the previous image; it is
+        # then left to the garbage collector instead of being closed.
         if previous is not None and previous is not image:
-            try:
-                previous.close()
-            except Exception:
-                pass
+            self._preview_renderer.forget(previous)
+            if not self._preview_running:
+                try:
+                    previous.close()
+                except Exception:
+                    pass
         self.info_label.setText(description)
         self._update_upload_button_state()
         self._render_preview()
@@ -1572,86 +1796,87 @@ class WallpaperTab(QtWidgets.QWidget):
         self._render_preview()
 
     def _render_preview(self):
+        """Render the preview at full quality in the background."""
+        self._request_preview(draft=False)
+
+    def _on_offset_changed(self):
+        dragging = self.offset_x_slider.isSliderDown() or self.offset_y_slider.isSliderDown()
+        self._request_preview(draft=dragging)
+
+    def _preview_request(self, draft: bool) -> _WallpaperPreviewRequest:
+        orientation = self.orientation_combo.currentData()
+        frame_path = screen_rect = None
+        if self.frame_preview_checkbox.isChecked():
+            frame_profile = _DEVICE_FRAME_PROFILES.get(self.device_profile)
+            if frame_profile:
+                frame_filename, screen_rect = frame_profile
+                frame_path = str(
+                    _rmtool.resource_path("assets", "device_frames", frame_filename)
+                )
+        return _WallpaperPreviewRequest(
+            source=self._cached_source_image,
+            resolution=tuple(self.current_resolution),
+            mode=self.mode_combo.currentData(),
+            offset=(self.offset_x_slider.value(), self.offset_y_slider.value()),
+            orientation=orientation,
+            frame_path=frame_path,
+            screen_rect=screen_rect,
+            draft=draft,
+        )
+
+    def _request_preview(self, draft: bool) -> None:
+        # One render runs at a time; requests made meanwhile replace each
+        # other, so only the latest slider position is rendered next.
         if self._cached_source_image is None:
+            self._pending_preview = None
             self.preview_label.clear_preview()
             self.preview_label.setText("请选择图片以生成预览")
             return
-        try:
-            processed = self._process_image()
-        except Exception as exc:
-            logging.exception("Unable to render wallpaper preview")
-            self.preview_label.clear_preview()
-            self.preview_label.setText(f"预览失败：{exc}")
+        request = self._preview_request(draft)
+        if self._preview_running:
+            self._pending_preview = request
             return
-        if processed.mode != "RGB":
-            processed = processed.convert("RGB")
-        preview = processed
-        if self.frame_preview_checkbox.isChecked():
-            frame_profile = _DEVICE_FRAME_PROFILES.get(self.device_profile)
-            if frame_profile:
-                frame_filename, screen_rect = frame_profile
-                try:
-                    with Image.open(
-                        _rmtool.resource_path(
-                            "assets",
-                            "device_frames",
-                            frame_filename,
-                        )
-                    ) as frame:
-                        preview = compose_device_frame_preview(
-                            processed,
-                            frame,
-                            screen_rect,
-                            self.orientation_combo.currentData(),
-                        )
-                except (OSError, ValueError):
-                    logging.warning(
-                        "Unable to load device frame preview for %s",
-                        self.device_profile,
-                        exc_info=True,
-                    )
-        buffer = BytesIO()
-        preview.save(buffer, format="PNG")
-        pixmap = QtGui.QPixmap()
-        if not pixmap.loadFromData(buffer.getvalue(), "PNG"):
-            raise RuntimeError("无法加载图片预览数据")
-        self.preview_label.setPixmap(pixmap)
+        self._start_preview(request)
+
+    def _start_preview(self, request: _WallpaperPreviewRequest) -> None:
+        self._preview_running = True
+        worker = _rmtool.Worker(self._preview_renderer.render, request)
+
+        def on_finished(image: QtGui.QImage):
+            if sip.isdeleted(self):
+                return
+            if request.source is self._cached_source_image:
+                self.preview_label.setPixmap(QtGui.QPixmap.fromImage(image))
+            self._finish_preview()
+
+        def on_error(exc: Exception):
+            if sip.isdeleted(self):
+                logging.error("Wallpaper preview failed after tab close: %s", exc)
+                return
+            if self._pending_preview is None and request.source is self._cached_source_image:
+                self.preview_label.clear_preview()
+                self.preview_label.setText(f"预览失败：{exc}")
+            self._finish_preview()
+
+        worker.signals.finished.connect(on_finished)
+        worker.signals.error.connect(on_error)
+        self.thread_pool.start(worker)
+
+    def _finish_preview(self) -> None:
+        self._preview_running = False
+        pending, self._pending_preview = self._pending_preview, None
+        if pending is not None:
+            self._start_preview(pending)
 
     def _process_image(self) -> Image.Image:
         if self._cached_source_image is None:
             raise RuntimeError("未选择图片")
-        img = self._cached_source_image
-        target_w, target_h = self.current_resolution
-        mode = self.mode_combo.currentData()
-        if mode == "pad":
-            image = img.copy()
-            image.thumbnail((target_w, target_h), Image.LANCZOS)
-            new_img = Image.new("RGB", (target_w, target_h), color="white")
-            offset = (
-                (target_w - image.size[0]) // 2,
-                (target_h - image.size[1]) // 2,
-            )
-            new_img.paste(image, offset)
-            return new_img
-        if mode == "stretch":
-            return img.resize((target_w, target_h), Image.LANCZOS)
-
-        scale = max(target_w / img.width, target_h / img.height)
-        new_size = (int(img.width * scale), int(img.height * scale))
-        resized = img.resize(new_size, Image.LANCZOS)
-        range_x = max(new_size[0] - target_w, 0)
-        range_y = max(new_size[1] - target_h, 0)
-        norm_x = (self.offset_x_slider.value() + 100) / 200
-        norm_y = (self.offset_y_slider.value() + 100) / 200
-        left = int(range_x * norm_x)
-        top = int(range_y * norm_y)
-        box = (
-            left,
-            top,
-            left + target_w,
-            top + target_h,
+        return process_wallpaper(
+            self._cached_source_image,
+            self.current_resolution,
+            self.mode_combo.currentData(),
+            (self.offset_x_slider.value(), self.offset_y_slider.value()),
         )
-        return resized.crop(box)
 
     @require_connection
     def _upload_wallpaper(self):
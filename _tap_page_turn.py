@@ -23,6 +23,7 @@ from typing import Iterable, Optional
 
 import _package_download
 import _xovi_standalone
+from _remote_probe import PROBE_EXISTS, PROBE_SHA256, probe_remote, probe_with_sha256
 
 
 REPO_URL = "https://github.com/pretenderlu/rmtool"
@@ -937,16 +938,15 @@ def _vellum_installed_packages(ssh_client) -> set[str]:
 
 
 def _vellum_runtime_present(ssh_client) -> bool:
-    return any(
-        ssh_client.file_exists(path)
-        for path in (
-            VELLUM_BIN,
-            SHARED_XOVI_DROPIN,
-            SHARED_XOVI_LIBRARY,
-            SHARED_QRR_LIBRARY,
-            SHARED_APPLOAD_LIBRARY,
-        )
+    paths = (
+        VELLUM_BIN,
+        SHARED_XOVI_DROPIN,
+        SHARED_XOVI_LIBRARY,
+        SHARED_QRR_LIBRARY,
+        SHARED_APPLOAD_LIBRARY,
     )
+    probes = probe_remote(ssh_client, ((PROBE_EXISTS, path) for path in paths))
+    return any(probes.exists(path) for path in paths)
 
 
 def _assert_shared_xovi_installable(ssh_client) -> None:
@@ -1060,15 +1060,24 @@ def _payload_valid(ssh_client, package: TapPageTurnPackage) -> tuple[bool, str]:
             return False, "启动包装器标记不匹配"
         if marker.get("dropin_sha256") != expected_dropin:
             return False, "systemd 配置标记不匹配"
-        if _remote_sha256(ssh_client, DROPIN_PATH) != expected_dropin:
+        runtime_files = [
+            (item, posixpath.join(REMOTE_BASE, item.path))
+            for item in package.files
+            if item.path in _RUNTIME_PATHS
+        ]
+        hashes = probe_with_sha256(
+            ssh_client,
+            [(PROBE_SHA256, DROPIN_PATH), (PROBE_SHA256, LAUNCHER_PATH)]
+            + [(PROBE_SHA256, remote) for _item, remote in runtime_files],
+            _remote_sha256,
+        )
+        if hashes.sha256(DROPIN_PATH) != expected_dropin:
             return False, "systemd 配置已被修改"
-        if _remote_sha256(ssh_client, LAUNCHER_PATH) != expected_launcher:
+        if hashes.sha256(LAUNCHER_PATH) != expected_launcher:
             return False, "启动包装器已被修改"
-        for item in package.files:
-            if item.path in _RUNTIME_PATHS:
-                remote = posixpath.join(REMOTE_BASE, item.path)
-                if _remote_sha256(ssh_client, remote) != item.sha256:
-                    return False, f"运行资源 {item.path} 已被修改"
+        for item, remote in runtime_files:
+            if hashes.sha256(remote) != item.sha256:
+                return False, f"运行资源 {item.path} 已被修改"
         return True, ""
     except Exception as exc:
         return False, str(exc)
@@ -1081,12 +1090,16 @@ def get_status(
     packages = tuple(catalog)
     identity = get_device_identity(ssh_client)
     available = tuple(item for item in packages if item.platform == identity.platform)
-    dropin_exists = ssh_client.file_exists(DROPIN_PATH)
-    marker_exists = ssh_client.file_exists(MARKER_PATH)
+    presence = probe_remote(
+        ssh_client,
+        ((PROBE_EXISTS, path) for path in (DROPIN_PATH, MARKER_PATH, VELLUM_BIN)),
+    )
+    dropin_exists = presence.exists(DROPIN_PATH)
+    marker_exists = presence.exists(MARKER_PATH)
     shared_exists = _xovi_standalone.has_shared_artifacts(ssh_client)
     vellum_version = None
     vellum_error = ""
-    if ssh_client.file_exists(VELLUM_BIN):
+    if presence.exists(VELLUM_BIN):
         try:
             vellum_version = _vellum_installed_version(
                 ssh_client, VELLUM_PACKAGE_NAME
@@ -17,6 +17,14 @@ from itertools import product
 from pathlib import Path, PurePosixPath
 from typing import Iterable, Mapping, Optional
 
+from _remote_probe import (
+    PROBE_EXISTS,
+    PROBE_READ,
+    PROBE_SHA256,
+    probe_remote,
+    probe_with_sha256,
+)
+
 
 @dataclass(frozen=True)
 class StandaloneLayout:
@@ -686,6 +694,16 @@ def _validate_owned_tree(
     records = ssh_client.exec_checked(command).splitlines()
     if not records:
         raise RuntimeError(f"{label}目录状态无效。")
+    prefix = base + "/"
+    hashes = probe_with_sha256(
+        ssh_client,
+        (
+            (PROBE_SHA256, remote)
+            for remote in (record.split("|", 4)[-1] for record in records[1:])
+            if remote.startswith(prefix) and remote[len(prefix):] in expected_files
+        ),
+        _remote_sha256,
+    )
     seen = set()
     for index, record in enumerate(records):
         parts = record.split("|", 4)
@@ -720,7 +738,7 @@ def _validate_owned_tree(
                 or (item.size >= 0 and size != item.size)
             ):
                 raise RuntimeError(f"{label}文件 {relative} 类型、权限或大小已变化。")
-            if _remote_sha256(ssh_client, remote) != item.sha256:
+            if hashes.sha256(remote) != item.sha256:
                 raise RuntimeError(f"{label}文件 {relative} 已被修改。")
         else:
             raise RuntimeError(f"{label}目录包含未托管路径 {relative}。")
@@ -768,30 +786,36 @@ def _active(ssh_client, layout: StandaloneLayout = SHARED_LAYOUT) -> bool:
 
 
 def has_shared_artifacts(ssh_client) -> bool:
-    return any(
-        ssh_client.file_exists(path)
-        for path in (
-            SHARED_LAYOUT.remote_base,
-            SHARED_MARKER_PATH,
-            LEGACY_SHARED_LAYOUT.remote_base,
-            f"{LEGACY_SHARED_LAYOUT.remote_base}/package.json",
-            SHARED_LAYOUT.dropin_path,
-        )
+    paths = (
+        SHARED_LAYOUT.remote_base,
+        SHARED_MARKER_PATH,
+        LEGACY_SHARED_LAYOUT.remote_base,
+        f"{LEGACY_SHARED_LAYOUT.remote_base}/package.json",
+        SHARED_LAYOUT.dropin_path,
     )
+    probes = probe_remote(ssh_client, ((PROBE_EXISTS, path) for path in paths))
+    return any(probes.exists(path) for path in paths)
 
 
 def read_shared_identity(ssh_client) -> tuple[str, str, str, str]:
-    current = ssh_client.file_exists(SHARED_LAYOUT.remote_base)
-    legacy = ssh_client.file_exists(LEGACY_SHARED_LAYOUT.remote_base)
+    legacy_marker_path = f"{LEGACY_SHARED_LAYOUT.remote_base}/package.json"
+    probes = probe_remote(
+        ssh_client,
+        (
+            (PROBE_EXISTS, SHARED_LAYOUT.remote_base),
+            (PROBE_EXISTS, LEGACY_SHARED_LAYOUT.remote_base),
+            (PROBE_READ, SHARED_MARKER_PATH),
+            (PROBE_READ, legacy_marker_path),
+        ),
+        fallbacks={PROBE_READ: _remote_text},
+    )
+    current = probes.exists(SHARED_LAYOUT.remote_base)
+    legacy = probes.exists(LEGACY_SHARED_LAYOUT.remote_base)
     if current and legacy:
         raise RuntimeError("检测到 /data 与 /home 两套共享 Xovi 布局。")
-    marker_path = (
-        SHARED_MARKER_PATH
-        if current
-        else f"{LEGACY_SHARED_LAYOUT.remote_base}/package.json"
-    )
+    marker_path = SHARED_MARKER_PATH if current else legacy_marker_path
     try:
-        marker = json.loads(_remote_text(ssh_client, marker_path))
+        marker = json.loads(probes.text(marker_path))
     except Exception as exc:
         raise RuntimeError("共享 Xovi 标记不是有效 JSON。") from exc
     identity = marker.get("identity") if isinstance(marker, dict) else None
@@ -1114,13 +1138,21 @@ def _inspect_shared(
         ssh_client,
         (SHARED_LAYOUT.dropin_path,) if expected_dropin is None else (),
     )
-    if not (
-        ssh_client.file_exists(layout.remote_base)
-        and ssh_client.file_exists(f"{layout.remote_base}/package.json")
-    ):
+    marker_path = f"{layout.remote_base}/package.json"
+    probes = probe_remote(
+        ssh_client,
+        (
+            (PROBE_EXISTS, layout.remote_base),
+            (PROBE_EXISTS, marker_path),
+            (PROBE_READ, marker_path),
+            (PROBE_EXISTS, SHARED_LAYOUT.dropin_path),
+        ),
+        fallbacks={PROBE_READ: _remote_text},
+    )
+    if not (probes.exists(layout.remote_base) and probes.exists(marker_path)):
         raise RuntimeError("共享 Xovi 目录、标记或 drop-in 不完整。")
     try:
-        marker = json.loads(_remote_text(ssh_client, f"{layout.remote_base}/package.json"))
+        marker = json.loads(probes.text(marker_path))
     except Exception as exc:
         raise RuntimeError("共享 Xovi 标记不是有效 JSON。") from exc
     if not isinstance(marker, dict) or set(marker) != {
@@ -1251,7 +1283,7 @@ def _inspect_shared(
         disabled_dirs,
         optional_files,
     )
-    dropin_present = ssh_client.file_exists(SHARED_LAYOUT.dropin_path)
+    dropin_present = probes.exists(SHARED_LAYOUT.dropin_path)
     dropin_required = bool(enabled) if expected_dropin is None else expected_dropin
     if dropin_present != dropin_required:
         raise RuntimeError("共享 Xovi drop-in 状态与功能状态不一致。")
@@ -1848,18 +1880,23 @@ def _stage_shared(
         )
     _upload_bytes(ssh_client, marker, f"{stage}/package.json", 0o644)
     ssh_client.exec_checked(f"chown -R root:root {shlex.quote(stage)}")
-    for path, item in expected.items():
-        remote = f"{stage}/{path}"
-        if _remote_sha256(ssh_client, remote) != item.sha256:
-            raise RuntimeError(f"设备端共享 Xovi 资源 {path} 上传校验失败。")
     generated = [("package.json", hashlib.sha256(marker).hexdigest())]
     if enabled:
         generated.extend((
             ("launcher.sh", launcher_sha),
             (f"systemd/{SHARED_LAYOUT.dropin_name}", dropin_sha),
         ))
+    hashes = probe_with_sha256(
+        ssh_client,
+        [(PROBE_SHA256, f"{stage}/{path}") for path in expected]
+        + [(PROBE_SHA256, f"{stage}/{path}") for path, _digest in generated],
+        _remote_sha256,
+    )
+    for path, item in expected.items():
+        if hashes.sha256(f"{stage}/{path}") != item.sha256:
+            raise RuntimeError(f"设备端共享 Xovi 资源 {path} 上传校验失败。")
     for path, digest in generated:
-        if _remote_sha256(ssh_client, f"{stage}/{path}") != digest:
+        if hashes.sha256(f"{stage}/{path}") != digest:
             raise RuntimeError(f"设备端共享 Xovi 文件 {path} 上传校验失败。")
     if any(
         item.runtime_path.endswith(".qmd")
@@ -2282,14 +2319,22 @@ def _disable_shared_locked(
                     (f"systemd/{SHARED_LAYOUT.dropin_name}", dropin_sha),
                 )
             )
+        hashes = probe_with_sha256(
+            ssh_client,
+            [(PROBE_SHA256, f"{stage}/{path}") for path, _digest in expected_generated]
+            + [
+                (PROBE_SHA256, f"{stage}/{item.runtime_path}")
+                for peer in enabled
+                for item in peer.files
+            ],
+            _remote_sha256,
+        )
         for path, digest in expected_generated:
-            if _remote_sha256(ssh_client, f"{stage}/{path}") != digest:
+            if hashes.sha256(f"{stage}/{path}") != digest:
                 raise RuntimeError(f"设备端共享 Xovi 文件 {path} 更新校验失败。")
         for peer in enabled:
             for item in peer.files:
-                if _remote_sha256(
-                    ssh_client, f"{stage}/{item.runtime_path}"
-                ) != item.sha256:
+                if hashes.sha256(f"{stage}/{item.runtime_path}") != item.sha256:
                     raise RuntimeError(f"共享 Xovi 未能完整保留 {peer.feature_id}。")
         if any(
             item.runtime_path.endswith(".qmd")
@@ -11,19 +11,35 @@ page before being written to a multi-page PDF.
 
 from __future__ import annotations
 
+import hashlib
+import io
 import json
 import math
 import os
-import shutil
 import struct
-import tempfile
+import threading
 import zipfile
+from array import array
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from dataclasses import dataclass
-from pathlib import Path
-from typing import Iterable, List, Optional, Sequence, Tuple
+from itertools import islice
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 from PIL import Image, ImageDraw
 
+from ._cache import PageCache
+from ._pdf import EncodedImage, PdfStreamWriter, VectorPage, encode_image
+
+try:
+    import numpy as _np
+except ImportError:  # pragma: no cover - exercised when numpy is absent
+    _np = None
+    _raster = None
+else:
+    from . import _raster
+
 try:
     import rmscene as _rmscene
     from rmscene import scene_items as _rmscene_items
@@ -31,7 +47,14 @@ except ImportError:
     _rmscene = None
     _rmscene_items = None
 
-__all__ = ["RmrlError", "render_notebook_to_pdf"]
+__all__ = [
+    "PageCache",
+    "RENDER_BACKENDS",
+    "RmrlError",
+    "parse_page_spec",
+    "render_notebook_to_pdf",
+    "render_page_thumbnails",
+]
 
 
 class RmrlError(RuntimeError):
@@ -47,11 +70,83 @@ class Segment:
     tilt: float
 
 
-@dataclass
+def _column(values):
+    """Return *values* as a compact float32 column."""
+    if _np is not None:
+        return _np.ascontiguousarray(values, dtype=_np.float32)
+    if isinstance(values, array) and values.typecode == "f":
+        return values
+    return array("f", values)
+
+
 class Stroke:
-    color: int
-    brush: int
-    segments: List[Segment]
+    """One pen stroke with its points stored column-wise.
+
+    ``x``, ``y``, ``width``, ``pressure`` and the optional ``tilt`` are
+    contiguous float32 columns (NumPy arrays when NumPy is installed, stdlib
+    ``array('f')`` otherwise), about 20 bytes per point instead of one
+    ``Segment`` object with five Python floats.  Pass either ``segments`` or
+    the columns as keywords.
+    """
+
+    __slots__ = ("color", "brush", "x", "y", "width", "pressure", "tilt")
+
+    def __init__(
+        self,
+        color: int,
+        brush: int,
+        segments: Iterable[Segment] = (),
+        *,
+        x=None,
+        y=None,
+        width=None,
+        pressure=None,
+        tilt=None,
+    ) -> None:
+        if x is None:
+            segments = list(segments)
+            x = [segment.x for segment in segments]
+            y = [segment.y for segment in segments]
+            width = [segment.width for segment in segments]
+            pressure = [segment.pressure for segment in segments]
+            tilt = [segment.tilt for segment in segments]
+        self.color = int(color)
+        self.brush = int(brush)
+        self.x = _column(x)
+        self.y = _column(y)
+        self.width = _column(width)
+        self.pressure = _column(pressure)
+        self.tilt = _column(tilt) if tilt is not None else None
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def __repr__(self) -> str:
+        return f"Stroke(color={self.color}, brush={self.brush}, points={len(self)})"
+
+    @property
+    def segments(self) -> List[Segment]:
+        """Per-point view for callers that want ``Segment`` objects."""
+        tilt = self.tilt if self.tilt is not None else [0.0] * len(self)
+        return [
+            Segment(float(x), float(y), float(width), float(pressure), float(t))
+            for x, y, width, pressure, t in zip(self.x, self.y, self.width, self.pressure, tilt)
+        ]
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        if _np is not None and isinstance(self.x, _np.ndarray):
+            return (
+                float(_np.nanmin(self.x)),
+                float(_np.nanmin(self.y)),
+                float(_np.nanmax(self.x)),
+                float(_np.nanmax(self.y)),
+            )
+        return (
+            float(min(self.x)),
+            float(min(self.y)),
+            float(max(self.x)),
+            float(max(self.y)),
+        )
 
 
 @dataclass
@@ -61,7 +156,7 @@ class Layer:
 
 @dataclass
 class PageInfo:
-    path: Path
+    path: Path  # or an ``_ArchiveMember`` for pages read from a zip
     width: int
     height: int
 
@@ -99,13 +194,29 @@ _COLOR_MAP = {
 }
 
 _DEFAULT_PAGE_SIZE = (1404, 1872)
-_SUPER_SAMPLE = 2  # draw at double resolution for smoother output
+# Only the PIL fallback used without numpy draws at this multiple of the
+# page size and scales down; the numpy rasterizer anti-aliases natively.
+_SUPER_SAMPLE = 2
+_PAGE_RESOLUTION = 300.0  # page pixels per inch in the written PDF
+
+# Bump whenever rendered output changes so cached pages are not reused.
+RENDERER_VERSION = 2
+
+BACKEND_RASTER = "raster"
+BACKEND_VECTOR = "vector"
+RENDER_BACKENDS = (BACKEND_RASTER, BACKEND_VECTOR)
 _RM_HEADER_PREFIX = b"reMarkable .lines file, version="
 _RM_PAGE_V3_V5 = struct.Struct("<BBH")
 _RM_LAYER = struct.Struct("<I")
 _RM_STROKE_V3 = struct.Struct("<IIIfI")
 _RM_STROKE_V5 = struct.Struct("<IIIfII")
 _RM_SEGMENT_V3_V5 = struct.Struct("<ffffff")
+_RM_SEGMENT_FALLBACK = struct.Struct("<fffffff")
+
+# Column order of the on-disk point records: x, y, speed, direction, width,
+# pressure and, in the fallback layout, tilt.
+_SEGMENT_FIELDS_V3_V5 = ("x", "y", "speed", "direction", "width", "pressure")
+_SEGMENT_FIELDS_FALLBACK = _SEGMENT_FIELDS_V3_V5 + ("tilt",)
 
 _V6_TOOL_TO_BRUSH = {}
 if _rmscene_items is not None:
@@ -131,29 +242,163 @@ if _rmscene_items is not None:
     }
 
 
+_ARCHIVE_SUFFIXES = (".zip", ".note")
+
+# path -> [open handle, number of sources holding it]
+_open_archives: Dict[str, list] = {}
+_open_archives_lock = threading.Lock()
+
+
+def _open_archive(path: str, retain: bool = False) -> zipfile.ZipFile:
+    """Return the shared handle of the archive at *path*, opening it if needed.
+
+    Sources *retain* the handles they list and release them on cleanup;
+    member reads just borrow the handle while a source holds it.
+    """
+    with _open_archives_lock:
+        entry = _open_archives.get(path)
+        if entry is None:
+            entry = _open_archives[path] = [zipfile.ZipFile(path), 0]
+        if retain:
+            entry[1] += 1
+        return entry[0]
+
+
+def _release_archive(path: str) -> None:
+    """Drop one source's hold on *path*, closing it when none is left."""
+    with _open_archives_lock:
+        entry = _open_archives.get(path)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] > 0:
+            return
+        del _open_archives[path]
+    entry[0].close()
+
+
+def _forget_inherited_archives() -> None:
+    """Pool initializer: drop the archive handles a forked worker inherited.
+
+    A forked worker shares each inherited ``ZipFile``'s file offset with the
+    parent and its sibling workers, so concurrent reads would interleave
+    seeks.  Every worker opens its own handles instead; dropping the
+    inherited ones only closes the worker's copies of their descriptors.
+    """
+    global _open_archives, _open_archives_lock
+    _open_archives = {}
+    _open_archives_lock = threading.Lock()
+
+
+@dataclass(frozen=True, order=True)
+class _ArchiveMember:
+    """A file inside a zip archive, read into memory on demand.
+
+    It offers the small part of the ``Path`` API the parser uses and stays
+    picklable, so worker processes can read pages straight from the archive.
+    """
+
+    archive: str
+    member: str
+
+    @property
+    def name(self) -> str:
+        return PurePosixPath(self.member).name
+
+    @property
+    def stem(self) -> str:
+        return PurePosixPath(self.member).stem
+
+    @property
+    def suffix(self) -> str:
+        return PurePosixPath(self.member).suffix
+
+    def open(self, mode: str = "rb", encoding: Optional[str] = None):
+        buffer = io.BytesIO(_open_archive(self.archive).read(self.member))
+        if "b" in mode:
+            return buffer
+        return io.TextIOWrapper(buffer, encoding=encoding or "utf-8")
+
+    def resolve(self) -> "_ArchiveMember":
+        return self
+
+    def __str__(self) -> str:
+        return f"{self.archive}/{self.member}"
+
+
+def _relative_key(relative: str) -> Tuple[str, ...]:
+    # Sort like ``Path`` objects do: component by component.
+    return tuple(relative.split("/"))
+
+
+def _archive_files(archive_path: Path, strip_single_dir: bool) -> List[Tuple[str, _ArchiveMember]]:
+    archive = str(archive_path)
+    names = [
+        info.filename
+        for info in _open_archive(archive, retain=True).infolist()
+        if not info.is_dir() and not info.filename.startswith("__MACOSX")
+    ]
+    prefix = ""
+    if strip_single_dir and names:
+        # A zipped notebook folder: treat its single top directory as root.
+        heads = {name.split("/", 1)[0] for name in names}
+        if len(heads) == 1 and all("/" in name for name in names):
+            prefix = f"{heads.pop()}/"
+    files = [(name[len(prefix):], _ArchiveMember(archive, name)) for name in names]
+    files.sort(key=lambda item: _relative_key(item[0]))
+    return files
+
+
 class _NotebookSource:
-    """Normalise different notebook sources to a temporary working directory."""
+    """Present a notebook directory or zip archive as one list of files.
+
+    Archives, whether the source itself or ``.note``/``.zip`` files inside
+    a source directory, are read member by member straight from the zip
+    instead of being extracted to disk.  Archive members are listed as if
+    extracted in place, after the directory's own files.
+    """
 
     def __init__(self, source: str, workspace: Optional[str] = None) -> None:
-        self._tempdir: Optional[str] = None
+        # *workspace* is accepted for compatibility; nothing is extracted.
+        self._archives: List[str] = []
         path = Path(source)
         if path.is_file() and zipfile.is_zipfile(path):
-            self._tempdir = tempfile.mkdtemp(prefix="rmrl_", dir=workspace)
-            with zipfile.ZipFile(path) as archive:
-                archive.extractall(self._tempdir)
-            root = Path(self._tempdir)
-            children = [child for child in root.iterdir() if not child.name.startswith("__MACOSX")]
-            if len(children) == 1 and children[0].is_dir():
-                root = children[0]
+            self._archives.append(str(path))
+            self.files = _archive_files(path, strip_single_dir=True)
         elif path.is_dir():
-            root = path
+            self.files = []
+            for directory, _dirnames, filenames in os.walk(path):
+                folder = Path(directory)
+                prefix = folder.relative_to(path).as_posix()
+                prefix = "" if prefix == "." else f"{prefix}/"
+                self.files.extend((f"{prefix}{name}", folder / name) for name in filenames)
+            self.files.sort(key=lambda item: _relative_key(item[0]))
+            for _relative, candidate in list(self.files):
+                if candidate.suffix in _ARCHIVE_SUFFIXES and zipfile.is_zipfile(candidate):
+                    self._archives.append(str(candidate))
+                    self.files.extend(_archive_files(candidate, strip_single_dir=False))
         else:
             raise RmrlError(f"不支持的 rm 源：{source}")
-        self.root = root
+        # Both indexes are built in the one pass over the listing, so page
+        # lookups never walk the tree again.
+        self._by_relative: Dict[str, object] = {}
+        self._by_name: Dict[str, object] = {}
+        for relative, candidate in self.files:
+            self._by_relative.setdefault(relative, candidate)
+            self._by_name.setdefault(relative.rsplit("/", 1)[-1], candidate)
+
+    def get(self, relative: str):
+        """Return the file at *relative* (a POSIX path), or ``None``."""
+        return self._by_relative.get(relative)
+
+    def find(self, name: str):
+        """Return the first file called *name* anywhere in the source."""
+        return self._by_name.get(name)
 
     def cleanup(self) -> None:
-        if self._tempdir and os.path.exists(self._tempdir):
-            shutil.rmtree(self._tempdir, ignore_errors=True)
+        for archive in self._archives:
+            _release_archive(archive)
+        self._archives = []
 
 
 def _load_json(path: Path) -> Optional[dict]:
@@ -181,25 +426,21 @@ def _is_sequence(value: object) -> bool:
     return isinstance(value, Sequence) and not isinstance(value, (str, bytes, bytearray))
 
 
-def _iter_content_files(root: Path) -> Iterable[Path]:
-    for candidate in root.rglob("*.content"):
-        if candidate.is_file():
+def _iter_content_files(source: _NotebookSource) -> Iterable[object]:
+    for relative, candidate in source.files:
+        if relative.endswith(".content"):
             yield candidate
 
 
-def _find_page_file(root: Path, identifier: str) -> Optional[Path]:
-    candidates = [
-        root / f"{identifier}.rm",
-        root / f"page-{identifier}.rm",
-        root / f"{identifier}" / f"{identifier}.rm",
-    ]
-    page_path = next((c for c in candidates if c.exists()), None)
-    if page_path:
-        return page_path
+def _find_page_file(source: _NotebookSource, identifier: str):
+    for relative in (f"{identifier}.rm", f"page-{identifier}.rm", f"{identifier}/{identifier}.rm"):
+        page_path = source.get(relative)
+        if page_path is not None:
+            return page_path
 
-    for pattern in (f"{identifier}.rm", f"page-{identifier}.rm"):
-        page_path = next((c for c in root.rglob(pattern) if c.is_file()), None)
-        if page_path:
+    for name in (f"{identifier}.rm", f"page-{identifier}.rm"):
+        page_path = source.find(name)
+        if page_path is not None:
             return page_path
     return None
 
@@ -223,10 +464,18 @@ def _extract_page_order(content: dict) -> List[str]:
     return []
 
 
-def _collect_pages(root: Path) -> List[PageInfo]:
+def _iter_rm_files(source: _NotebookSource) -> Iterable[object]:
+    for relative, candidate in source.files:
+        if relative.endswith(".rm"):
+            yield candidate
+
+
+def _collect_pages(source) -> List[PageInfo]:
+    if not isinstance(source, _NotebookSource):
+        source = _NotebookSource(str(source))
     page_infos: List[PageInfo] = []
     default_size = _DEFAULT_PAGE_SIZE
-    content_file = next(iter(_iter_content_files(root)), None)
+    content_file = next(iter(_iter_content_files(source)), None)
 
     page_order: List[str] = []
     if content_file:
@@ -249,20 +498,21 @@ def _collect_pages(root: Path) -> List[PageInfo]:
 
     if page_order:
         for identifier in page_order:
-            page_path = _find_page_file(root, identifier)
+            page_path = _find_page_file(source, identifier)
             if page_path:
                 page_infos.append(PageInfo(path=page_path, width=default_size[0], height=default_size[1]))
 
         if len(page_infos) < len(page_order):
-            seen = {info.path.resolve() for info in page_infos}
-            for page_path in sorted(root.rglob("*.rm")):
-                resolved = page_path.resolve()
-                if resolved not in seen:
+            # Every path comes from the one source listing, so plain equality
+            # identifies a file without resolving it on disk.
+            seen = {info.path for info in page_infos}
+            for page_path in _iter_rm_files(source):
+                if page_path not in seen:
                     page_infos.append(PageInfo(path=page_path, width=default_size[0], height=default_size[1]))
-                    seen.add(resolved)
+                    seen.add(page_path)
 
     if not page_infos:
-        for page_path in sorted(root.rglob("*.rm")):
+        for page_path in _iter_rm_files(source):
             page_infos.append(PageInfo(path=page_path, width=default_size[0], height=default_size[1]))
 
     return page_infos
@@ -280,33 +530,65 @@ def _read_float(data: memoryview, offset: int) -> Tuple[float, int]:
     return struct.unpack_from("<f", data, offset)[0], offset + 4
 
 
-def _parse_segments_fallback(data: memoryview, count: int, offset: int) -> Tuple[List[Segment], int]:
-    segments: List[Segment] = []
-    for _ in range(count):
-        x, offset = _read_float(data, offset)
-        y, offset = _read_float(data, offset)
-        _speed, offset = _read_float(data, offset)
-        _direction, offset = _read_float(data, offset)
-        width, offset = _read_float(data, offset)
-        pressure, offset = _read_float(data, offset)
-        tilt, offset = _read_float(data, offset)
-        segments.append(Segment(x=x, y=y, width=width, pressure=pressure, tilt=tilt))
-    return segments, offset
+def _decode_segments(
+    data: memoryview,
+    count: int,
+    offset: int,
+    record: struct.Struct,
+    fields: Tuple[str, ...],
+    error: str,
+) -> Tuple[Dict[str, object], int]:
+    """Decode *count* point records into ``Stroke`` keyword columns."""
+    end = offset + count * record.size
+    if end > len(data):
+        raise RmrlError(error)
+    block = data[offset:end]
+    if _np is not None:
+        dtype = _np.dtype([(name, "<f4") for name in fields])
+        points = _np.frombuffer(block, dtype=dtype, count=count)
+        # Copy every field: a view, even a one-point one that already looks
+        # contiguous, would keep the whole page buffer alive.
+        columns = {name: points[name].copy() for name in fields}
+    else:
+        rows = list(zip(*record.iter_unpack(block))) or [()] * len(fields)
+        columns = dict(zip(fields, rows))
+    return (
+        {
+            "x": columns["x"],
+            "y": columns["y"],
+            "width": columns["width"],
+            "pressure": columns["pressure"],
+            "tilt": columns.get("tilt"),
+        },
+        end,
+    )
+
+
+def _parse_segments_fallback(data: memoryview, count: int, offset: int) -> Tuple[Dict[str, object], int]:
+    return _decode_segments(
+        data,
+        count,
+        offset,
+        _RM_SEGMENT_FALLBACK,
+        _SEGMENT_FIELDS_FALLBACK,
+        "rm 文件数据不完整（读取 float 越界）",
+    )
 
 
 def _update_bounds(
-    segments: Sequence[Segment],
+    stroke: Stroke,
     min_x: float,
     min_y: float,
     max_x: float,
     max_y: float,
 ) -> Tuple[float, float, float, float]:
-    for segment in segments:
-        min_x = min(min_x, segment.x)
-        min_y = min(min_y, segment.y)
-        max_x = max(max_x, segment.x)
-        max_y = max(max_y, segment.y)
-    return min_x, min_y, max_x, max_y
+    stroke_min_x, stroke_min_y, stroke_max_x, stroke_max_y = stroke.bounds()
+    return (
+        min(min_x, stroke_min_x),
+        min(min_y, stroke_min_y),
+        max(max_x, stroke_max_x),
+        max(max_y, stroke_max_y),
+    )
 
 
 def _parse_rm_version(raw: bytes) -> Tuple[Optional[int], int]:
@@ -336,15 +618,15 @@ def _map_v6_brush(tool: int) -> int:
     return _V6_TOOL_TO_BRUSH.get(int(tool), 0)
 
 
-def _parse_segments_v3_v5(data: memoryview, count: int, offset: int) -> Tuple[List[Segment], int]:
-    segments: List[Segment] = []
-    for _ in range(count):
-        if offset + _RM_SEGMENT_V3_V5.size > len(data):
-            raise RmrlError("rm 文件数据不完整（读取线段越界）")
-        x, y, _speed, _direction, width, pressure = _RM_SEGMENT_V3_V5.unpack_from(data, offset)
-        offset += _RM_SEGMENT_V3_V5.size
-        segments.append(Segment(x=x, y=y, width=width, pressure=pressure, tilt=0.0))
-    return segments, offset
+def _parse_segments_v3_v5(data: memoryview, count: int, offset: int) -> Tuple[Dict[str, object], int]:
+    return _decode_segments(
+        data,
+        count,
+        offset,
+        _RM_SEGMENT_V3_V5,
+        _SEGMENT_FIELDS_V3_V5,
+        "rm 文件数据不完整（读取线段越界）",
+    )
 
 
 def _parse_rm_fallback(data: memoryview, offset: int) -> Tuple[List[Layer], Tuple[float, float, float, float]]:
@@ -375,11 +657,12 @@ def _parse_rm_fallback(data: memoryview, offset: int) -> Tuple[List[Layer], Tupl
             segment_count, offset = _read_uint32(data, offset)
             if segment_count > _MAX_SEGMENTS:
                 raise RmrlError(f"rm 文件线段数异常（{segment_count}），文件可能已损坏")
-            segments, offset = _parse_segments_fallback(data, segment_count, offset)
-            if not segments:
+            columns, offset = _parse_segments_fallback(data, segment_count, offset)
+            if not segment_count:
                 continue
-            min_x, min_y, max_x, max_y = _update_bounds(segments, min_x, min_y, max_x, max_y)
-            strokes.append(Stroke(color=color, brush=brush_type, segments=segments))
+            stroke = Stroke(color=color, brush=brush_type, **columns)
+            min_x, min_y, max_x, max_y = _update_bounds(stroke, min_x, min_y, max_x, max_y)
+            strokes.append(stroke)
         layers.append(Layer(strokes=strokes))
     if not layers:
         raise RmrlError("rm 文件中没有可绘制图层")
@@ -388,7 +671,7 @@ def _parse_rm_fallback(data: memoryview, offset: int) -> Tuple[List[Layer], Tupl
     return layers, (min_x, min_y, max_x, max_y)
 
 
-def _parse_rm_v6(path: Path) -> Tuple[List[Layer], Tuple[float, float, float, float]]:
+def _parse_rm_v6(path) -> Tuple[List[Layer], Tuple[float, float, float, float]]:
     if _rmscene is None or _rmscene_items is None:
         raise RmrlError("检测到 rm v6 文件，但当前环境缺少 rmscene 依赖")
 
@@ -408,33 +691,26 @@ def _parse_rm_v6(path: Path) -> Tuple[List[Layer], Tuple[float, float, float, fl
         if not isinstance(item, _rmscene_items.Line):
             continue
 
-        thickness_scale = float(getattr(item, "thickness_scale", 1.0) or 1.0)
-        segments: List[Segment] = []
-        for point in getattr(item, "points", ()):
-            pressure = float(point.pressure)
-            if pressure > 1.0:
-                pressure /= 255.0
-            segments.append(
-                Segment(
-                    x=float(point.x),
-                    y=float(point.y),
-                    width=max(0.1, float(point.width) / 4.0 * thickness_scale),
-                    pressure=pressure,
-                    tilt=0.0,
-                )
-            )
-        if not segments:
+        points = getattr(item, "points", None) or ()
+        if not points:
             continue
-
-        min_x, min_y, max_x, max_y = _update_bounds(segments, min_x, min_y, max_x, max_y)
-        strokes.append(
-            Stroke(
-                color=int(item.color),
-                brush=_map_v6_brush(int(item.tool)),
-                segments=segments,
-            )
+        thickness_scale = float(getattr(item, "thickness_scale", 1.0) or 1.0)
+        width_scale = thickness_scale / 4.0
+        pressures = (float(point.pressure) for point in points)
+        # rmscene already holds one object per point; copy them into compact
+        # columns so the page keeps no per-point Python objects afterwards.
+        stroke = Stroke(
+            color=int(item.color),
+            brush=_map_v6_brush(int(item.tool)),
+            x=[float(point.x) for point in points],
+            y=[float(point.y) for point in points],
+            width=[max(0.1, float(point.width) * width_scale) for point in points],
+            pressure=[value / 255.0 if value > 1.0 else value for value in pressures],
         )
 
+        min_x, min_y, max_x, max_y = _update_bounds(stroke, min_x, min_y, max_x, max_y)
+        strokes.append(stroke)
+
     if not strokes:
         raise RmrlError("rm 文件中没有可绘制图层")
     if math.isinf(min_x) or math.isinf(min_y) or math.isinf(max_x) or math.isinf(max_y):
@@ -442,7 +718,7 @@ def _parse_rm_v6(path: Path) -> Tuple[List[Layer], Tuple[float, float, float, fl
     return [Layer(strokes=strokes)], (min_x, min_y, max_x, max_y)
 
 
-def _parse_rm(path: Path) -> Tuple[List[Layer], Tuple[float, float, float, float]]:
+def _parse_rm(path) -> Tuple[List[Layer], Tuple[float, float, float, float]]:
     with path.open("rb") as handle:
         raw = handle.read()
     if len(raw) < 8:
@@ -480,11 +756,12 @@ def _parse_rm(path: Path) -> Tuple[List[Layer], Tuple[float, float, float, float
                         raise RmrlError("rm 文件数据不完整（读取 v5 笔画越界）")
                     brush_type, color, _reserved, _base_width, _unknown2, segment_count = _RM_STROKE_V5.unpack_from(data, offset)
                     offset += _RM_STROKE_V5.size
-                segments, offset = _parse_segments_v3_v5(data, segment_count, offset)
-                if not segments:
+                columns, offset = _parse_segments_v3_v5(data, segment_count, offset)
+                if not segment_count:
                     continue
-                min_x, min_y, max_x, max_y = _update_bounds(segments, min_x, min_y, max_x, max_y)
-                strokes.append(Stroke(color=color, brush=brush_type, segments=segments))
+                stroke = Stroke(color=color, brush=brush_type, **columns)
+                min_x, min_y, max_x, max_y = _update_bounds(stroke, min_x, min_y, max_x, max_y)
+                strokes.append(stroke)
             layers.append(Layer(strokes=strokes))
         if not layers:
             raise RmrlError("rm 文件中没有可绘制图层")
@@ -495,6 +772,26 @@ def _parse_rm(path: Path) -> Tuple[List[Layer], Tuple[float, float, float, float
     return _parse_rm_fallback(data, offset)
 
 
+def _stroke_polyline(
+    stroke: Stroke,
+    brush_scale: float,
+    scale: float,
+    offset_x: float,
+    offset_y: float,
+) -> Tuple[List[Tuple[float, float]], float]:
+    """Return the page-space points of a stroke and its median pen width."""
+    middle = len(stroke) // 2
+    if _np is not None and isinstance(stroke.x, _np.ndarray):
+        xs = stroke.x.astype(_np.float64) * scale + offset_x
+        ys = stroke.y.astype(_np.float64) * scale + offset_y
+        widths = _np.maximum(0.35, stroke.width.astype(_np.float64) * brush_scale) * scale
+        width = float(_np.partition(widths, middle)[middle])
+        return list(zip(xs.tolist(), ys.tolist())), width
+    points = [(x * scale + offset_x, y * scale + offset_y) for x, y in zip(stroke.x, stroke.y)]
+    widths = sorted(max(0.35, value * brush_scale) * scale for value in stroke.width)
+    return points, widths[middle]
+
+
 def _render_layer(
     draw: ImageDraw.ImageDraw,
     layer: Layer,
@@ -502,23 +799,15 @@ def _render_layer(
     offset_x: float,
     offset_y: float,
 ) -> None:
+    """Draw *layer* with PIL at each stroke's median width (no numpy)."""
     for stroke in layer.strokes:
-        if len(stroke.segments) < 2:
+        if len(stroke) < 2:
             continue
         color_value = _COLOR_MAP.get(stroke.color, 0)
         if color_value >= 255:
             continue  # white strokes are invisible on a white background
         brush_scale = _BRUSH_SCALE.get(stroke.brush, 1.0)
-        points = [
-            (
-                segment.x * scale + offset_x,
-                segment.y * scale + offset_y,
-            )
-            for segment in stroke.segments
-        ]
-        widths = [max(0.35, segment.width * brush_scale) * scale for segment in stroke.segments]
-        sorted_widths = sorted(widths)
-        width = sorted_widths[len(sorted_widths) // 2]
+        points, width = _stroke_polyline(stroke, brush_scale, scale, offset_x, offset_y)
         width = max(1, int(round(width)))
         try:
             draw.line(points, fill=color_value, width=width, joint="curve")
@@ -530,40 +819,104 @@ def _render_layer(
             draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=color_value)
 
 
+def _rasterize_layer(
+    canvas,
+    layer: Layer,
+    scale: float,
+    offset_x: float,
+    offset_y: float,
+) -> None:
+    """Paint *layer* onto the float *canvas* following every point's width.
+
+    Strokes of one colour are filled together in a single pass; colours keep
+    the order in which they first appear in the layer.
+    """
+    groups: Dict[int, Tuple[list, list, list, list]] = {}
+    for stroke in layer.strokes:
+        if len(stroke) < 2:
+            continue
+        color_value = _COLOR_MAP.get(stroke.color, 0)
+        if color_value >= 255:
+            continue  # white strokes are invisible on a white background
+        brush_scale = _BRUSH_SCALE.get(stroke.brush, 1.0)
+        xs, ys, widths, counts = groups.setdefault(color_value, ([], [], [], []))
+        xs.append(_np.asarray(stroke.x, dtype=_np.float64))
+        ys.append(_np.asarray(stroke.y, dtype=_np.float64))
+        widths.append(_np.maximum(0.35, _np.asarray(stroke.width, dtype=_np.float64) * brush_scale))
+        counts.append(len(stroke))
+    for color_value, (xs, ys, widths, counts) in groups.items():
+        polygons = _raster.stroke_polygons(
+            _np.concatenate(xs) * scale + offset_x,
+            _np.concatenate(ys) * scale + offset_y,
+            _np.concatenate(widths) * scale,
+            counts,
+        )
+        _raster.fill_strokes(canvas, polygons, float(color_value))
+
+
+def _draw_layers(
+    width: int,
+    height: int,
+    layers: List[Layer],
+    scale: float,
+    offset_x: float,
+    offset_y: float,
+) -> Image.Image:
+    """Render *layers* onto a white *width* x *height* greyscale image."""
+    if _np is not None:
+        canvas = _np.full((height, width), 255.0, dtype=_np.float32)
+        for layer in layers:
+            _rasterize_layer(canvas, layer, scale, offset_x, offset_y)
+        return Image.fromarray(_np.rint(canvas).astype(_np.uint8), "L")
+
+    # Without numpy, draw at a higher resolution and scale down to smooth
+    # the otherwise aliased PIL lines.
+    image = Image.new("L", (width * _SUPER_SAMPLE, height * _SUPER_SAMPLE), color=255)
+    draw = ImageDraw.Draw(image)
+    for layer in layers:
+        _render_layer(
+            draw,
+            layer,
+            scale * _SUPER_SAMPLE,
+            offset_x * _SUPER_SAMPLE,
+            offset_y * _SUPER_SAMPLE,
+        )
+    return image.resize((width, height), Image.LANCZOS)
+
+
 def _page_render_transform(
     page: PageInfo,
     bounds: Tuple[float, float, float, float],
 ) -> Tuple[float, float, float]:
+    """Return ``(scale, offset_x, offset_y)`` mapping strokes onto the page
+    canvas, shrinking content that would overflow it."""
     min_x, min_y, max_x, max_y = bounds
     canvas_w = max(page.width, 1)
     canvas_h = max(page.height, 1)
-    super_w = canvas_w * _SUPER_SAMPLE
-    super_h = canvas_h * _SUPER_SAMPLE
-    base_scale = float(_SUPER_SAMPLE)
-    margin = 32.0 * _SUPER_SAMPLE
+    margin = 32.0
 
     content_w = max(max_x - min_x, 1.0)
     content_h = max(max_y - min_y, 1.0)
-    x_overflows = min_x * base_scale < 0 or max_x * base_scale > super_w
-    y_overflows = min_y * base_scale < 0 or max_y * base_scale > super_h
+    x_overflows = min_x < 0 or max_x > canvas_w
+    y_overflows = min_y < 0 or max_y > canvas_h
     if x_overflows or y_overflows:
-        usable_w = max(super_w - margin * 2.0, 1.0)
-        usable_h = max(super_h - margin * 2.0, 1.0)
-        scale = min(base_scale, usable_w / content_w, usable_h / content_h)
+        usable_w = max(canvas_w - margin * 2.0, 1.0)
+        usable_h = max(canvas_h - margin * 2.0, 1.0)
+        scale = min(1.0, usable_w / content_w, usable_h / content_h)
     else:
-        scale = base_scale
+        scale = 1.0
 
     offset_x = 0.0
     if min_x * scale < margin:
         offset_x = margin - min_x * scale
-    if max_x * scale + offset_x > super_w - margin:
-        offset_x = (super_w - margin) - max_x * scale
+    if max_x * scale + offset_x > canvas_w - margin:
+        offset_x = (canvas_w - margin) - max_x * scale
 
     offset_y = 0.0
     if min_y * scale < margin:
         offset_y = margin - min_y * scale
-    if max_y * scale + offset_y > super_h - margin:
-        offset_y = (super_h - margin) - max_y * scale
+    if max_y * scale + offset_y > canvas_h - margin:
+        offset_y = (canvas_h - margin) - max_y * scale
 
     if not x_overflows:
         offset_x = 0.0
@@ -578,47 +931,304 @@ def _render_page(
     layers: List[Layer],
     bounds: Tuple[float, float, float, float],
 ) -> Image.Image:
+    scale, offset_x, offset_y = _page_render_transform(page, bounds)
+    return _draw_layers(max(page.width, 1), max(page.height, 1), layers, scale, offset_x, offset_y)
+
+
+def _render_thumbnail(
+    page: PageInfo,
+    layers: List[Layer],
+    bounds: Tuple[float, float, float, float],
+    size: int,
+) -> Image.Image:
+    """Render the page so its longer side is *size* pixels."""
     canvas_w = max(page.width, 1)
     canvas_h = max(page.height, 1)
+    factor = size / max(canvas_w, canvas_h)
+    thumb_w = max(1, int(round(canvas_w * factor)))
+    thumb_h = max(1, int(round(canvas_h * factor)))
+    scale, offset_x, offset_y = _page_render_transform(page, bounds)
+    return _draw_layers(thumb_w, thumb_h, layers, scale * factor, offset_x * factor, offset_y * factor)
 
-    # Draw at a higher resolution to get smoother strokes before scaling down.
-    super_w = canvas_w * _SUPER_SAMPLE
-    super_h = canvas_h * _SUPER_SAMPLE
-    image = Image.new("L", (super_w, super_h), color=255)
-    draw = ImageDraw.Draw(image)
 
+def _vector_layer(
+    ops: List[str],
+    layer: Layer,
+    scale: float,
+    offset_x: float,
+    offset_y: float,
+) -> None:
+    color = width = None
+    for stroke in layer.strokes:
+        if len(stroke) < 2:
+            continue
+        color_value = _COLOR_MAP.get(stroke.color, 0)
+        if color_value >= 255:
+            continue
+        brush_scale = _BRUSH_SCALE.get(stroke.brush, 1.0)
+        points, stroke_width = _stroke_polyline(stroke, brush_scale, scale, offset_x, offset_y)
+        if color_value != color:
+            color = color_value
+            ops.append(f"{color_value / 255.0:.3f} G")
+        if stroke_width != width:
+            width = stroke_width
+            ops.append(f"{stroke_width:.2f} w")
+        (x, y), rest = points[0], points[1:]
+        ops.append(f"{x:.1f} {y:.1f} m")
+        ops.extend(f"{x:.1f} {y:.1f} l" for x, y in rest)
+        ops.append("S")
+
+
+def _render_page_vector(
+    page: PageInfo,
+    layers: List[Layer],
+    bounds: Tuple[float, float, float, float],
+) -> VectorPage:
+    """Describe the page as PDF path operators instead of a bitmap.
+
+    Strokes go through the same transform as the raster backend, at page
+    pixel scale, and the content stream maps page pixels to points.
+    """
+    points_per_pixel = 72.0 / _PAGE_RESOLUTION
+    width = max(page.width, 1) * points_per_pixel
+    height = max(page.height, 1) * points_per_pixel
     scale, offset_x, offset_y = _page_render_transform(page, bounds)
-
+    # Flip y so page pixels keep the top-left origin of the .rm data; round
+    # caps and joins match the end dots the raster backend paints.
+    ops = [f"{points_per_pixel:.6f} 0 0 {-points_per_pixel:.6f} 0 {height:.4f} cm 1 J 1 j"]
     for layer in layers:
-        _render_layer(draw, layer, scale, offset_x, offset_y)
+        _vector_layer(ops, layer, scale, offset_x, offset_y)
+    return VectorPage(width, height, "\n".join(ops).encode("ascii"))
 
-    if _SUPER_SAMPLE > 1:
-        image = image.resize((canvas_w, canvas_h), Image.LANCZOS)
-    return image
 
+def _render_page_job(page: PageInfo, backend: str = BACKEND_RASTER):
+    """Parse and render one page for the PDF; runs in worker processes."""
+    layers, bounds = _parse_rm(page.path)
+    if backend == BACKEND_VECTOR:
+        return _render_page_vector(page, layers, bounds)
+    return encode_image(_render_page(page, layers, bounds))
 
-def render_notebook_to_pdf(source: str, output_pdf: str, workspace: Optional[str] = None) -> None:
-    """Render a notebook (directory or archive) into a multi-page PDF."""
 
+def _write_rendered_page(writer: PdfStreamWriter, rendered) -> None:
+    if isinstance(rendered, VectorPage):
+        writer.add_vector_page(rendered)
+    else:
+        writer.add_image_page(rendered, resolution=_PAGE_RESOLUTION)
+
+
+def _page_cache_key(page: PageInfo, backend: str) -> str:
+    digest = hashlib.sha256()
+    with page.path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    digest.update(
+        f"|{RENDERER_VERSION}|{backend}|{page.width}x{page.height}|{_rmscene is not None}".encode("ascii")
+    )
+    return digest.hexdigest()
+
+
+def _dump_rendered(rendered) -> bytes:
+    if isinstance(rendered, VectorPage):
+        header = {"kind": "vector", "width": rendered.width, "height": rendered.height}
+        payload = rendered.content
+    else:
+        header = {
+            "kind": "image",
+            "width": rendered.width,
+            "height": rendered.height,
+            "color_space": rendered.color_space.decode("ascii"),
+        }
+        payload = rendered.data
+    return json.dumps(header).encode("ascii") + b"\n" + payload
+
+
+def _load_rendered(data: bytes):
+    header_line, _sep, payload = data.partition(b"\n")
+    try:
+        header = json.loads(header_line)
+        if header["kind"] == "vector":
+            return VectorPage(float(header["width"]), float(header["height"]), payload)
+        return EncodedImage(
+            int(header["width"]),
+            int(header["height"]),
+            header["color_space"].encode("ascii"),
+            payload,
+        )
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def _lookup_cached(cache: Optional[PageCache], page: PageInfo, backend: str):
+    """Return ``(key, rendered)``; *rendered* is ``None`` on a cache miss."""
+    if cache is None:
+        return None, None
+    key = _page_cache_key(page, backend)
+    data = cache.get(key)
+    return key, (_load_rendered(data) if data is not None else None)
+
+
+def _resolve_jobs(jobs: Optional[int]) -> int:
+    if jobs is None:
+        return 1
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def _iter_rendered_pages(
+    pages: Sequence[PageInfo],
+    jobs: int,
+    backend: str = BACKEND_RASTER,
+    cache: Optional[PageCache] = None,
+) -> Iterator[object]:
+    """Yield rendered pages in *pages* order, rendering up to *jobs* at once.
+
+    At most ``2 * jobs`` pages are in flight, so finished pages never pile
+    up in memory while the writer catches up.  Pages found in *cache* are
+    not rendered again; newly rendered ones are stored in it.
+    """
+    if jobs <= 1 or len(pages) < 2:
+        for page in pages:
+            key, rendered = _lookup_cached(cache, page, backend)
+            if rendered is None:
+                rendered = _render_page_job(page, backend)
+                if key is not None:
+                    cache.put(key, _dump_rendered(rendered))
+            yield rendered
+        return
+
+    remaining = iter(pages)
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(pages)), initializer=_forget_inherited_archives
+    ) as pool:
+        pending = deque()
+
+        def schedule(page: PageInfo) -> None:
+            key, rendered = _lookup_cached(cache, page, backend)
+            if rendered is None:
+                rendered = pool.submit(_render_page_job, page, backend)
+            pending.append((key, rendered))
+
+        for page in islice(remaining, jobs * 2):
+            schedule(page)
+        try:
+            while pending:
+                key, rendered = pending.popleft()
+                if isinstance(rendered, Future):
+                    rendered = rendered.result()
+                    if key is not None:
+                        cache.put(key, _dump_rendered(rendered))
+                next_page = next(remaining, None)
+                if next_page is not None:
+                    schedule(next_page)
+                yield rendered
+        finally:
+            for _key, rendered in pending:
+                if isinstance(rendered, Future):
+                    rendered.cancel()
+
+
+def parse_page_spec(spec: str) -> List[int]:
+    """Turn a 1-based page list such as ``"1-3,7"`` into 0-based indices."""
+    indices: List[int] = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, sep, last = part.partition("-")
+        try:
+            start = int(first)
+            end = int(last) if sep else start
+        except ValueError:
+            raise ValueError(f"无效的页码范围：{part}") from None
+        if start < 1 or end < start:
+            raise ValueError(f"无效的页码范围：{part}")
+        indices.extend(range(start - 1, end))
+    if not indices:
+        raise ValueError("未指定任何页码")
+    return indices
+
+
+def _select_pages(pages: List[PageInfo], selection: Optional[Iterable[int]]) -> List[PageInfo]:
+    if selection is None:
+        return pages
+    selected: List[PageInfo] = []
+    for index in dict.fromkeys(selection):
+        if not 0 <= index < len(pages):
+            raise RmrlError(f"页码超出范围：{index + 1}（共 {len(pages)} 页）")
+        selected.append(pages[index])
+    return selected
+
+
+def render_page_thumbnails(
+    source: str,
+    pages: Optional[Iterable[int]] = None,
+    size: int = 256,
+    workspace: Optional[str] = None,
+) -> List[bytes]:
+    """Return PNG thumbnails of the notebook's pages.
+
+    *pages* are 0-based page indices (all pages by default); the result
+    follows their order.  Each thumbnail's longer side is *size* pixels.
+    """
     notebook = _NotebookSource(source, workspace)
     try:
-        pages = _collect_pages(notebook.root)
-        if not pages:
+        all_pages = _collect_pages(notebook)
+        if not all_pages:
             raise RmrlError("未找到任何 .rm 页面")
-        images: List[Image.Image] = []
-        for page in pages:
+        thumbnails: List[bytes] = []
+        for page in _select_pages(all_pages, pages):
             layers, bounds = _parse_rm(page.path)
-            rendered = _render_page(page, layers, bounds)
-            images.append(rendered.convert("RGB"))
-        if not images:
-            raise RmrlError("没有可用于导出的页面")
-        first, *rest = images
-        first.save(
-            output_pdf,
-            "PDF",
-            resolution=300.0,
-            save_all=bool(rest),
-            append_images=rest,
-        )
+            buffer = io.BytesIO()
+            _render_thumbnail(page, layers, bounds, size).save(buffer, "PNG")
+            thumbnails.append(buffer.getvalue())
+        return thumbnails
+    finally:
+        notebook.cleanup()
+
+
+def render_notebook_to_pdf(
+    source: str,
+    output_pdf: str,
+    workspace: Optional[str] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    jobs: Optional[int] = None,
+    backend: str = BACKEND_RASTER,
+    cache: Optional[PageCache] = None,
+    pages: Optional[Iterable[int]] = None,
+) -> None:
+    """Render a notebook (directory or archive) into a multi-page PDF.
+
+    Each page is encoded and written as soon as it is rendered, so peak
+    memory is about one page regardless of notebook length.  The PDF is
+    assembled next to *output_pdf* and moved into place only when complete.
+    *progress_callback* receives ``(pages_done, page_count)``.  *jobs* > 1
+    renders pages in that many worker processes (0 means one per CPU);
+    the default renders serially in this process.  *backend* is
+    ``"raster"`` for bitmap pages or ``"vector"`` to write strokes as PDF
+    paths, which is smaller, faster and sharp at any zoom.  With a
+    :class:`PageCache`, pages whose ``.rm`` content was rendered before are
+    reused instead of rendered again.  *pages* limits the output to those
+    0-based page indices, in the given order.
+    """
+    if backend not in RENDER_BACKENDS:
+        raise ValueError(f"未知的渲染方式：{backend}")
+
+    notebook = _NotebookSource(source, workspace)
+    try:
+        all_pages = _collect_pages(notebook)
+        if not all_pages:
+            raise RmrlError("未找到任何 .rm 页面")
+        pages = _select_pages(all_pages, pages)
+        if progress_callback:
+            progress_callback(0, len(pages))
+        partial_pdf = f"{output_pdf}.part"
+        with PdfStreamWriter(partial_pdf) as writer:
+            rendered = _iter_rendered_pages(pages, _resolve_jobs(jobs), backend, cache)
+            for index, page in enumerate(rendered, start=1):
+                _write_rendered_page(writer, page)
+                if progress_callback:
+                    progress_callback(index, len(pages))
+        os.replace(partial_pdf, output_pdf)
     finally:
         notebook.cleanup()
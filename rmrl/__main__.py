@@ -4,8 +4,21 @@ from __future__ import annotations
 
 import argparse
 import sys
+from pathlib import Path
 
-from . import RmrlError, render_notebook_to_pdf
+from . import (
+    BACKEND_RASTER,
+    RENDER_BACKENDS,
+    RmrlError,
+    parse_page_spec,
+    render_notebook_to_pdf,
+    render_page_thumbnails,
+)
+
+
+def _page_selection(args: argparse.Namespace):
+    spec = getattr(args, "pages", None)
+    return parse_page_spec(spec) if spec else None
 
 
 def _render_from_args(args: argparse.Namespace) -> int:
@@ -18,8 +31,15 @@ def _render_from_args(args: argparse.Namespace) -> int:
         print("rmrl: 需要指定输出文件路径", file=sys.stderr)
         return 1
     workspace = getattr(args, "workspace", None)
+    jobs = getattr(args, "jobs", None)
+    backend = getattr(args, "backend", BACKEND_RASTER)
+    try:
+        pages = _page_selection(args)
+    except ValueError as exc:
+        print(f"rmrl: {exc}", file=sys.stderr)
+        return 1
     try:
-        render_notebook_to_pdf(source, output, workspace)
+        render_notebook_to_pdf(source, output, workspace, jobs=jobs, backend=backend, pages=pages)
     except RmrlError as exc:
         print(f"rmrl: {exc}", file=sys.stderr)
         return 2
@@ -29,6 +49,25 @@ def _render_from_args(args: argparse.Namespace) -> int:
     return 0
 
 
+def _thumbnails_from_args(args: argparse.Namespace) -> int:
+    try:
+        pages = _page_selection(args)
+    except ValueError as exc:
+        print(f"rmrl: {exc}", file=sys.stderr)
+        return 1
+    try:
+        thumbnails = render_page_thumbnails(args.source, pages, size=args.size)
+    except RmrlError as exc:
+        print(f"rmrl: {exc}", file=sys.stderr)
+        return 2
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    indices = pages if pages is not None else range(len(thumbnails))
+    for index, data in zip(dict.fromkeys(indices), thumbnails):
+        (output_dir / f"page-{index + 1:03d}.png").write_bytes(data)
+    return 0
+
+
 def main(argv: list[str] | None = None) -> int:
     parser = argparse.ArgumentParser(prog="rmrl", description="内置的 rmrl 渲染器")
     subparsers = parser.add_subparsers(dest="command")
@@ -37,27 +76,51 @@ def main(argv: list[str] | None = None) -> int:
     render_parser.add_argument("source", help="rm 文件所在的目录或 zip 压缩包")
     render_parser.add_argument("output", help="输出 PDF 路径")
     render_parser.add_argument("--workspace", help="临时工作目录", default=None)
+    render_parser.add_argument(
+        "--jobs", type=int, default=None, help="并行渲染的进程数（0 表示按 CPU 核数）"
+    )
+    render_parser.add_argument(
+        "--backend",
+        choices=RENDER_BACKENDS,
+        default=BACKEND_RASTER,
+        help="raster 输出位图页面；vector 输出矢量笔迹，体积更小且缩放清晰",
+    )
+    render_parser.add_argument("--pages", help="只渲染指定页，例如 1-3,7", default=None)
     render_parser.set_defaults(func=_render_from_args, output_path=None)
 
     export_parser = subparsers.add_parser("export", help="render 命令的别名")
     export_parser.add_argument("source")
     export_parser.add_argument("output")
     export_parser.add_argument("--workspace", help="临时工作目录", default=None)
+    export_parser.add_argument(
+        "--jobs", type=int, default=None, help="并行渲染的进程数（0 表示按 CPU 核数）"
+    )
+    export_parser.add_argument(
+        "--backend",
+        choices=RENDER_BACKENDS,
+        default=BACKEND_RASTER,
+        help="raster 输出位图页面；vector 输出矢量笔迹，体积更小且缩放清晰",
+    )
+    export_parser.add_argument("--pages", help="只渲染指定页，例如 1-3,7", default=None)
     export_parser.set_defaults(func=_render_from_args, output_path=None)
 
-    # 兼容旧的简写：rmrl <source> <output>
-    parser.add_argument("source", nargs="?", help=argparse.SUPPRESS)
-    parser.add_argument("output", nargs="?", help=argparse.SUPPRESS)
-    parser.add_argument("--workspace", help=argparse.SUPPRESS)
+    thumbnails_parser = subparsers.add_parser("thumbnails", help="渲染页面缩略图（PNG）")
+    thumbnails_parser.add_argument("source", help="rm 文件所在的目录或 zip 压缩包")
+    thumbnails_parser.add_argument("output_dir", help="缩略图输出目录")
+    thumbnails_parser.add_argument("--pages", help="只渲染指定页，例如 1-3,7", default=None)
+    thumbnails_parser.add_argument("--size", type=int, default=256, help="缩略图长边像素")
+    thumbnails_parser.set_defaults(func=_thumbnails_from_args)
+
+    # 兼容旧的简写：rmrl <source> <output> 等同于 rmrl render <source> <output>
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv and not argv[0].startswith("-") and argv[0] not in subparsers.choices:
+        argv.insert(0, "render")
 
     args = parser.parse_args(argv)
 
     if hasattr(args, "func"):
         return args.func(args)
 
-    if args.source and args.output:
-        return _render_from_args(args)
-
     parser.print_help()
     return 1
 
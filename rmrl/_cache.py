@@ -0,0 +1,116 @@
+"""Content-addressed on-disk cache for rendered notebook pages.
+
+Keys are computed by the renderer from the page file's SHA-256 plus
+everything else that changes the output, so an entry never needs to be
+invalidated: edited pages simply get a new key.  Entries are plain files
+whose modification time doubles as the last-use stamp; once the cache grows
+past ``max_bytes`` the least recently used ones are removed.  I/O errors
+are treated as misses, like the app's other caches (see ``_state_files``).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from _state_files import write_atomic
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Evict down to this share of the cap so a full cache does not rescan the
+# directory on every store.
+_PRUNE_TARGET = 0.8
+
+
+class PageCache:
+    """Rendered page payloads stored under *directory*, capped at *max_bytes*."""
+
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the payload stored for *key* and mark it as recently used."""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store *data* for *key*, evicting old entries when over the cap."""
+        path = self._path(key)
+        try:
+            previous = path.stat().st_size if path.exists() else 0
+            write_atomic(path, data)
+        except OSError:
+            logging.warning("Could not store rendered page %s", key, exc_info=True)
+            return
+        with self._lock:
+            if self._total is None:
+                self._total = sum(size for _mtime, size, _path in self._entries())
+            else:
+                self._total += len(data) - previous
+            if self._total > self.max_bytes:
+                self._prune(int(self.max_bytes * _PRUNE_TARGET))
+
+    def clear(self) -> None:
+        """Remove every cached page."""
+        with self._lock:
+            for _mtime, _size, path in self._entries():
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            self._total = 0
+
+    def size(self) -> int:
+        """Return the bytes currently used by cached pages."""
+        with self._lock:
+            return sum(size for _mtime, size, _path in self._entries())
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        entries = []
+        if not self.directory.is_dir():
+            return entries
+        for shard in self.directory.iterdir():
+            if not shard.is_dir():
+                continue
+            for path in shard.iterdir():
+                if path.name.startswith("."):
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _prune(self, target: int) -> None:
+        entries = sorted(self._entries(), key=lambda entry: entry[0])
+        total = sum(size for _mtime, size, _path in entries)
+        for _mtime, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+        self._total = total
@@ -0,0 +1,209 @@
+"""Minimal streaming PDF writer used by the rmrl renderers.
+
+Pages are written to disk as soon as they are added, so memory use stays at
+roughly one page no matter how long the notebook is.  Only the page tree,
+catalog and cross-reference table wait until :meth:`PdfStreamWriter.close`.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import zlib
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, List, Optional, Union
+
+from PIL import Image
+
+_IMAGE_COLOR_SPACES = {"L": b"/DeviceGray", "RGB": b"/DeviceRGB"}
+
+
+@dataclass(frozen=True)
+class EncodedImage:
+    """A page image already compressed for the PDF, cheap to pickle."""
+
+    width: int
+    height: int
+    color_space: bytes
+    data: bytes
+
+
+def encode_image(image: Image.Image) -> EncodedImage:
+    """JPEG-encode *image* the way :meth:`PdfStreamWriter.add_image` embeds it."""
+    if image.mode not in _IMAGE_COLOR_SPACES:
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG")
+    return EncodedImage(image.width, image.height, _IMAGE_COLOR_SPACES[image.mode], buffer.getvalue())
+
+
+@dataclass(frozen=True)
+class VectorPage:
+    """A page of *width* x *height* points drawn by a content stream."""
+
+    width: float
+    height: float
+    content: bytes
+
+
+def _number(value: float) -> bytes:
+    text = f"{value:.4f}".rstrip("0").rstrip(".")
+    return (text if text not in ("", "-0") else "0").encode("ascii")
+
+
+class PdfStreamWriter:
+    """Write a PDF page by page to *path*.
+
+    Use as a context manager: a clean exit finishes the file, an exception
+    closes and removes the partial output.
+    """
+
+    _CATALOG_ID = 1
+    _PAGES_ID = 2
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._handle: Optional[BinaryIO] = open(path, "wb")
+        self._offsets: Dict[int, int] = {}
+        self._page_ids: List[int] = []
+        self._next_id = self._PAGES_ID + 1
+        self._handle.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    @property
+    def page_count(self) -> int:
+        return len(self._page_ids)
+
+    def __enter__(self) -> "PdfStreamWriter":
+        return self
+
+    def __exit__(self, exc_type, _exc, _tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _allocate(self) -> int:
+        object_id = self._next_id
+        self._next_id += 1
+        return object_id
+
+    def _write_object(self, object_id: int, body: bytes, stream: Optional[bytes] = None) -> None:
+        assert self._handle is not None
+        self._offsets[object_id] = self._handle.tell()
+        self._handle.write(f"{object_id} 0 obj\n".encode("ascii"))
+        if stream is None:
+            self._handle.write(body)
+        else:
+            self._handle.write(body[:-2] + b"/Length " + str(len(stream)).encode("ascii") + b" >>")
+            self._handle.write(b"\nstream\n")
+            self._handle.write(stream)
+            self._handle.write(b"\nendstream")
+        self._handle.write(b"\nendobj\n")
+
+    def add_page(
+        self,
+        width: float,
+        height: float,
+        content: bytes,
+        xobjects: Optional[Dict[str, int]] = None,
+        *,
+        compress: bool = False,
+    ) -> None:
+        """Add a page of *width* x *height* points drawn by *content*.
+
+        *xobjects* maps resource names used in *content* to object ids
+        returned by :meth:`add_image`.  *compress* deflates the content
+        stream, which pays off for long vector paths.
+        """
+        content_id = self._allocate()
+        if compress:
+            self._write_object(content_id, b"<< /Filter /FlateDecode >>", zlib.compress(content))
+        else:
+            self._write_object(content_id, b"<< >>", content)
+        resources = b"<< "
+        if xobjects:
+            resources += b"/XObject << " + b" ".join(
+                f"/{name} {object_id} 0 R".encode("ascii")
+                for name, object_id in xobjects.items()
+            ) + b" >> "
+        resources += b">>"
+        page_id = self._allocate()
+        self._write_object(
+            page_id,
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 "
+            + _number(width)
+            + b" "
+            + _number(height)
+            + b"] /Resources "
+            + resources
+            + b" /Contents "
+            + f"{content_id} 0 R".encode("ascii")
+            + b" >>",
+        )
+        self._page_ids.append(page_id)
+
+    def add_image(self, image: Union[Image.Image, EncodedImage]) -> int:
+        """Write *image* as a JPEG image XObject and return its object id."""
+        if not isinstance(image, EncodedImage):
+            image = encode_image(image)
+        object_id = self._allocate()
+        self._write_object(
+            object_id,
+            b"<< /Type /XObject /Subtype /Image /Width "
+            + str(image.width).encode("ascii")
+            + b" /Height "
+            + str(image.height).encode("ascii")
+            + b" /ColorSpace "
+            + image.color_space
+            + b" /BitsPerComponent 8 /Filter /DCTDecode >>",
+            image.data,
+        )
+        return object_id
+
+    def add_image_page(
+        self, image: Union[Image.Image, EncodedImage], resolution: float = 300.0
+    ) -> None:
+        """Add a page showing *image* at *resolution* pixels per inch."""
+        width = image.width * 72.0 / resolution
+        height = image.height * 72.0 / resolution
+        image_id = self.add_image(image)
+        content = b"q " + _number(width) + b" 0 0 " + _number(height) + b" 0 0 cm /Im0 Do Q"
+        self.add_page(width, height, content, {"Im0": image_id})
+
+    def add_vector_page(self, page: VectorPage) -> None:
+        """Add a :class:`VectorPage` with its content stream compressed."""
+        self.add_page(page.width, page.height, page.content, compress=True)
+
+    def close(self) -> None:
+        """Write the page tree, catalog and cross-reference table."""
+        if self._handle is None:
+            return
+        kids = b" ".join(f"{page_id} 0 R".encode("ascii") for page_id in self._page_ids)
+        self._write_object(
+            self._PAGES_ID,
+            b"<< /Type /Pages /Kids [" + kids + b"] /Count "
+            + str(len(self._page_ids)).encode("ascii") + b" >>",
+        )
+        self._write_object(self._CATALOG_ID, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref_offset = self._handle.tell()
+        size = self._next_id
+        lines = [f"xref\n0 {size}\n".encode("ascii"), b"0000000000 65535 f \n"]
+        for object_id in range(1, size):
+            lines.append(f"{self._offsets[object_id]:010d} 00000 n \n".encode("ascii"))
+        self._handle.write(b"".join(lines))
+        self._handle.write(
+            f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("ascii")
+        )
+        self._handle.close()
+        self._handle = None
+
+    def abort(self) -> None:
+        """Close and delete the partial file."""
+        if self._handle is None:
+            return
+        self._handle.close()
+        self._handle = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
@@ -0,0 +1,322 @@
+"""Offline benchmark for the embedded rmrl parser and renderers.
+
+Run ``python -m rmrl.bench`` to generate synthetic notebooks in every page
+format rmrl reads (v3, v5, the header-less fallback layout and, when
+rmscene is installed, v6) and time them::
+
+    python -m rmrl.bench --pages 20 --strokes 300 --points 80
+    python -m rmrl.bench --output baseline.json
+    python -m rmrl.bench --baseline baseline.json --tolerance 0.25
+
+For each format and backend it reports the time to parse every page, the
+time for a full ``render_notebook_to_pdf`` run, the peak traced Python
+memory of that run and the PDF size.  tracemalloc only sees this process,
+so runs with ``--jobs`` render in workers it cannot trace and report no
+peak memory.  With ``--baseline`` the exit status is
+1 when any timing is slower than the stored one by more than the tolerance,
+so the command can gate parser or renderer changes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from . import (
+    RENDER_BACKENDS,
+    _collect_pages,
+    _parse_rm,
+    _resolve_jobs,
+    _rmscene,
+    render_notebook_to_pdf,
+)
+
+FORMATS = ("v3", "v5", "fallback", "v6")
+
+_HEADER = b"reMarkable .lines file, version="
+
+
+@dataclass
+class BenchResult:
+    format: str
+    backend: str
+    pages: int
+    points: int
+    parse_seconds: float
+    render_seconds: float
+    # None when pages were rendered in worker processes.
+    peak_memory_bytes: Optional[int]
+    output_bytes: int
+
+
+def _stroke_points(rng: random.Random, points: int) -> List[tuple]:
+    # A wandering pen line: small steps with slowly turning direction, like
+    # handwriting, rather than uniformly random jumps across the page.
+    x = rng.uniform(150.0, 1250.0)
+    y = rng.uniform(150.0, 1700.0)
+    angle = rng.uniform(0.0, 2.0 * math.pi)
+    result = []
+    for _ in range(points):
+        angle += rng.uniform(-0.4, 0.4)
+        x = min(max(x + 4.0 * math.cos(angle), 0.0), 1404.0)
+        y = min(max(y + 4.0 * math.sin(angle), 0.0), 1872.0)
+        result.append((x, y, rng.uniform(1.5, 3.0), rng.uniform(0.3, 1.0)))
+    return result
+
+
+def _build_v6_page(rng: random.Random, strokes: int, points: int) -> bytes:
+    from uuid import UUID
+
+    from rmscene import (
+        AuthorIdsBlock,
+        CrdtId,
+        CrdtSequenceItem,
+        LwwValue,
+        MigrationInfoBlock,
+        PageInfoBlock,
+        SceneGroupItemBlock,
+        SceneLineItemBlock,
+        SceneTreeBlock,
+        TreeNodeBlock,
+        write_blocks,
+    )
+    from rmscene import scene_items as si
+
+    blocks = [
+        AuthorIdsBlock({1: UUID(int=rng.getrandbits(128))}),
+        MigrationInfoBlock(CrdtId(1, 1), True),
+        PageInfoBlock(1, 0, 0, 0),
+        TreeNodeBlock(si.Group(node_id=CrdtId(0, 1))),
+        SceneTreeBlock(CrdtId(0, 11), CrdtId(0, 0), True, CrdtId(0, 1)),
+        TreeNodeBlock(si.Group(node_id=CrdtId(0, 11), label=LwwValue(CrdtId(0, 12), "Layer 1"))),
+        SceneGroupItemBlock(
+            parent_id=CrdtId(0, 1),
+            item=CrdtSequenceItem(CrdtId(0, 13), CrdtId(0, 0), CrdtId(0, 0), 0, CrdtId(0, 11)),
+        ),
+    ]
+    previous = CrdtId(0, 0)
+    for index in range(strokes):
+        item_id = CrdtId(0, 14 + index)
+        line = si.Line(
+            color=si.PenColor.BLACK,
+            tool=si.Pen.BALLPOINT_1,
+            points=[
+                si.Point(x, y, 0, 0, int(width * 4), int(pressure * 255))
+                for x, y, width, pressure in _stroke_points(rng, points)
+            ],
+            thickness_scale=1.0,
+            starting_length=0.0,
+        )
+        blocks.append(
+            SceneLineItemBlock(
+                parent_id=CrdtId(0, 11),
+                item=CrdtSequenceItem(item_id, previous, CrdtId(0, 0), 0, line),
+            )
+        )
+        previous = item_id
+    buffer = BytesIO()
+    write_blocks(buffer, blocks)
+    return buffer.getvalue()
+
+
+def build_page(page_format: str, strokes: int, points: int, seed: int = 0) -> bytes:
+    """Return one synthetic ``.rm`` page in *page_format*."""
+    rng = random.Random(seed)
+    if page_format == "v6":
+        if _rmscene is None:
+            raise RuntimeError("生成 v6 页面需要 rmscene")
+        return _build_v6_page(rng, strokes, points)
+
+    parts: List[bytes] = []
+    if page_format in ("v3", "v5"):
+        # One layer; the layer count lives in the page header.
+        parts.append(_HEADER + page_format[1].encode("ascii") + b" " * 10)
+        parts.append(struct.pack("<BBH", 1, 0, 0))
+    elif page_format == "fallback":
+        parts.append(struct.pack("<I", 1))
+    else:
+        raise ValueError(f"未知的页面格式：{page_format}")
+    parts.append(struct.pack("<I", strokes))
+    for _ in range(strokes):
+        if page_format == "v3":
+            parts.append(struct.pack("<IIIfI", 2, 0, 0, 2.0, points))
+        elif page_format == "v5":
+            parts.append(struct.pack("<IIIfII", 2, 0, 0, 2.0, 0, points))
+        else:
+            parts.append(struct.pack("<IIIffffI", 2, 0, 0, 2.0, 1.0, 0.0, 0.0, points))
+        for x, y, width, pressure in _stroke_points(rng, points):
+            if page_format == "fallback":
+                parts.append(struct.pack("<fffffff", x, y, 0.0, 0.0, width, pressure, 0.0))
+            else:
+                parts.append(struct.pack("<ffffff", x, y, 0.0, 0.0, width, pressure))
+    return b"".join(parts)
+
+
+def write_notebook(root: Path, page_format: str, pages: int, strokes: int, points: int) -> Path:
+    """Write a synthetic notebook directory under *root* and return it."""
+    notebook = root / f"notebook-{page_format}"
+    page_dir = notebook / "doc"
+    page_dir.mkdir(parents=True)
+    identifiers = [f"page-{index:04d}" for index in range(pages)]
+    for index, identifier in enumerate(identifiers):
+        (page_dir / f"{identifier}.rm").write_bytes(build_page(page_format, strokes, points, seed=index))
+    (notebook / "doc.content").write_text(
+        json.dumps({"pages": identifiers, "pageDimensions": [1404, 1872]}), encoding="utf-8"
+    )
+    return notebook
+
+
+def _best_of(repeat: int, run) -> float:
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmarks(
+    formats: Sequence[str] = FORMATS,
+    backends: Sequence[str] = RENDER_BACKENDS,
+    pages: int = 10,
+    strokes: int = 200,
+    points: int = 60,
+    repeat: int = 1,
+    jobs: Optional[int] = None,
+) -> List[BenchResult]:
+    """Benchmark every format/backend pair; timings are the best of *repeat*."""
+    results: List[BenchResult] = []
+    parallel = _resolve_jobs(jobs) > 1 and pages > 1
+    with tempfile.TemporaryDirectory(prefix="rmrl-bench-") as temp_root:
+        root = Path(temp_root)
+        for page_format in formats:
+            if page_format == "v6" and _rmscene is None:
+                print("rmrl.bench: 未安装 rmscene，跳过 v6", file=sys.stderr)
+                continue
+            notebook = write_notebook(root, page_format, pages, strokes, points)
+            page_infos = _collect_pages(notebook)
+            parse_seconds = _best_of(repeat, lambda: [_parse_rm(page.path) for page in page_infos])
+            for backend in backends:
+                output = root / f"{page_format}-{backend}.pdf"
+
+                def render() -> None:
+                    render_notebook_to_pdf(str(notebook), str(output), jobs=jobs, backend=backend)
+
+                render_seconds = _best_of(repeat, render)
+                peak = None
+                if not parallel:
+                    tracemalloc.start()
+                    try:
+                        render()
+                        _current, peak = tracemalloc.get_traced_memory()
+                    finally:
+                        tracemalloc.stop()
+                results.append(
+                    BenchResult(
+                        format=page_format,
+                        backend=backend,
+                        pages=pages,
+                        points=pages * strokes * points,
+                        parse_seconds=parse_seconds,
+                        render_seconds=render_seconds,
+                        peak_memory_bytes=peak,
+                        output_bytes=output.stat().st_size,
+                    )
+                )
+    return results
+
+
+def find_regressions(
+    results: Sequence[BenchResult], baseline: Sequence[Dict[str, object]], tolerance: float
+) -> List[str]:
+    """Describe every timing in *results* slower than *baseline* by more than *tolerance*."""
+    previous = {(entry["format"], entry["backend"]): entry for entry in baseline}
+    regressions = []
+    for result in results:
+        entry = previous.get((result.format, result.backend))
+        if entry is None:
+            continue
+        for field in ("parse_seconds", "render_seconds"):
+            before = float(entry[field])
+            after = getattr(result, field)
+            if before > 0 and after > before * (1.0 + tolerance):
+                regressions.append(
+                    f"{result.format}/{result.backend} {field}: {before:.3f}s -> {after:.3f}s"
+                )
+    return regressions
+
+
+def _format_table(results: Sequence[BenchResult]) -> str:
+    lines = [
+        f"{'format':<9}{'backend':<8}{'pages':>6}{'points':>10}{'parse s':>10}"
+        f"{'render s':>10}{'peak MiB':>10}{'PDF KiB':>10}"
+    ]
+    for result in results:
+        peak = (
+            "-"
+            if result.peak_memory_bytes is None
+            else f"{result.peak_memory_bytes / 1048576:.1f}"
+        )
+        lines.append(
+            f"{result.format:<9}{result.backend:<8}{result.pages:>6}{result.points:>10}"
+            f"{result.parse_seconds:>10.3f}{result.render_seconds:>10.3f}"
+            f"{peak:>10}{result.output_bytes / 1024:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="rmrl.bench", description="rmrl 解析与渲染基准测试")
+    parser.add_argument("--formats", default=",".join(FORMATS), help="逗号分隔的页面格式")
+    parser.add_argument("--backends", default=",".join(RENDER_BACKENDS), help="逗号分隔的渲染方式")
+    parser.add_argument("--pages", type=int, default=10, help="每个笔记的页数")
+    parser.add_argument("--strokes", type=int, default=200, help="每页笔画数")
+    parser.add_argument("--points", type=int, default=60, help="每笔画的点数")
+    parser.add_argument("--repeat", type=int, default=3, help="每项取最快的一次")
+    parser.add_argument(
+        "--jobs", type=int, default=None, help="并行渲染的进程数（此时不统计峰值内存）"
+    )
+    parser.add_argument("--output", help="把结果写成 JSON 文件")
+    parser.add_argument("--baseline", help="与此前保存的 JSON 结果比较")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许的变慢比例")
+    args = parser.parse_args(argv)
+
+    formats = [name for name in args.formats.split(",") if name]
+    backends = [name for name in args.backends.split(",") if name]
+    unknown = [name for name in formats if name not in FORMATS] + [
+        name for name in backends if name not in RENDER_BACKENDS
+    ]
+    if unknown:
+        parser.error(f"未知的格式或渲染方式：{', '.join(unknown)}")
+
+    results = run_benchmarks(
+        formats, backends, args.pages, args.strokes, args.points, max(args.repeat, 1), args.jobs
+    )
+    print(_format_table(results))
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps([asdict(result) for result in results], indent=2), encoding="utf-8"
+        )
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = find_regressions(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"rmrl.bench: 性能回退 {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry point
+    sys.exit(main())
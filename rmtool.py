@@ -3,6 +3,7 @@ import logging
 import logging.handlers
 import os
 import re
+import shlex
 import sys
 import tempfile
 import uuid
@@ -14,9 +15,22 @@ sys.modules.setdefault("rmtool", sys.modules[__name__])
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Callable, Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
 import paramiko
+from paramiko.sftp import (
+    CMD_CLOSE,
+    CMD_DATA,
+    CMD_HANDLE,
+    CMD_OPEN,
+    CMD_READ,
+    CMD_STATUS,
+    SFTP_EOF,
+    SFTP_FLAG_READ,
+    int64,
+)
+from paramiko.sftp_attr import SFTPAttributes
+from paramiko.sftp_file import SFTPFile
 from PIL import Image
 from PyQt5 import QtCore, QtGui, QtSvg, QtWidgets, sip
 
@@ -380,6 +394,16 @@ def host_key_fingerprint(host_key: paramiko.PKey) -> str:
     return ":".join(f"{byte:02x}" for byte in host_key.get_fingerprint())
 
 
+from _cover_cache import (
+    CoverCache,
+    CoverSource,
+    cache_for_device,
+    parse_thumbnail_listing,
+    pick_cover_name,
+)
+from _document_index import DocumentIndex, index_for_device
+from _export_mirror import NotebookMirror, device_mirrors_dir, mirror_for, prune_mirrors, trim_mirrors
+from _remote_probe import read_remote_files, supports_batch
 from _ssh import (
     remount_rw,
     require_connection,
@@ -433,22 +457,337 @@ def is_active_document_metadata(metadata: object) -> bool:
     )
 
 
-def load_document_items(sftp: paramiko.SFTPClient) -> List[DocumentItem]:
-    """Read and sort document metadata from an existing SFTP session."""
+# Below this many unread metadata files, plain SFTP reads beat starting a
+# remote shell for a batch read.
+BULK_METADATA_MIN_FILES = 8
+
+BulkFileReader = Callable[[List[str]], Dict[str, bytes]]
+
+# How many remote files pipelined_read keeps open with reads in flight.
+PIPELINE_WINDOW = 32
+
+
+def _parse_metadata(data) -> Optional[object]:
     try:
-        entries = sftp.listdir_attr(DOCUMENT_ROOT)
-    except IOError:
-        return []
+        return json.loads(data)
+    except ValueError:
+        return None
+
+
+class _SFTPReplies:
+    """Collects replies to SFTP requests sent without waiting for them.
+
+    paramiko dispatches a reply to the object registered with its request,
+    so the requests of a whole window can be sent back to back and their
+    replies gathered afterwards in any order.
+    """
+
+    def __init__(self, sftp: paramiko.SFTPClient):
+        self.sftp = sftp
+        self._replies: Dict[int, tuple] = {}
+
+    def send(self, request_type: int, *args) -> int:
+        return self.sftp._async_request(self, request_type, *args)
+
+    def _async_response(self, reply_type, msg, num) -> None:
+        self._replies[num] = (reply_type, msg)
+
+    def wait(self, numbers: List[int]) -> List[tuple]:
+        for num in numbers:
+            while num not in self._replies:
+                self.sftp._read_response()
+        return [self._replies.pop(num) for num in numbers]
+
+
+def _reply_data(reply: tuple) -> bytes:
+    """Return the bytes of a read reply; end-of-file reads as ``b""``."""
+    reply_type, msg = reply
+    if reply_type == CMD_DATA:
+        return msg.get_string()
+    if reply_type == CMD_STATUS and msg.get_int() == SFTP_EOF:
+        return b""
+    raise IOError("SFTP read failed")
+
+
+def _read_to_eof(sftp: paramiko.SFTPClient, handle: bytes, offset: int) -> bytes:
+    chunks = []
+    while True:
+        try:
+            reply_type, msg = sftp._request(
+                CMD_READ, handle, int64(offset), SFTPFile.MAX_REQUEST_SIZE
+            )
+        except EOFError:
+            break
+        if reply_type != CMD_DATA:
+            raise IOError("SFTP read failed")
+        data = msg.get_string()
+        if not data:
+            break
+        chunks.append(data)
+        offset += len(data)
+    return b"".join(chunks)
+
+
+def _pipelined_window(
+    replies: _SFTPReplies,
+    files: List[Tuple[str, Optional[int]]],
+    results: Dict[str, Optional[bytes]],
+) -> List[int]:
+    """Open and read one window of *files*; return the pending close requests."""
+    sftp = replies.sftp
+    opens = [
+        replies.send(CMD_OPEN, sftp._adjust_cwd(path), SFTP_FLAG_READ, SFTPAttributes())
+        for path, _size in files
+    ]
+    handles = []
+    for (path, size), (reply_type, msg) in zip(files, replies.wait(opens)):
+        if reply_type == CMD_HANDLE:
+            handles.append((path, size, msg.get_binary()))
+        else:
+            results[path] = None
+    # One byte past the listed size tells a file that grew since the listing
+    # from one that ends where it was listed, without an end-of-file read.
+    step = SFTPFile.MAX_REQUEST_SIZE
+    reads = []
+    for _path, size, handle in handles:
+        length = step if size is None else size + 1
+        reads.append([
+            replies.send(CMD_READ, handle, int64(offset), min(step, length - offset))
+            for offset in range(0, length, step)
+        ])
+    for (path, size, handle), numbers in zip(handles, reads):
+        try:
+            data = b"".join(_reply_data(reply) for reply in replies.wait(numbers))
+            if len(data) > (step - 1 if size is None else size):
+                data += _read_to_eof(sftp, handle, len(data))
+            results[path] = data
+        except Exception:
+            logging.debug("Pipelined read failed for %s", path, exc_info=True)
+            results[path] = None
+    return [replies.send(CMD_CLOSE, handle) for _path, _size, handle in handles]
+
+
+def pipelined_read(
+    sftp: paramiko.SFTPClient,
+    files: List[Tuple[str, Optional[int]]],
+    window: int = PIPELINE_WINDOW,
+) -> Dict[str, Optional[bytes]]:
+    """Read ``(path, size)`` *files* with their requests pipelined on one channel.
+
+    Files go *window* at a time: the opens of a window are sent together,
+    then the reads of every file that opened, then the closes, whose replies
+    are collected while the next window opens.  A window costs about two
+    round trips instead of three per file.  Each known size is read with one
+    extra byte; only a file that returns more than its listed size, having
+    grown since it was listed, needs further reads.  A size of ``None``
+    (unknown) reads one request's worth and continues if that came back
+    full.  Unreadable files map to ``None``.
+
+    Clients without paramiko's asynchronous requests (such as test doubles)
+    open, read and close one file after another.
+    """
+    results: Dict[str, Optional[bytes]] = {}
+    step = max(1, window)
+    if not callable(getattr(sftp, "_async_request", None)):
+        for path, size in files:
+            results[path] = _read_file(sftp, path, size)
+        return results
+    replies = _SFTPReplies(sftp)
+    closing: List[int] = []
+    for start in range(0, len(files), step):
+        batch = files[start:start + step]
+        try:
+            pending = _pipelined_window(replies, batch, results)
+            replies.wait(closing)
+            closing = pending
+        except Exception:
+            logging.warning("Pipelined SFTP read failed", exc_info=True)
+            for path, _size in batch:
+                results.setdefault(path, None)
+            closing = []
+    try:
+        replies.wait(closing)
+    except Exception:
+        logging.debug("Closing pipelined reads failed", exc_info=True)
+    return results
+
+
+def _read_file(sftp, path: str, size: Optional[int]) -> Optional[bytes]:
+    try:
+        file_handle = sftp.open(path, "rb")
+    except Exception:
+        return None
+    try:
+        if size is None:
+            return file_handle.read()
+        data = file_handle.read(size + 1)
+        if len(data) > size:
+            data += file_handle.read()
+        return data
+    except Exception:
+        return None
+    finally:
+        try:
+            file_handle.close()
+        except Exception:
+            pass
+
+
+def _read_metadata_files(
+    sftp: paramiko.SFTPClient,
+    filenames: List[str],
+    bulk_read: Optional[BulkFileReader] = None,
+    sizes: Optional[Dict[str, Optional[int]]] = None,
+) -> Dict[str, Optional[object]]:
+    """Parse *filenames* from the document root; ``None`` marks unreadable files.
+
+    *bulk_read* fetches many files in one remote round trip.  Whatever it
+    cannot deliver, including the whole batch when it fails, is read over
+    SFTP with pipelined reads; *sizes* (from the listing) lets those reads
+    be requested up front.
+    """
+    results: Dict[str, Optional[object]] = {}
+    if bulk_read is not None and len(filenames) >= BULK_METADATA_MIN_FILES:
+        try:
+            contents = bulk_read([f"{DOCUMENT_ROOT}/{name}" for name in filenames])
+        except Exception:
+            logging.warning("Bulk metadata read failed; using SFTP", exc_info=True)
+            contents = {}
+        for name in filenames:
+            data = contents.get(f"{DOCUMENT_ROOT}/{name}")
+            if data is not None:
+                results[name] = _parse_metadata(data)
+    remaining = [name for name in filenames if name not in results]
+    sizes = sizes or {}
+    contents = pipelined_read(
+        sftp,
+        [(f"{DOCUMENT_ROOT}/{name}", sizes.get(name)) for name in remaining],
+    )
+    for name in remaining:
+        data = contents.get(f"{DOCUMENT_ROOT}/{name}")
+        results[name] = None if data is None else _parse_metadata(data)
+    return results
+
+
+def _device_key(ssh_client) -> Optional[str]:
+    info = getattr(ssh_client, "connection_info", None) or {}
+    device_key = info.get("device_id") or info.get("host")
+    return str(device_key) if device_key else None
+
+
+def document_index_for(ssh_client) -> Optional[DocumentIndex]:
+    """Return the on-disk document index of the connected device, if known."""
+    device_key = _device_key(ssh_client)
+    if not device_key:
+        return None
+    return index_for_device(app_state_dir(), device_key)
+
+
+def export_mirror_for(ssh_client, identifier: str) -> Optional[NotebookMirror]:
+    """Return the local export mirror of *identifier* on the connected device."""
+    device_key = _device_key(ssh_client)
+    if not device_key:
+        return None
+    return mirror_for(app_state_dir(), device_key, identifier)
+
+
+def trim_export_mirrors(ssh_client, keep: Optional[NotebookMirror] = None) -> None:
+    """Keep the connected device's export mirrors under their byte cap."""
+    device_key = _device_key(ssh_client)
+    if device_key:
+        trim_mirrors(device_mirrors_dir(app_state_dir(), device_key), keep=keep)
+
+
+def prune_export_mirrors(ssh_client, entries: list) -> None:
+    """Drop the export mirrors of notebooks missing from a listing of DOCUMENT_ROOT."""
+    device_key = _device_key(ssh_client)
+    if device_key:
+        identifiers = {entry.filename.split(".", 1)[0] for entry in entries}
+        prune_mirrors(device_mirrors_dir(app_state_dir(), device_key), identifiers)
+
+
+def cover_cache_for(ssh_client) -> Optional[CoverCache]:
+    """Return the on-disk cover cache of the connected device, if known."""
+    device_key = _device_key(ssh_client)
+    if not device_key:
+        return None
+    return cache_for_device(app_state_dir(), device_key)
+
+
+def metadata_bulk_reader(ssh_client) -> Optional[BulkFileReader]:
+    """Return a one-round-trip file reader for *ssh_client*, if it has one."""
+    if not supports_batch(ssh_client):
+        return None
+    return lambda paths: read_remote_files(ssh_client, paths)
+
+
+RENDER_CACHE_DIR_NAME = "render-cache"
+RENDER_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+_render_cache = None
+
+
+def render_cache():
+    """Return the shared cache of rendered export pages."""
+    global _render_cache
+    if _render_cache is None:
+        from rmrl import PageCache
+
+        _render_cache = PageCache(app_state_dir() / RENDER_CACHE_DIR_NAME, RENDER_CACHE_MAX_BYTES)
+    return _render_cache
+
+
+def load_device_documents(
+    ssh_client, sftp: paramiko.SFTPClient, entries: Optional[list] = None
+) -> List[DocumentItem]:
+    """``load_document_items`` with the device's index and batch reader."""
+    return load_document_items(
+        sftp,
+        document_index_for(ssh_client),
+        bulk_read=metadata_bulk_reader(ssh_client),
+        entries=entries,
+    )
+
+
+def load_document_items(
+    sftp: paramiko.SFTPClient,
+    index: Optional[DocumentIndex] = None,
+    *,
+    bulk_read: Optional[BulkFileReader] = None,
+    entries: Optional[list] = None,
+) -> List[DocumentItem]:
+    """Read and sort document metadata from an existing SFTP session.
+
+    With an *index*, only ``.metadata`` files whose mtime or size changed
+    since the last refresh are read; the rest come from the local cache.
+    With *bulk_read*, a cold listing fetches its metadata files in one
+    remote command instead of one SFTP open per file.  Callers that already
+    listed ``DOCUMENT_ROOT`` pass that listing as *entries*.
+    """
+    if entries is None:
+        try:
+            entries = sftp.listdir_attr(DOCUMENT_ROOT)
+        except IOError:
+            return []
+
+    sizes = {entry.filename: getattr(entry, "st_size", None) for entry in entries}
+
+    def read_metadata(names: List[str]) -> Dict[str, Optional[object]]:
+        return _read_metadata_files(sftp, names, bulk_read, sizes)
+
+    if index is not None:
+        parsed = index.resolve(entries, read_metadata)
+    else:
+        parsed = read_metadata(
+            [entry.filename for entry in entries if entry.filename.endswith(".metadata")]
+        )
 
     filenames = {entry.filename for entry in entries}
     items = []
     for entry in (entry for entry in entries if entry.filename.endswith(".metadata")):
         identifier = entry.filename[:-9]
-        metadata_path = f"{DOCUMENT_ROOT}/{entry.filename}"
-        try:
-            with sftp.open(metadata_path, "r") as file_handle:
-                metadata = json.load(file_handle)
-        except Exception:
+        metadata = parsed.get(entry.filename)
+        if metadata is None:
             metadata = {}
 
         if not is_active_document_metadata(metadata):
@@ -489,21 +828,99 @@ def read_document_cover(
     except IOError:
         return None
 
-    image_entries = [
-        entry
-        for entry in entries
-        if entry.filename.lower().endswith((".png", ".jpg", ".jpeg", ".thumbnail"))
-    ]
-    if not image_entries:
+    name = pick_cover_name(entry.filename for entry in entries)
+    if name is None:
         return None
-
-    image_entries.sort(key=lambda entry: entry.filename)
     try:
-        with sftp.open(f"{thumbnail_dir}/{image_entries[0].filename}", "rb") as file_handle:
+        with sftp.open(f"{thumbnail_dir}/{name}", "rb") as file_handle:
             return file_handle.read() or None
     except IOError:
         return None
 
+
+# Lists every thumbnail with its mtime and size in one round trip; find
+# hands stat as many paths per call as the command line allows.
+_THUMBNAIL_LISTING_COMMAND = (
+    f"cd {DOCUMENT_ROOT} && find . -maxdepth 2 -path './*.thumbnails/*' -type f"
+    " -exec stat -c '%Y %s %n' {} +"
+)
+# Up to this many documents the listing names their thumbnail directories;
+# past it, walking the whole library is the shorter command.
+_TARGETED_LISTING_MAX = 64
+
+
+def _thumbnail_listing_command(items: List[DocumentItem]) -> str:
+    """Return the bulk listing command for the thumbnails of *items*."""
+    if len(items) > _TARGETED_LISTING_MAX:
+        return _THUMBNAIL_LISTING_COMMAND
+    directories = " ".join(shlex.quote(f"./{item.identifier}.thumbnails") for item in items)
+    # Documents without thumbnails have no directory; find would fail on them.
+    return (
+        f"cd {DOCUMENT_ROOT} && set -- && for d in {directories}; do"
+        ' [ -d "$d" ] && set -- "$@" "$d"; done;'
+        " [ $# -eq 0 ] || find \"$@\" -maxdepth 1 -type f -exec stat -c '%Y %s %n' {} +"
+    )
+
+
+def list_document_covers(
+    ssh_client, sftp: paramiko.SFTPClient, items: List[DocumentItem]
+) -> Dict[str, CoverSource]:
+    """Return the cover thumbnail of every item that has one, keyed by id.
+
+    Batch-capable clients list the ``.thumbnails`` directories of *items*
+    with one remote command; otherwise, or when that fails, each directory
+    is listed over SFTP.
+    """
+    wanted = {item.identifier for item in items}
+    if not wanted:
+        return {}
+    if supports_batch(ssh_client):
+        try:
+            output = ssh_client.exec_checked(_thumbnail_listing_command(items))
+        except Exception:
+            logging.warning("Bulk thumbnail listing failed; using SFTP", exc_info=True)
+        else:
+            sources = parse_thumbnail_listing(output, DOCUMENT_ROOT)
+            return {key: source for key, source in sources.items() if key in wanted}
+
+    sources = {}
+    for item in items:
+        thumbnail_dir = f"{DOCUMENT_ROOT}/{item.identifier}.thumbnails"
+        try:
+            entries = {entry.filename: entry for entry in sftp.listdir_attr(thumbnail_dir)}
+        except IOError:
+            continue
+        name = pick_cover_name(entries)
+        if name is None:
+            continue
+        entry = entries[name]
+        sources[item.identifier] = CoverSource(
+            item.identifier,
+            f"{thumbnail_dir}/{name}",
+            int(getattr(entry, "st_mtime", None) or 0),
+            int(getattr(entry, "st_size", None) or 0),
+        )
+    return sources
+
+
+def read_cover_files(ssh_client, sources: List[CoverSource]) -> Dict[str, Optional[bytes]]:
+    """Fetch the thumbnail bytes of *sources*, keyed by remote path.
+
+    Batch-capable clients read them in one remote command; whatever that
+    misses is read over SFTP with pipelined reads.
+    """
+    contents: Dict[str, Optional[bytes]] = {}
+    if supports_batch(ssh_client):
+        try:
+            contents.update(read_remote_files(ssh_client, [source.path for source in sources]))
+        except Exception:
+            logging.warning("Bulk thumbnail read failed; using SFTP", exc_info=True)
+    remaining = [(source.path, source.size or None) for source in sources if source.path not in contents]
+    if remaining:
+        with ssh_client.sftp_session() as sftp:
+            contents.update(pipelined_read(sftp, remaining))
+    return contents
+
 # ---------------------------------------------------------------------------
 # SSH Client
 # ---------------------------------------------------------------------------
@@ -515,6 +932,8 @@ class WorkerSignals(QtCore.QObject):
     finished = QtCore.pyqtSignal(object)
     error = QtCore.pyqtSignal(Exception)
     progress = QtCore.pyqtSignal(int, int)
+    # Results a task hands over before it finishes.
+    partial = QtCore.pyqtSignal(object)
 
 
 class Worker(QtCore.QRunnable):
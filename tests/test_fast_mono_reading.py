@@ -187,6 +187,26 @@ class FastMonoReadingTests(unittest.TestCase):
         )
         self.assertFalse(ferrari_166.device_verified)
 
+    def test_standalone_payload_check_reports_modified_runtime_file(self):
+        package = self.package()
+        launcher_sha = hashlib.sha256(fast._launcher(package).encode()).hexdigest()
+        dropin_sha = hashlib.sha256(fast._dropin(package).encode()).hexdigest()
+        marker = json.loads(fast._standalone_marker(package, launcher_sha, dropin_sha))
+        hashes = {fast.DROPIN_PATH: dropin_sha, fast.LAUNCHER_PATH: launcher_sha}
+        for item in package.files:
+            hashes[f"{fast.REMOTE_BASE}/{item.path}"] = item.sha256
+        with patch.object(fast, "_read_marker", return_value=marker), patch.object(
+            tap, "_remote_sha256", side_effect=lambda _ssh, path: hashes[path]
+        ):
+            self.assertEqual(
+                fast._standalone_payload_valid(FakeSSH(), package), (True, "")
+            )
+            hashes[f"{fast.REMOTE_BASE}/xovi.so"] = "0" * 64
+            self.assertEqual(
+                fast._standalone_payload_valid(FakeSSH(), package),
+                (False, "运行资源 xovi.so 已被修改"),
+            )
+
     def test_known_shared_predecessors_are_exact_and_revision_bounded(self):
         predecessors = {
             package.firmware: fast._known_shared_predecessor_specs(package)
@@ -176,6 +176,25 @@ class FakeSSH:
     def sftp_session(self):
         yield FakeSFTP(self)
 
+    def transfer_files(self, jobs, progress_callback=None):
+        total = sum(job.size for job in jobs)
+        done = 0
+        sftp = FakeSFTP(self)
+        for job in jobs:
+            offset = done
+            sftp.put(
+                job.local_path,
+                job.remote_path,
+                callback=(
+                    lambda transferred, _total, offset=offset: progress_callback(
+                        offset + transferred, total
+                    )
+                )
+                if progress_callback
+                else None,
+            )
+            done += job.size
+
     def open_remote(self, path, mode="r"):
         @contextmanager
         def _remote_file():
@@ -915,15 +934,15 @@ class TabStateTests(TabTestBase):
         # Backend sorts folders first; UI must preserve that order.
         entries.sort(key=lambda e: (not e.is_dir, e.name.lower()))
         self.load(entries=entries)
-        self.assertEqual(self.tab.table.rowCount(), 3)
-        self.assertEqual(self.tab.table.item(0, 0).text(), "novels")
-        self.assertEqual(self.tab.table.item(0, 1).text(), "文件夹")
+        self.assertEqual(self.tab.table.model().rowCount(), 3)
+        self.assertEqual(self.tab.table.model().index(0, 0).data(), "novels")
+        self.assertEqual(self.tab.table.model().index(0, 1).data(), "文件夹")
         self.assertEqual(self.tab.path_edit.text(), "/books")
 
     def test_disconnect_clears_state(self):
         self.load(entries=[self.entry("a.epub")])
         self.tab.set_connection_state(False)
-        self.assertEqual(self.tab.table.rowCount(), 0)
+        self.assertEqual(self.tab.table.model().rowCount(), 0)
         self.assertIsNone(self.tab._install_dir)
         self.assertEqual(self.tab.path_edit.text(), "")
 
@@ -971,6 +990,24 @@ class TabStateTests(TabTestBase):
         self.assertFalse(self.tab.delete_button.isEnabled())
         self.assertFalse(self.tab.download_button.isEnabled())
 
+    def test_search_ranks_matches_then_restores_folder_order(self):
+        self.load(entries=[
+            self.entry("novels", is_dir=True),
+            self.entry("my novel.epub"),
+            self.entry("novel.epub"),
+        ])
+        model = self.tab.table.model()
+        self.tab.search_edit.setText("novel")
+        self.assertEqual(
+            [model.index(row, 0).data() for row in range(model.rowCount())],
+            ["novels", "novel.epub", "my novel.epub"],
+        )
+        self.tab.search_edit.setText("")
+        self.assertEqual(
+            [model.index(row, 0).data() for row in range(model.rowCount())],
+            ["novels", "my novel.epub", "novel.epub"],
+        )
+
 
 class TabDeleteTests(TabTestBase):
     def entry(self, name):
@@ -169,7 +169,7 @@ class DocumentsRefreshQuietTests(unittest.TestCase):
         on_finished([])
 
         self.assertEqual(done, [True])
-        self.assertEqual(tab.table.rowCount(), 0)
+        self.assertEqual(tab.table.model().rowCount(), 0)
 
     def test_error_logs_and_calls_on_done_once_without_dialog(self):
         tab = self._make_tab()
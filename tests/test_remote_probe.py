@@ -0,0 +1,266 @@
+import hashlib
+import io
+import os
+import shlex
+import subprocess
+import tempfile
+import unittest
+from contextlib import contextmanager
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import _remote_probe as probe
+import _ssh
+from tests.test_rmtool_behaviors import FakeTransport
+
+
+def run_locally(script: bytes) -> subprocess.CompletedProcess:
+    return subprocess.run(["sh", "-s"], input=script, capture_output=True, check=False)
+
+
+class LocalShellClient:
+    """Runs ``sh -s`` commands on this machine, like an SSH exec channel."""
+
+    class Stdin:
+        def __init__(self, client):
+            self.client = client
+            self.channel = self
+
+        def write(self, data):
+            self.client.script += data
+
+        def shutdown_write(self):
+            self.client.result = run_locally(self.client.script)
+
+    class Output:
+        def __init__(self, client, *, is_stderr=False):
+            self.client = client
+            self.is_stderr = is_stderr
+            self.channel = self
+
+        def read(self):
+            result = self.client.result
+            return result.stderr if self.is_stderr else result.stdout
+
+        def recv_exit_status(self):
+            return self.client.result.returncode
+
+    def __init__(self):
+        self.transport = FakeTransport()
+        self.commands = []
+        self.script = b""
+        self.result = None
+
+    def get_transport(self):
+        return self.transport
+
+    def exec_command(self, command):
+        self.commands.append(command)
+        self.script = b""
+        return self.Stdin(self), self.Output(self), self.Output(self, is_stderr=True)
+
+
+class ProbeScriptTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        (self.root / "dir with space").mkdir()
+        self.marker = self.root / "dir with space" / "package.json"
+        self.marker.write_bytes(b'{"a": 1}\n\n@@rmtool-probe 9 9 9\n')
+        self.binary = self.root / "binary"
+        self.binary.write_bytes(bytes(range(256)))
+        self.missing = str(self.root / "missing")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def probes(self):
+        return [
+            (probe.PROBE_EXISTS, str(self.marker)),
+            (probe.PROBE_EXISTS, self.missing),
+            (probe.PROBE_DIR, str(self.root / "dir with space")),
+            (probe.PROBE_DIR, str(self.marker)),
+            (probe.PROBE_SHA256, str(self.binary)),
+            (probe.PROBE_SHA256, self.missing),
+            (probe.PROBE_READ, str(self.marker)),
+            (probe.PROBE_READ, str(self.binary)),
+            (probe.PROBE_READ, self.missing),
+        ]
+
+    def test_script_output_round_trips_through_parser(self):
+        probes = self.probes()
+        result = run_locally(probe.build_probe_script(probes).encode())
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+        frames = probe.parse_probe_output(result.stdout, len(probes))
+
+        self.assertEqual([frame.status == 0 for frame in frames], [
+            True, False, True, False, True, False, True, True, False,
+        ])
+        self.assertEqual(
+            frames[4].payload.decode(), hashlib.sha256(bytes(range(256))).hexdigest()
+        )
+        self.assertEqual(frames[6].payload, self.marker.read_bytes())
+        self.assertEqual(frames[7].payload, bytes(range(256)))
+        self.assertEqual(frames[6].name, str(self.marker))
+        self.assertEqual(frames[6].mtime, int(self.marker.stat().st_mtime))
+
+    def test_reads_over_limit_are_refused(self):
+        probes = [(probe.PROBE_READ, str(self.binary))]
+        script = probe.build_probe_script(probes, max_read_bytes=16)
+        frames = probe.parse_probe_output(run_locally(script.encode()).stdout, 1)
+        self.assertEqual(frames, [probe.ProbeFrame(2, b"")])
+
+    def test_bad_frames_fail_only_their_own_entry(self):
+        self.assertEqual(
+            probe.parse_probe_output(b"@@rmtool-probe 0 0 5\nabc\n", 1), [None]
+        )
+        self.assertEqual(
+            probe.parse_probe_output(b"@@rmtool-probe 0 0 0\n\n", 2),
+            [probe.ProbeFrame(0, b""), None],
+        )
+        self.assertEqual(probe.parse_probe_output(b"garbage\n", 1), [None])
+        self.assertEqual(
+            probe.parse_probe_output(
+                b"@@rmtool-probe 0 0 9\nshort\n@@rmtool-probe 1 0 2 7 /a b\nok\n", 2
+            ),
+            [None, probe.ProbeFrame(0, b"ok", 7, "/a b")],
+        )
+        # A payload longer than its header, even one with a newline at the
+        # stated length, is not taken for a shorter one.
+        self.assertEqual(
+            probe.parse_probe_output(
+                b"@@rmtool-probe 0 0 2 7 /a\nok\nmore\n@@rmtool-probe 1 0 0\n\n", 2
+            ),
+            [None, probe.ProbeFrame(0, b"")],
+        )
+
+    def test_files_changing_during_a_read_are_left_for_a_per_call_read(self):
+        probes = [(probe.PROBE_READ, str(self.binary)), (probe.PROBE_READ, str(self.marker))]
+        script = probe.build_probe_script(probes)
+        # Grow the file between the stat and the cat.
+        script = script.replace(
+            'cat "$2"', f'printf more >> {shlex.quote(str(self.binary))}; cat "$2"', 1
+        )
+        result = run_locally(script.encode())
+        frames = probe.parse_probe_output(result.stdout, 2)
+        self.assertIsNone(frames[0])
+        self.assertEqual(frames[1].payload, self.marker.read_bytes())
+        # One stat and one cat per file, and no scratch files.
+        self.assertNotIn("mktemp", script)
+
+    def test_unparsed_entries_are_resolved_per_call(self):
+        wrapper = _ssh.SSHClientWrapper()
+        wrapper._client = LocalShellClient()
+        probes = [(probe.PROBE_EXISTS, str(self.marker)), (probe.PROBE_EXISTS, self.missing)]
+        with patch.object(
+            _ssh, "parse_probe_output", return_value=[probe.ProbeFrame(0, b""), None]
+        ), patch.object(wrapper, "file_exists", return_value=False) as file_exists:
+            results = probe.probe_remote(wrapper, probes)
+            self.assertTrue(results.exists(str(self.marker)))
+            self.assertFalse(results.exists(self.missing))
+        file_exists.assert_called_once_with(self.missing)
+
+    def test_wrapper_answers_every_probe_in_one_exec_channel(self):
+        wrapper = _ssh.SSHClientWrapper()
+        client = LocalShellClient()
+        wrapper._client = client
+
+        results = probe.probe_remote(wrapper, self.probes())
+
+        self.assertEqual(client.commands, ["sh -s"])
+        self.assertEqual(wrapper.channel_stats()["exec_opened"], 1)
+        self.assertTrue(results.exists(str(self.marker)))
+        self.assertFalse(results.exists(self.missing))
+        self.assertTrue(results.is_dir(str(self.root / "dir with space")))
+        self.assertFalse(results.is_dir(str(self.marker)))
+        self.assertEqual(
+            results.sha256(str(self.binary)),
+            hashlib.sha256(bytes(range(256))).hexdigest(),
+        )
+        with self.assertRaisesRegex(RuntimeError, "有效 SHA-256"):
+            results.sha256(self.missing)
+        self.assertEqual(results.text(str(self.marker)), self.marker.read_text())
+        with self.assertRaises(IOError):
+            results.read(self.missing)
+
+    def test_read_remote_files_skips_files_it_cannot_deliver(self):
+        wrapper = _ssh.SSHClientWrapper()
+        client = LocalShellClient()
+        wrapper._client = client
+
+        contents = probe.read_remote_files(
+            wrapper, [str(self.marker), self.missing, str(self.binary)]
+        )
+
+        self.assertEqual(client.commands, ["sh -s"])
+        self.assertEqual(
+            contents,
+            {str(self.marker): self.marker.read_bytes(), str(self.binary): bytes(range(256))},
+        )
+
+
+class ProbeFallbackTests(unittest.TestCase):
+    def test_clients_without_batch_support_resolve_lazily_in_call_order(self):
+        ssh = Mock()
+        ssh.file_exists.side_effect = lambda path: path == "/a"
+        ssh.exec_checked.return_value = f"{'2' * 64}  /b\n"
+
+        @contextmanager
+        def open_remote(_path, _mode="r"):
+            yield io.BytesIO(b"marker")
+
+        ssh.open_remote.side_effect = open_remote
+
+        results = probe.probe_remote(
+            ssh,
+            [(probe.PROBE_EXISTS, "/a"), (probe.PROBE_SHA256, "/b")],
+        )
+        ssh.file_exists.assert_not_called()
+
+        self.assertTrue(results.exists("/a"))
+        self.assertTrue(results.exists("/a"))
+        self.assertEqual(results.sha256("/b"), "2" * 64)
+        self.assertEqual(results.text("/c"), "marker")
+        ssh.file_exists.assert_called_once_with("/a")
+        ssh.exec_checked.assert_called_once_with("sha256sum /b")
+        ssh.probe_batch.assert_not_called()
+
+    def test_clients_declaring_batch_support_answer_in_one_call(self):
+        ssh = Mock()
+        ssh.SUPPORTS_PROBE_BATCH = True
+        ssh.probe_batch.return_value = probe.ProbeResults(
+            ssh, {(probe.PROBE_EXISTS, "/a"): (0, b"")}
+        )
+        results = probe.probe_remote(ssh, [(probe.PROBE_EXISTS, "/a")])
+        self.assertTrue(results.exists("/a"))
+        ssh.probe_batch.assert_called_once_with([(probe.PROBE_EXISTS, "/a")])
+        ssh.file_exists.assert_not_called()
+
+    def test_fallbacks_added_to_batched_results_serve_unparsed_entries(self):
+        ssh = Mock()
+        ssh.SUPPORTS_PROBE_BATCH = True
+        ssh.probe_batch.return_value = probe.ProbeResults(ssh)
+        results = probe.probe_remote(
+            ssh,
+            [(probe.PROBE_SHA256, "/b")],
+            fallbacks={probe.PROBE_SHA256: lambda _client, path: f"hash:{path}"},
+        )
+        self.assertEqual(results.sha256("/b"), "hash:/b")
+        self.assertIsNone(results.mtime("/b"))
+
+    def test_module_fallbacks_replace_builtin_resolvers(self):
+        ssh = Mock()
+        results = probe.probe_remote(
+            ssh,
+            [(probe.PROBE_SHA256, "/b")],
+            fallbacks={probe.PROBE_SHA256: lambda _client, path: f"hash:{path}"},
+        )
+        self.assertEqual(results.sha256("/b"), "hash:/b")
+        ssh.exec_checked.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
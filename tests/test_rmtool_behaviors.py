@@ -7,11 +7,13 @@ import re
 import shlex
 import stat
 import struct
+import tarfile
 import tempfile
 import threading
 import time
 import unittest
 import zipfile
+import zlib
 from contextlib import contextmanager
 from dataclasses import replace
 from datetime import datetime
@@ -28,8 +30,12 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 
 import rmrl
 import rmtool
+import _cover_cache
+import _export_mirror
 import _legacy_vellum
 import _native_chinese
+import _remote_probe
+import _search_index
 import _residue_migration
 import _pinyin_input
 import _reading_enhancements
@@ -323,6 +329,15 @@ class FakeTransferSSHClient:
     def transfer_file(self, local_path, remote_path):
         self.sftp.put(local_path, remote_path)
 
+    def transfer_files(self, jobs, progress_callback=None):
+        total = sum(job.size for job in jobs) or 1
+        done = 0
+        for job in jobs:
+            self.sftp.put(job.local_path, job.remote_path)
+            done += job.size
+            if progress_callback:
+                progress_callback(done, total)
+
     def exec_checked(self, command):
         self.exec_calls.append(command)
         if command.startswith("df -Pk "):
@@ -399,6 +414,51 @@ class FakeExportSSHClient:
         raise AssertionError("directory download should not be used by this fixture")
 
 
+class FakeMirrorSFTP:
+    """Serves ``files`` (path -> [data, mtime]) with directory listings."""
+
+    def __init__(self, files):
+        self.files = files
+        self.get_calls = []
+
+    def listdir_attr(self, path):
+        children = {}
+        prefix = f"{path}/"
+        for remote_path, (data, mtime) in self.files.items():
+            if not remote_path.startswith(prefix):
+                continue
+            name, _sep, rest = remote_path[len(prefix):].partition("/")
+            if rest:
+                children[name] = SimpleNamespace(
+                    filename=name, st_mode=stat.S_IFDIR | 0o755, st_size=0, st_mtime=mtime
+                )
+            else:
+                children[name] = SimpleNamespace(
+                    filename=name, st_mode=stat.S_IFREG | 0o644, st_size=len(data), st_mtime=mtime
+                )
+        return list(children.values())
+
+    def get(self, remote_path, local_path):
+        self.get_calls.append(remote_path)
+        Path(local_path).write_bytes(self.files[remote_path][0])
+
+
+class FakeMirrorSSHClient:
+    def __init__(self, files):
+        self.sftp = FakeMirrorSFTP(files)
+        self.connection_info = {"host": "10.11.99.1"}
+        self.hashed = []
+
+    @contextmanager
+    def sftp_session(self):
+        yield self.sftp
+
+    def exec_checked(self, command):
+        path = shlex.split(command)[1]
+        self.hashed.append(path)
+        return f"{hashlib.sha256(self.sftp.files[path][0]).hexdigest()}  {path}\n"
+
+
 class FakeRecursiveDownloadSFTP:
     def __init__(self):
         self.files = {
@@ -3179,6 +3239,14 @@ class DeviceFramePreviewTests(unittest.TestCase):
         self.assertEqual(landscape.getpixel((25, 50)), (30, 60, 220, 255))
         self.assertEqual(landscape.getpixel((115, 50)), (220, 30, 30, 255))
 
+    @staticmethod
+    def _wait_for_preview(widget):
+        for _attempt in range(10):
+            widget.thread_pool.waitForDone(5000)
+            QtWidgets.QApplication.processEvents()
+            if not widget._preview_running:
+                return
+
     def test_checked_preview_can_switch_to_raw_without_changing_upload_source(self):
         widget = rmtool.WallpaperTab(FakeConnectionClient(), rmtool._default_config())
         self.addCleanup(widget.deleteLater)
@@ -3192,6 +3260,7 @@ class DeviceFramePreviewTests(unittest.TestCase):
 
             with mock.patch.object(rmtool, "resource_path", return_value=frame_path):
                 widget._render_preview()
+                self._wait_for_preview(widget)
                 framed = widget.preview_label._original_pixmap
                 self.assertTrue(widget.frame_preview_checkbox.isChecked())
                 self.assertEqual(widget.frame_preview_checkbox.text(), "真机预览")
@@ -3202,6 +3271,7 @@ class DeviceFramePreviewTests(unittest.TestCase):
                 )
 
                 widget.frame_preview_checkbox.setChecked(False)
+                self._wait_for_preview(widget)
                 raw = widget.preview_label._original_pixmap
                 self.assertEqual((raw.width(), raw.height()), (30, 40))
 
@@ -3228,9 +3298,44 @@ class DeviceFramePreviewTests(unittest.TestCase):
                     return_value=frame_path,
                 ), self.assertLogs(level="WARNING"):
                     widget._render_preview()
+                    self._wait_for_preview(widget)
                     preview = widget.preview_label._original_pixmap
                     self.assertEqual((preview.width(), preview.height()), (20, 30))
 
+    def test_slider_drag_renders_coalesced_drafts_then_full_quality_on_release(self):
+        widget = rmtool.WallpaperTab(FakeConnectionClient(), rmtool._default_config())
+        self.addCleanup(widget.deleteLater)
+        widget.frame_preview_checkbox.setChecked(False)
+        widget.mode_combo.setCurrentIndex(widget.mode_combo.findData("crop"))
+        widget.current_resolution = (1600, 1200)
+        widget._cached_source_image = Image.new("RGB", (3200, 2000), "white")
+        started = []
+
+        with mock.patch.object(widget.thread_pool, "start", side_effect=started.append):
+            widget.offset_x_slider.setSliderDown(True)
+            for value in (10, 20, 30):
+                widget.offset_x_slider.setValue(value)
+            self.assertEqual(len(started), 1)
+            self.assertTrue(started[0].args[0].draft)
+
+            widget.offset_x_slider.setSliderDown(False)
+            self.assertEqual(len(started), 1)
+
+            # The first draft shows while the release render starts; the
+            # intermediate positions are never rendered.
+            started[0].run()
+            draft = widget.preview_label._original_pixmap
+            self.assertEqual((draft.width(), draft.height()), (720, 540))
+            self.assertEqual(len(started), 2)
+            request = started[1].args[0]
+            self.assertFalse(request.draft)
+            self.assertEqual(request.offset, (30, 0))
+
+            started[1].run()
+            full = widget.preview_label._original_pixmap
+            self.assertEqual((full.width(), full.height()), (1600, 1200))
+            self.assertFalse(widget._preview_running)
+
     def test_device_frames_are_in_windows_and_macos_package_inputs(self):
         root = Path(_tab_wallpaper.__file__).resolve().parent
         windows = (root / "build-portable.ps1").read_text(encoding="utf-8")
@@ -3609,20 +3714,149 @@ class CoverWallWallpaperTests(unittest.TestCase):
         widget = rmtool.WallpaperTab(client, rmtool._default_config())
         self.addCleanup(widget.deleteLater)
         items = [self._entry(0, None).item, self._entry(1, None).item]
-        valid_cover = self._cover_bytes()
+        source = _cover_cache.CoverSource("doc-0", "/covers/doc-0.png", 100, 10)
 
         with mock.patch.object(rmtool, "load_document_items", return_value=items) as load_items, mock.patch.object(
-            rmtool,
-            "read_document_cover",
-            side_effect=[valid_cover, b"broken"],
-        ) as read_cover:
-            entries = widget._load_cover_wall_entries()
+            rmtool, "list_document_covers", return_value={"doc-0": source}
+        ) as list_covers:
+            scan = widget._load_cover_wall_entries()
 
         self.assertEqual(session_count, 1)
-        load_items.assert_called_once_with(session)
-        self.assertEqual(read_cover.call_count, 2)
-        self.assertIsNotNone(entries[0].cover)
-        self.assertIsNone(entries[1].cover)
+        load_items.assert_called_once_with(
+            session, mock.ANY, bulk_read=mock.ANY, entries=None
+        )
+        list_covers.assert_called_once_with(client, session, items)
+        self.assertEqual([entry.cover for entry in scan.entries], [None, None])
+        self.assertEqual(scan.pending, [source])
+
+    def test_cover_wall_covers_are_listed_in_bulk_fetched_in_batches_and_cached(self):
+        valid_cover = self._cover_bytes()
+        root = rmtool.DOCUMENT_ROOT
+        files = {
+            f"{root}/doc-{index}.thumbnails/{name}": data
+            for index in range(5)
+            for name, data in (("1.png", valid_cover), ("2.png", b"later page"))
+        }
+        files[f"{root}/doc-3.thumbnails/1.png"] = b"broken"
+
+        class FakeBatchClient(FakeConnectionClient):
+            SUPPORTS_PROBE_BATCH = True
+
+            def __init__(self):
+                super().__init__(connected=True, host="10.11.99.1")
+                self.commands = []
+                self.reads = []
+                self.sessions = 0
+
+            def exec_checked(self, command):
+                self.commands.append(command)
+                return "".join(
+                    f"{index} {len(data)} ./{path[len(root) + 1:]}\n"
+                    for index, (path, data) in enumerate(sorted(files.items()))
+                )
+
+            def probe_batch(self, probes):
+                probes = list(probes)
+                self.reads.append([path for _kind, path in probes])
+                return _remote_probe.ProbeResults(
+                    self, {probe: (0, files[probe[1]]) for probe in probes}
+                )
+
+            @contextmanager
+            def sftp_session(self):
+                self.sessions += 1
+                yield object()
+
+        client = FakeBatchClient()
+        items = [self._entry(index, None).item for index in range(5)] + [
+            self._entry(9, None).item
+        ]
+
+        with tempfile.TemporaryDirectory() as state_dir, mock.patch.object(
+            rmtool, "app_state_dir", return_value=Path(state_dir)
+        ), mock.patch.object(_cover_cache, "FETCH_BATCH_SIZE", 2):
+            widget = rmtool.WallpaperTab(client, rmtool._default_config())
+            self.addCleanup(widget.deleteLater)
+            with mock.patch.object(rmtool, "load_document_items", return_value=items):
+                scan = widget._load_cover_wall_entries()
+                self.assertEqual(len(client.commands), 1)
+                # A handful of documents is listed by name, not by walking
+                # the whole library.
+                self.assertIn("./doc-9.thumbnails", client.commands[0])
+                self.assertEqual(
+                    [source.path for source in scan.pending],
+                    [f"{root}/doc-{index}.thumbnails/1.png" for index in range(5)],
+                )
+
+                batches = []
+                fetched = widget._fetch_cover_wall_covers(
+                    scan.pending, threading.Event(), on_covers=batches.append
+                )
+                self.assertEqual(fetched, 5)
+                self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+                self.assertEqual([len(paths) for paths in client.reads], [2, 2, 1])
+                # Only the listing used SFTP; every cover came from batch reads.
+                self.assertEqual(client.sessions, 1)
+                self.assertIsNone(batches[1]["doc-3"])
+                with Image.open(BytesIO(batches[0]["doc-0"])) as image:
+                    self.assertEqual(image.size, (120, 180))
+
+                reopened = widget._load_cover_wall_entries()
+
+        self.assertEqual([source.identifier for source in reopened.pending], ["doc-3"])
+        self.assertEqual(
+            [entry.cover is not None for entry in reopened.entries],
+            [True, True, True, False, True, False],
+        )
+
+    def test_cover_cache_scans_once_and_evicts_least_recently_used(self):
+        def source(index, mtime=100):
+            return _cover_cache.CoverSource(f"doc-{index}", f"/doc-{index}.png", mtime, 10)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = Path(tmp)
+            cache = _cover_cache.CoverCache(directory, max_bytes=30)
+            with mock.patch.object(Path, "glob", wraps=Path.glob, autospec=True) as glob:
+                for index in range(3):
+                    cache.put(source(index), b"x" * 10)
+                self.assertEqual(glob.call_count, 1)
+            cache.put(source(0, mtime=200), b"y" * 10)
+            self.assertIsNone(cache.get(source(0)))
+            self.assertEqual(cache.get(source(0, mtime=200)), b"y" * 10)
+
+            # Storing a fourth cover over the cap evicts the least recently
+            # used ones, doc-1 and then doc-0, down to 80% of the cap.
+            cache.get(source(2))
+            cache.put(source(3), b"z" * 10)
+            self.assertEqual(cache.size(), 20)
+            self.assertIsNone(cache.get(source(1)))
+            self.assertIsNone(cache.get(source(0, mtime=200)))
+            self.assertEqual(
+                sorted(path.name for path in directory.iterdir()),
+                ["doc-2@100-10.png", "doc-3@100-10.png"],
+            )
+            self.assertEqual(_cover_cache.CoverCache(directory).size(), 20)
+
+    def test_cover_wall_dialog_fills_in_streamed_covers(self):
+        cover = self._cover_bytes()
+        entries = [self._entry(0, cover)] + [self._entry(index, None) for index in range(1, 4)]
+        dialog = _tab_wallpaper._CoverWallDialog(entries, loading=["doc-1", "doc-2"])
+        self.addCleanup(dialog.deleteLater)
+
+        self.assertEqual(len(dialog.selected_entries()), 1)
+        self.assertIn("正在读取", dialog.table.item(1, 1).text())
+        self.assertIn("无可用封面", dialog.table.item(3, 1).text())
+        self.assertIn("2 个封面正在读取", dialog.selection_label.text())
+
+        dialog.add_covers({"doc-2": cover, "doc-3": cover})
+        self.assertEqual(
+            [entry.item.identifier for entry in dialog.selected_entries()], ["doc-0", "doc-2"]
+        )
+        self.assertEqual(dialog.table.item(3, 0).flags(), QtCore.Qt.NoItemFlags)
+
+        dialog.finish_loading()
+        self.assertIn("无可用封面", dialog.table.item(1, 1).text())
+        self.assertNotIn("正在读取", dialog.selection_label.text())
 
     def test_cover_wall_handoff_uses_existing_wallpaper_source(self):
         client = FakeConnectionClient(connected=True)
@@ -3653,6 +3887,237 @@ class CoverWallWallpaperTests(unittest.TestCase):
         widget._on_connection_changed(False)
         self.assertFalse(widget.cover_wall_button.isEnabled())
 
+
+class DocumentIndexTests(unittest.TestCase):
+    def test_document_index_only_rereads_metadata_whose_stat_changed(self):
+        class FakeDocumentSFTP:
+            def __init__(self):
+                self.files = {
+                    "a.metadata": (100, b'{"visibleName":"A"}'),
+                    "b.metadata": (200, b'{"visibleName":"B"}'),
+                    "c.metadata": (300, b"{"),
+                }
+                self.opened = []
+
+            def listdir_attr(self, path):
+                return [
+                    SimpleNamespace(filename=name, st_mtime=mtime, st_size=len(data))
+                    for name, (mtime, data) in self.files.items()
+                ]
+
+            def open(self, path, _mode="r"):
+                name = path.rsplit("/", 1)[-1]
+                self.opened.append(name)
+                return BytesIO(self.files[name][1])
+
+        with tempfile.TemporaryDirectory() as temp_root:
+            index_path = Path(temp_root) / "device.json"
+            sftp = FakeDocumentSFTP()
+            first = rmtool.load_document_items(sftp, rmtool.DocumentIndex(index_path))
+
+            sftp.opened.clear()
+            sftp.files["b.metadata"] = (250, b'{"visibleName":"B2"}')
+            del sftp.files["a.metadata"]
+            second = rmtool.load_document_items(sftp, rmtool.DocumentIndex(index_path))
+            persisted = json.loads(index_path.read_text(encoding="utf-8"))
+
+            index_path.write_text("not json", encoding="utf-8")
+            sftp.opened.clear()
+            rebuilt = rmtool.load_document_items(sftp, rmtool.DocumentIndex(index_path))
+
+        self.assertEqual([item.name for item in first], ["c", "B", "A"])
+        # The malformed file is never cached, so it is retried every time.
+        self.assertEqual(sorted(sftp.opened), ["b.metadata", "c.metadata"])
+        self.assertEqual([item.name for item in second], ["c", "B2"])
+        self.assertEqual(sorted(persisted["entries"]), ["b.metadata"])
+        self.assertEqual([item.name for item in rebuilt], ["c", "B2"])
+
+    def test_cold_listing_reads_metadata_in_one_bulk_request(self):
+        class FakeDocumentSFTP:
+            def __init__(self):
+                self.opened = []
+
+            def listdir_attr(self, path):
+                return [
+                    SimpleNamespace(filename=f"doc{index}.metadata", st_mtime=index)
+                    for index in range(10)
+                ]
+
+            def open(self, path, _mode="r"):
+                self.opened.append(path.rsplit("/", 1)[-1])
+                return BytesIO(b'{"visibleName":"via sftp"}')
+
+        bulk_calls = []
+
+        def bulk_read(paths):
+            bulk_calls.append(paths)
+            return {
+                path: b'{"visibleName":"bulk"}'
+                for path in paths
+                if not path.endswith("doc3.metadata")
+            }
+
+        sftp = FakeDocumentSFTP()
+        items = rmtool.load_document_items(sftp, bulk_read=bulk_read)
+
+        self.assertEqual(len(bulk_calls), 1)
+        self.assertEqual(len(bulk_calls[0]), 10)
+        self.assertEqual(sftp.opened, ["doc3.metadata"])
+        self.assertEqual(
+            sorted(item.name for item in items), ["bulk"] * 9 + ["via sftp"]
+        )
+
+        def failing_bulk_read(_paths):
+            raise RuntimeError("命令执行失败: sh: head: not found")
+
+        sftp = FakeDocumentSFTP()
+        with self.assertLogs(level="WARNING"):
+            items = rmtool.load_document_items(sftp, bulk_read=failing_bulk_read)
+        self.assertEqual(len(sftp.opened), 10)
+        self.assertEqual({item.name for item in items}, {"via sftp"})
+
+    def test_pipelined_read_falls_back_to_one_file_at_a_time(self):
+        events = []
+
+        class FakeFile:
+            def __init__(self, path, data):
+                self.path = path
+                self.data = BytesIO(data)
+
+            def read(self, size=None):
+                events.append(("read", self.path, size))
+                return self.data.read(size)
+
+            def close(self):
+                events.append(("close", self.path))
+
+        class FakeSFTP:
+            def open(self, path, mode):
+                events.append(("open", path))
+                if path == "/missing":
+                    raise IOError(path)
+                return FakeFile(path, path.encode() * 2)
+
+        # "/b" grew to 4 bytes after a listing that saw only 3.
+        files = [("/a", 4), ("/missing", 3), ("/b", 3), ("/c", None)]
+        contents = rmtool.pipelined_read(FakeSFTP(), files, window=3)
+
+        self.assertEqual(
+            contents, {"/a": b"/a/a", "/missing": None, "/b": b"/b/b", "/c": b"/c/c"}
+        )
+        self.assertEqual(
+            events,
+            [
+                ("open", "/a"),
+                ("read", "/a", 5),
+                ("close", "/a"),
+                ("open", "/missing"),
+                ("open", "/b"),
+                ("read", "/b", 4),
+                ("read", "/b", None),
+                ("close", "/b"),
+                ("open", "/c"),
+                ("read", "/c", None),
+                ("close", "/c"),
+            ],
+        )
+
+    def test_pipelined_read_sends_each_window_of_requests_together(self):
+        from paramiko.message import Message
+        from paramiko.sftp import (
+            CMD_CLOSE, CMD_DATA, CMD_HANDLE, CMD_OPEN, CMD_READ, CMD_STATUS, SFTP_EOF,
+        )
+
+        files = {b"/a": b"/a/a", b"/b": b"/b/b", b"/c": b"/c/c"}
+        sent = []
+
+        class FakeSFTP:
+            """Answers asynchronous requests from *files*, in reverse order."""
+
+            def __init__(self):
+                self.queue = []
+                self.requests = []
+
+            def _adjust_cwd(self, path):
+                return path.encode()
+
+            def _reply(self, request_type, args):
+                msg = Message()
+                if request_type == CMD_OPEN and args[0] in files:
+                    msg.add_string(args[0])
+                    return CMD_HANDLE, msg
+                if request_type == CMD_READ:
+                    data = files[args[0]][args[1]:args[1] + args[2]]
+                    if data:
+                        msg.add_string(data)
+                        return CMD_DATA, msg
+                    msg.add_int(SFTP_EOF)
+                    return CMD_STATUS, msg
+                msg.add_int(0 if request_type == CMD_CLOSE else 2)
+                return CMD_STATUS, msg
+
+            def _async_request(self, fileobj, request_type, *args):
+                sent.append((request_type, args[0]))
+                self.queue.append((fileobj, len(sent)) + self._reply(request_type, args))
+                return len(sent)
+
+            def _read_response(self):
+                fileobj, num, reply_type, msg = self.queue.pop()
+                msg.rewind()
+                fileobj._async_response(reply_type, msg, num)
+
+            def _request(self, request_type, *args):
+                self.requests.append((request_type, args[0], args[1]))
+                reply_type, msg = self._reply(request_type, args)
+                msg.rewind()
+                if reply_type == CMD_STATUS:
+                    raise EOFError()
+                return reply_type, msg
+
+        sftp = FakeSFTP()
+        # "/b" grew to 4 bytes after a listing that saw only 3.
+        listing = [("/a", 4), ("/missing", 3), ("/b", 3), ("/c", None)]
+        contents = rmtool.pipelined_read(sftp, listing, window=3)
+
+        self.assertEqual(
+            contents, {"/a": b"/a/a", "/missing": None, "/b": b"/b/b", "/c": b"/c/c"}
+        )
+        self.assertEqual(
+            sent,
+            [
+                (CMD_OPEN, b"/a"),
+                (CMD_OPEN, b"/missing"),
+                (CMD_OPEN, b"/b"),
+                (CMD_READ, b"/a"),
+                (CMD_READ, b"/b"),
+                (CMD_CLOSE, b"/a"),
+                (CMD_CLOSE, b"/b"),
+                (CMD_OPEN, b"/c"),
+                (CMD_READ, b"/c"),
+                (CMD_CLOSE, b"/c"),
+            ],
+        )
+        # Only the file that outgrew its listing needed a further read.
+        self.assertEqual(sftp.requests, [(CMD_READ, b"/b", 4)])
+        self.assertEqual(sftp.queue, [])
+
+    def test_document_index_is_shared_per_connected_device(self):
+        with tempfile.TemporaryDirectory() as temp_root, mock.patch.object(
+            rmtool, "app_state_dir", return_value=Path(temp_root)
+        ):
+            first = rmtool.document_index_for(
+                SimpleNamespace(connection_info={"device_id": "rm/1", "host": "10.11.99.1"})
+            )
+            again = rmtool.document_index_for(
+                SimpleNamespace(connection_info={"device_id": "rm/1", "host": "usb"})
+            )
+            missing = rmtool.document_index_for(SimpleNamespace(connection_info={}))
+
+        self.assertIs(first, again)
+        self.assertEqual(first.path, Path(temp_root) / "document-index" / "rm_1.json")
+        self.assertIsNone(missing)
+
+
 class RmkitCnExternalLinkTests(unittest.TestCase):
     def test_rmkit_module_exposes_only_external_project_links(self):
         self.assertEqual(_rmkit_cn.REPO_URL, "https://github.com/boangs/rmkit")
@@ -5010,6 +5475,431 @@ class SSHTransportSerializationTests(unittest.TestCase):
         self.assertIsNone(wrapper._client)
 
 
+class SSHLivenessMonitorTests(unittest.TestCase):
+    class Transport(FakeTransport):
+        def __init__(self):
+            super().__init__()
+            self.active = True
+            self.ignore_calls = 0
+
+        def is_active(self):
+            return self.active
+
+        def send_ignore(self):
+            self.ignore_calls += 1
+
+    class Client:
+        def __init__(self):
+            self.transport = SSHLivenessMonitorTests.Transport()
+
+        def get_transport(self):
+            return self.transport
+
+    def test_ensure_client_does_not_write_heartbeat_packets(self):
+        wrapper = _ssh.SSHClientWrapper()
+        client = self.Client()
+        wrapper._client = client
+
+        for _ in range(5):
+            self.assertIs(wrapper.ensure_client(), client)
+
+        self.assertEqual(client.transport.ignore_calls, 0)
+
+    def test_ensure_client_drops_inactive_transport(self):
+        wrapper = _ssh.SSHClientWrapper()
+        client = self.Client()
+        wrapper._client = client
+        client.transport.active = False
+        events = []
+        wrapper.connection_changed.connect(events.append)
+
+        with self.assertRaisesRegex(RuntimeError, "连接已断开"):
+            wrapper.ensure_client()
+
+        self.assertIsNone(wrapper._client)
+        self.assertEqual(events, [False])
+
+    def test_monitor_reports_dead_link_without_user_action(self):
+        wrapper = _ssh.SSHClientWrapper()
+        wrapper.LIVENESS_POLL_INTERVAL = 0.01
+        client = self.Client()
+        wrapper._client = client
+        disconnected = threading.Event()
+        wrapper.connection_changed.connect(
+            lambda connected: connected or disconnected.set(),
+            QtCore.Qt.DirectConnection,
+        )
+        wrapper._start_liveness_monitor(client)
+
+        client.transport.active = False
+
+        self.assertTrue(disconnected.wait(timeout=1))
+        self.assertIsNone(wrapper._client)
+        self.assertFalse(wrapper.is_connected())
+
+    def test_close_stops_monitor(self):
+        wrapper = _ssh.SSHClientWrapper()
+        wrapper.LIVENESS_POLL_INTERVAL = 0.01
+        client = self.Client()
+        wrapper._client = client
+        wrapper._start_liveness_monitor(client)
+        stop = wrapper._monitor_stop
+
+        wrapper.close()
+
+        self.assertTrue(stop.is_set())
+        self.assertIsNone(wrapper._monitor_stop)
+
+
+class SFTPChannelReuseTests(unittest.TestCase):
+    class Channel:
+        def __init__(self):
+            self.closed = False
+            self.transport = FakeTransport()
+
+        def get_transport(self):
+            return self.transport
+
+    class SFTP:
+        def __init__(self):
+            self.channel = SFTPChannelReuseTests.Channel()
+            self.close_calls = 0
+
+        def get_channel(self):
+            return self.channel
+
+        def stat(self, path):
+            if path == "/missing":
+                raise IOError(path)
+            return SimpleNamespace(st_mode=stat.S_IFREG | 0o644)
+
+        def normalize(self, path):
+            return f"/canonical{path}"
+
+        def close(self):
+            self.close_calls += 1
+            self.channel.closed = True
+
+    class Client:
+        def __init__(self):
+            self.transport = FakeTransport()
+            self.opened = []
+
+        def get_transport(self):
+            return self.transport
+
+        def open_sftp(self):
+            sftp = SFTPChannelReuseTests.SFTP()
+            self.opened.append(sftp)
+            return sftp
+
+    def _wrapper(self):
+        wrapper = _ssh.SSHClientWrapper()
+        client = self.Client()
+        wrapper._client = client
+        return wrapper, client
+
+    def test_consecutive_sftp_calls_share_one_channel(self):
+        wrapper, client = self._wrapper()
+
+        self.assertTrue(wrapper.file_exists("/present"))
+        self.assertFalse(wrapper.file_exists("/missing"))
+        self.assertEqual(wrapper.realpath("/books"), "/canonical/books")
+
+        self.assertEqual(len(client.opened), 1)
+        self.assertEqual(client.opened[0].close_calls, 0)
+        stats = wrapper.channel_stats()
+        self.assertEqual(stats["sftp_opened"], 1)
+        self.assertEqual(stats["sftp_reused"], 2)
+
+    def test_closed_channel_is_replaced_on_next_call(self):
+        wrapper, client = self._wrapper()
+        wrapper.file_exists("/present")
+        client.opened[0].channel.closed = True
+
+        wrapper.file_exists("/present")
+
+        self.assertEqual(len(client.opened), 2)
+        self.assertEqual(client.opened[0].close_calls, 1)
+        self.assertEqual(wrapper.channel_stats()["sftp_opened"], 2)
+
+    def test_channel_is_dropped_when_transport_dies_mid_session(self):
+        wrapper, client = self._wrapper()
+        with wrapper.sftp_session() as sftp:
+            sftp.channel.transport.is_active = lambda: False
+
+        self.assertEqual(client.opened[0].close_calls, 1)
+        self.assertIsNone(wrapper._sftp)
+
+    def test_disconnect_closes_pooled_channel(self):
+        wrapper, client = self._wrapper()
+        wrapper.file_exists("/present")
+
+        wrapper.close()
+
+        self.assertEqual(client.opened[0].close_calls, 1)
+        self.assertIsNone(wrapper._sftp)
+
+
+class SFTPTransferEngineTests(unittest.TestCase):
+    class SFTP:
+        def __init__(self, client):
+            self.client = client
+            self.closed = False
+
+        def put(self, local_path, remote_path, callback=None):
+            with self.client.lock:
+                self.client.active += 1
+                self.client.peak = max(self.client.peak, self.client.active)
+            try:
+                time.sleep(0.01)
+                failures = self.client.failures.get(remote_path, 0)
+                if failures:
+                    self.client.failures[remote_path] = failures - 1
+                    raise IOError(f"channel lost during {remote_path}")
+                size = os.path.getsize(local_path)
+                if callback:
+                    callback(size, size)
+                with self.client.lock:
+                    self.client.uploaded[remote_path] = self
+            finally:
+                with self.client.lock:
+                    self.client.active -= 1
+
+        def close(self):
+            self.closed = True
+
+    class Client:
+        def __init__(self):
+            self.transport = FakeTransport()
+            self.lock = threading.Lock()
+            self.opened = []
+            self.uploaded = {}
+            self.failures = {}
+            self.active = 0
+            self.peak = 0
+
+        def get_transport(self):
+            return self.transport
+
+        def open_sftp(self):
+            sftp = SFTPTransferEngineTests.SFTP(self)
+            self.opened.append(sftp)
+            return sftp
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.jobs = []
+        for index in range(6):
+            path = Path(self.tmp.name) / f"file{index}.bin"
+            path.write_bytes(b"x" * (index + 1) * 10)
+            self.jobs.append(
+                _ssh.TransferJob(str(path), f"/remote/file{index}.bin", (index + 1) * 10)
+            )
+        self.wrapper = _ssh.SSHClientWrapper()
+        self.client = self.Client()
+        self.wrapper._client = self.client
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_files_spread_over_bounded_parallel_channels(self):
+        progress = []
+
+        self.wrapper.transfer_files(
+            self.jobs, lambda done, total: progress.append((done, total)), max_channels=3
+        )
+
+        self.assertEqual(set(self.client.uploaded), {job.remote_path for job in self.jobs})
+        self.assertEqual(len(self.client.opened), 3)
+        self.assertLessEqual(self.client.peak, 3)
+        self.assertGreater(self.client.peak, 1)
+        self.assertTrue(all(sftp.closed for sftp in self.client.opened))
+        self.assertEqual(progress[0], (0, 210))
+        self.assertEqual(progress[-1], (210, 210))
+        self.assertEqual([done for done, _ in progress], sorted(done for done, _ in progress))
+        self.assertEqual(self.wrapper.channel_stats()["sftp_opened"], 3)
+
+    def test_failed_file_is_retried_on_a_fresh_channel(self):
+        self.client.failures["/remote/file2.bin"] = 1
+
+        self.wrapper.transfer_files(self.jobs, max_channels=2, retries=1)
+
+        self.assertEqual(len(self.client.uploaded), 6)
+        self.assertEqual(len(self.client.opened), 3)
+        self.assertIs(self.client.uploaded["/remote/file2.bin"], self.client.opened[2])
+        self.assertTrue(all(sftp.closed for sftp in self.client.opened))
+
+    def test_exhausted_retries_raise_after_workers_stop(self):
+        self.client.failures["/remote/file0.bin"] = 5
+
+        with self.assertRaisesRegex(IOError, "file0"):
+            self.wrapper.transfer_files(self.jobs, max_channels=2, retries=1)
+
+        self.assertNotIn("/remote/file0.bin", self.client.uploaded)
+        self.assertTrue(all(sftp.closed for sftp in self.client.opened))
+        self.assertEqual(self.client.active, 0)
+
+
+class TarStreamUploadTests(unittest.TestCase):
+    class Stream:
+        def __init__(self, client):
+            self.client = client
+            self.channel = self
+
+        def write(self, data):
+            self.client.archive.write(data)
+
+        def shutdown_write(self):
+            self.client.shutdown = True
+
+        def read(self):
+            return self.client.stderr
+
+        def recv_exit_status(self):
+            return self.client.exit_code
+
+    class Client:
+        def __init__(self, *, exit_code=0, stderr=b""):
+            self.transport = FakeTransport()
+            self.archive = BytesIO()
+            self.commands = []
+            self.exit_code = exit_code
+            self.stderr = stderr
+            self.shutdown = False
+
+        def get_transport(self):
+            return self.transport
+
+        def exec_command(self, command):
+            self.commands.append(command)
+            stream = TarStreamUploadTests.Stream(self)
+            return stream, stream, stream
+
+    class TarSSHClient(FakeTransferSSHClient):
+        SUPPORTS_TAR_UPLOAD = True
+
+        def __init__(self):
+            super().__init__()
+            self.tar_calls = []
+
+        def upload_tar(self, remote_root, jobs, progress_callback=None, *, directories=()):
+            self.tar_calls.append((remote_root, list(jobs), list(directories)))
+            total = sum(job.size for job in jobs)
+            if progress_callback:
+                progress_callback(total, total)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _job(self, name, data, remote_path):
+        path = self.root / name
+        path.write_bytes(data)
+        return _ssh.TransferJob(str(path), remote_path, len(data))
+
+    def test_archive_is_streamed_through_one_tar_channel(self):
+        wrapper = _ssh.SSHClientWrapper()
+        client = self.Client()
+        wrapper._client = client
+        jobs = [
+            self._job("a.pdf", b"%PDF" * 100, "/docs/a.pdf"),
+            self._job("a.content", b"{}", "/docs/a.content"),
+        ]
+        progress = []
+
+        wrapper.upload_tar(
+            "/docs/",
+            jobs,
+            lambda done, total: progress.append((done, total)),
+            directories=["/docs/a.thumbnails", "/docs/a.cache"],
+        )
+
+        self.assertEqual(client.commands, ["tar -x -o -f - -C /docs"])
+        self.assertTrue(client.shutdown)
+        self.assertEqual(wrapper.channel_stats()["exec_opened"], 1)
+        client.archive.seek(0)
+        with tarfile.open(fileobj=client.archive, mode="r|") as archive:
+            members = {
+                member.name: (
+                    member.isdir(),
+                    archive.extractfile(member).read() if member.isfile() else None,
+                )
+                for member in archive
+            }
+        self.assertEqual(
+            members,
+            {
+                "a.cache": (True, None),
+                "a.thumbnails": (True, None),
+                "a.pdf": (False, b"%PDF" * 100),
+                "a.content": (False, b"{}"),
+            },
+        )
+        self.assertEqual(progress[0], (0, 402))
+        self.assertEqual(progress[-1], (402, 402))
+        self.assertEqual([done for done, _ in progress], sorted(done for done, _ in progress))
+
+    def test_tar_failure_is_reported_with_remote_stderr(self):
+        wrapper = _ssh.SSHClientWrapper()
+        wrapper._client = self.Client(exit_code=1, stderr=b"tar: short write\n")
+
+        with self.assertRaisesRegex(RuntimeError, "short write"):
+            wrapper.upload_tar("/docs", [self._job("a.pdf", b"x", "/docs/a.pdf")])
+
+    def test_paths_outside_the_root_are_rejected_before_streaming(self):
+        wrapper = _ssh.SSHClientWrapper()
+        client = self.Client()
+        wrapper._client = client
+
+        with self.assertRaises(ValueError):
+            wrapper.upload_tar("/docs", [self._job("a.pdf", b"x", "/etc/a.pdf")])
+        self.assertEqual(client.commands, [])
+
+    def test_document_batches_use_tar_stream_when_available(self):
+        ssh_client = self.TarSSHClient()
+        widget = FakeTransferDocumentsWidget(ssh_client)
+        first_path = self.root / "first.pdf"
+        second_path = self.root / "second.epub"
+        first_path.write_bytes(TWO_PAGE_PDF)
+        second_path.write_bytes(b"fake epub bytes")
+
+        with mock.patch.object(
+            rmtool.uuid,
+            "uuid4",
+            side_effect=[
+                "11111111-1111-1111-1111-111111111111",
+                "22222222-2222-2222-2222-222222222222",
+            ],
+        ):
+            rmtool.DocumentsTab._transfer_documents_batch(
+                widget, [str(first_path), str(second_path)]
+            )
+
+        self.assertEqual(ssh_client.sftp.put_calls, 0)
+        self.assertEqual(len(ssh_client.tar_calls), 1)
+        remote_root, jobs, directories = ssh_client.tar_calls[0]
+        self.assertEqual(remote_root, rmtool.DOCUMENT_ROOT)
+        self.assertEqual(
+            sorted(posixpath.basename(job.remote_path) for job in jobs),
+            [
+                "11111111-1111-1111-1111-111111111111.content",
+                "11111111-1111-1111-1111-111111111111.metadata",
+                "11111111-1111-1111-1111-111111111111.pdf",
+                "22222222-2222-2222-2222-222222222222.content",
+                "22222222-2222-2222-2222-222222222222.epub",
+                "22222222-2222-2222-2222-222222222222.metadata",
+            ],
+        )
+        self.assertIn(
+            posixpath.join(rmtool.DOCUMENT_ROOT, "11111111-1111-1111-1111-111111111111.thumbnails"),
+            directories,
+        )
+
+
 class ConfigPersistenceTests(unittest.TestCase):
     def test_default_config_starts_empty_with_dark_theme(self):
         config = rmtool._default_config()
@@ -5660,7 +6550,7 @@ class DocumentWorkspaceUiTests(unittest.TestCase):
         ]
 
         widget._on_documents_loaded(documents)
-        widget.table.sortItems(0, QtCore.Qt.AscendingOrder)
+        widget.table.sortByColumn(0, QtCore.Qt.AscendingOrder)
         widget.table.selectRow(0)
         self._drain_background_tasks(widget)
 
@@ -5672,6 +6562,103 @@ class DocumentWorkspaceUiTests(unittest.TestCase):
         self.assertFalse(widget.empty_state_label.isHidden())
         self.assertEqual(widget.empty_state_label.text(), "没有匹配的文档，换个关键词试试。")
 
+    def test_document_table_filters_through_the_proxy_model(self):
+        widget = self._make_widget()
+        widget.set_connection_state(True)
+        names = ["Alpha Notes", "Alpine Trip", "Bravo", "ＡＬＰＳ"]
+        documents = [
+            self._make_document(name, ["pdf"], datetime(2026, 4, 10 + index, 9, 0))
+            for index, name in enumerate(names)
+        ]
+
+        widget._on_documents_loaded(documents)
+        self.assertEqual(widget.table_model.rowCount(), 4)
+
+        widget.search_edit.setText("al")
+        visible = {widget._document_for_row(row).name for row in range(widget.table_proxy.rowCount())}
+        self.assertEqual(visible, {"Alpha Notes", "Alpine Trip", "ＡＬＰＳ"})
+
+        widget.search_edit.setText("ALPI")
+        self.assertEqual(widget._document_for_row(0).name, "Alpine Trip")
+        self.assertEqual(widget.results_summary_label.text(), "显示 1 / 4 个文档")
+
+        widget.table.selectRow(0)
+        self.assertEqual(widget._selected_document().name, "Alpine Trip")
+        widget.search_edit.setText("bravo")
+        self.assertIsNone(widget._selected_document())
+
+        # A reload re-applies the current query to the new rows.
+        widget._on_documents_loaded(documents[:2])
+        self.assertEqual(widget.table_proxy.rowCount(), 0)
+        widget.search_edit.setText("")
+        self.assertEqual(widget.table_proxy.rowCount(), 2)
+
+    def test_document_search_ranks_pinyin_initials_and_near_misses(self):
+        widget = self._make_widget()
+        widget.set_connection_state(True)
+        names = ["三体", "山西地图", "Three Body Notes", "Meeting notes", "三体 手稿"]
+        documents = [
+            self._make_document(name, ["pdf"], datetime(2026, 4, 10 + index, 9, 0))
+            for index, name in enumerate(names)
+        ]
+        widget._on_documents_loaded(documents)
+
+        def shown():
+            return [widget._document_for_row(row).name for row in range(widget.table_proxy.rowCount())]
+
+        widget.search_edit.setText("sxd")
+        self.assertEqual(shown(), ["山西地图"])
+
+        widget.search_edit.setText("ST")
+        self.assertCountEqual(shown(), ["三体", "三体 手稿"])
+
+        widget.search_edit.setText("三体")
+        self.assertEqual(shown(), ["三体", "三体 手稿"])
+
+        # A typo still finds the document, and better matches stay on top
+        # whatever the column order.
+        widget.search_edit.setText("thre body")
+        self.assertEqual(shown(), ["Three Body Notes"])
+        widget.search_edit.setText("notes")
+        widget.table.sortByColumn(0, QtCore.Qt.DescendingOrder)
+        self.assertEqual(shown(), ["Three Body Notes", "Meeting notes"])
+        widget.search_edit.setText("meeting notes")
+        self.assertEqual(shown()[0], "Meeting notes")
+
+    def test_search_index_updates_incrementally_and_falls_back_to_gb2312_initials(self):
+        index = _search_index.SearchIndex()
+        index.update({"a": "三体", "b": "山西地图", "c": "Notes"})
+
+        with mock.patch.object(
+            _search_index, "search_keys", wraps=_search_index.search_keys
+        ) as search_keys:
+            index.update({"a": "三体", "b": "山西旅行", "d": "Draft"})
+        self.assertEqual(sorted(call.args[0] for call in search_keys.call_args_list), ["Draft", "山西旅行"])
+        self.assertEqual(len(index), 3)
+        self.assertEqual(set(index.search("sx")), {"b"})
+        self.assertEqual(index.search("sxd"), {})
+        self.assertIsNone(index.search("  "))
+
+        with mock.patch.object(_search_index, "pypinyin", None):
+            _search_index._reading.cache_clear()
+            try:
+                keys = _search_index.search_keys("三体：黑暗森林")
+            finally:
+                _search_index._reading.cache_clear()
+        self.assertEqual(keys.initials, "sthasl")
+        self.assertIsNone(keys.pinyin)
+
+    @unittest.skipIf(_search_index.pypinyin is None, "pypinyin is not installed")
+    def test_search_index_matches_full_pinyin(self):
+        index = _search_index.SearchIndex()
+        index.update({"a": "三体", "b": "三体 II：黑暗森林"})
+
+        self.assertEqual(
+            index.search("santi"),
+            {"a": _search_index.RANK_PINYIN_PREFIX, "b": _search_index.RANK_PINYIN_PREFIX},
+        )
+        self.assertEqual(set(index.search("hei an sen")), {"b"})
+
     def test_preview_failure_uses_non_modal_status_feedback(self):
         widget = self._make_widget()
         widget.set_connection_state(True)
@@ -5691,6 +6678,100 @@ class DocumentWorkspaceUiTests(unittest.TestCase):
         self.assertEqual(widget.preview_image.text(), "暂无可用预览")
         self.assertIn(("warning", "文档预览加载失败，可继续查看元数据。", 3000), messages)
 
+    def test_preview_covers_are_prefetched_and_cached_in_memory_and_on_disk(self):
+        buffer = BytesIO()
+        Image.new("RGB", (60, 80), "teal").save(buffer, format="PNG")
+        cover = buffer.getvalue()
+        names = ["Alpha", "Bravo", "Charlie", "Delta", "Echo"]
+        root = rmtool.DOCUMENT_ROOT
+
+        class FakeCoverSFTP:
+            def __init__(self):
+                self.opened = []
+
+            def listdir_attr(self, path):
+                if not path.endswith(".thumbnails"):
+                    raise IOError(path)
+                return [SimpleNamespace(filename="0.png", st_mtime=50, st_size=len(cover))]
+
+            def open(self, path, _mode="r"):
+                self.opened.append(path.rsplit("/", 2)[-2])
+                return BytesIO(cover)
+
+        documents = [
+            self._make_document(name, ["pdf"], datetime(2026, 4, 20 - index, 9, 0))
+            for index, name in enumerate(names)
+        ]
+
+        with tempfile.TemporaryDirectory() as state_dir, mock.patch.object(
+            rmtool, "app_state_dir", return_value=Path(state_dir)
+        ):
+            widget = self._make_widget()
+            widget.ssh_client.connection_info = {"host": "10.11.99.1"}
+            widget.ssh_client.sftp = FakeCoverSFTP()
+            widget.set_connection_state(True)
+            widget._on_documents_loaded(documents)
+
+            rows = [
+                f"{widget._document_for_row(row).identifier}.thumbnails"
+                for row in range(widget.table.model().rowCount())
+            ]
+
+            widget.table.selectRow(1)
+            self._drain_background_tasks(widget)
+            self.assertEqual(widget.preview_image.text(), "")
+            self.assertEqual(sorted(widget.ssh_client.sftp.opened), sorted(rows[:4]))
+
+            # The neighbour was prefetched: its preview shows before any
+            # background task runs.
+            widget.table.selectRow(2)
+            self.assertEqual(widget.preview_image.text(), "")
+            self.assertIsNotNone(widget._preview_cover)
+            self._drain_background_tasks(widget)
+            self.assertEqual(sorted(widget.ssh_client.sftp.opened), sorted(rows))
+
+            # A new tab for the same device reads covers from the disk cache.
+            reopened = self._make_widget()
+            reopened.ssh_client.connection_info = {"host": "10.11.99.1"}
+            reopened.ssh_client.sftp = FakeCoverSFTP()
+            reopened.set_connection_state(True)
+            reopened._on_documents_loaded(documents)
+            reopened.table.selectRow(0)
+            self._drain_background_tasks(reopened)
+
+        self.assertEqual(reopened.preview_image.text(), "")
+        self.assertEqual(reopened.ssh_client.sftp.opened, [])
+
+    def test_preview_sources_list_only_the_requested_documents(self):
+        widget = self._make_widget()
+        widget.set_connection_state(True)
+        documents = [
+            self._make_document(f"Doc {index}", ["pdf"], datetime(2026, 4, 20 - index, 9, 0))
+            for index in range(10)
+        ]
+        widget._on_documents_loaded(documents)
+        identifiers = [widget._document_for_row(row).identifier for row in range(10)]
+        listed = []
+
+        def list_document_covers(_client, _sftp, items):
+            self.assertFalse(widget._cover_sources_lock.locked())
+            listed.append([item.identifier for item in items])
+            return {
+                item.identifier: _cover_cache.CoverSource(item.identifier, f"/{item.identifier}.png", 1, 2)
+                for item in items
+                if item.identifier != identifiers[1]
+            }
+
+        with mock.patch.object(rmtool, "list_document_covers", side_effect=list_document_covers):
+            sources = widget._preview_sources(identifiers[:3])
+            self.assertEqual(sorted(sources), sorted([identifiers[0], identifiers[2]]))
+            # Resolved ids, with or without a thumbnail, are not listed again.
+            widget._preview_sources(identifiers[1:4])
+
+        self.assertEqual(listed, [identifiers[:3], [identifiers[3]]])
+        self.assertEqual(widget._preview_stamp(identifiers[3]), "1-2")
+        self.assertIsNone(widget._preview_stamp(identifiers[1]))
+
     def test_upload_finished_asks_before_restarting_xochitl(self):
         widget = self._make_widget()
 
@@ -5985,15 +7066,169 @@ class DocumentTransferTests(unittest.TestCase):
             available_assets=["note"],
         )
 
+        progress = []
         with tempfile.TemporaryDirectory() as temp_root:
             output_pdf = Path(temp_root) / "export.pdf"
-            rmtool.DocumentsTab._perform_export(widget, item, str(output_pdf))
+            cache = rmrl.PageCache(Path(temp_root) / "render-cache")
+            with mock.patch.object(rmtool, "render_cache", return_value=cache):
+                rmtool.DocumentsTab._perform_export(
+                    widget,
+                    item,
+                    str(output_pdf),
+                    progress_callback=lambda done, total: progress.append((done, total)),
+                )
 
             self.assertTrue(output_pdf.exists())
             self.assertEqual(rmtool.pdf_page_count(str(output_pdf)), 2)
+            # Both pages have the same strokes, so the second is a cache hit.
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(progress, [(0, 2), (1, 2), (2, 2)])
 
         self.assertIn(f"{rmtool.DOCUMENT_ROOT}/{identifier}.note", ssh_client.sftp.get_calls)
 
+    def test_repeat_exports_only_download_changed_notebook_files(self):
+        identifier = "mirror-doc"
+        root = rmtool.DOCUMENT_ROOT
+        files = {
+            f"{root}/{identifier}.content": [
+                json.dumps({"pages": ["page-1", "page-2"], "pageDimensions": [1404, 1872]}).encode(),
+                1000,
+            ],
+            f"{root}/{identifier}/page-1.rm": [build_rm_v5_page(), 1000],
+            f"{root}/{identifier}/page-2.rm": [build_rm_v5_page(), 1000],
+            f"{root}/{identifier}/old-page.rm": [build_rm_v5_page(), 1000],
+            f"{root}/other.content": [b"{}", 1000],
+        }
+        ssh_client = FakeMirrorSSHClient(files)
+        widget = mock.Mock()
+        widget.ssh_client = ssh_client
+        item = rmtool.DocumentItem(
+            identifier=identifier,
+            name="Notebook",
+            doc_type="DocumentType",
+            updated=datetime(2026, 4, 15, 9, 0),
+            available_assets=["rm"],
+        )
+
+        with tempfile.TemporaryDirectory() as temp_root, mock.patch.object(
+            rmtool, "app_state_dir", return_value=Path(temp_root) / "state"
+        ), mock.patch.object(
+            rmtool, "render_cache", return_value=rmrl.PageCache(Path(temp_root) / "cache")
+        ):
+            output_pdf = Path(temp_root) / "export.pdf"
+
+            def export():
+                ssh_client.sftp.get_calls.clear()
+                rmtool.DocumentsTab._perform_export(widget, item, str(output_pdf))
+                return sorted(path.rsplit("/", 1)[-1] for path in ssh_client.sftp.get_calls)
+
+            self.assertEqual(
+                export(), ["mirror-doc.content", "old-page.rm", "page-1.rm", "page-2.rm"]
+            )
+            self.assertEqual(export(), [])
+
+            changed = build_rm_v5_page().replace(struct.pack("<f", 160.0), struct.pack("<f", 600.0))
+            files[f"{root}/{identifier}/page-2.rm"] = [changed + b"\0" * 4, 2000]
+            # Touched but unchanged: resolved by hash without a download.
+            files[f"{root}/{identifier}/page-1.rm"][1] = 2000
+            del files[f"{root}/{identifier}/old-page.rm"]
+
+            self.assertEqual(export(), ["page-2.rm"])
+            self.assertEqual(ssh_client.hashed, [f"{root}/{identifier}/page-1.rm"])
+            mirror = rmtool.export_mirror_for(ssh_client, identifier)
+            self.assertFalse((mirror.root / identifier / "old-page.rm").exists())
+            self.assertEqual(
+                (mirror.root / identifier / "page-1.rm").stat().st_mtime, 2000
+            )
+            self.assertEqual(rmtool.pdf_page_count(str(output_pdf)), 2)
+
+            self.assertEqual(export(), [])
+            self.assertEqual(len(ssh_client.hashed), 1)
+
+    def test_export_mirrors_are_capped_pruned_and_report_missing_pages(self):
+        root = rmtool.DOCUMENT_ROOT
+        files = {
+            f"{root}/{identifier}/page-1.rm": [b"x" * 100, 1000]
+            for identifier in ("oldest", "old", "recent")
+        }
+        ssh_client = FakeMirrorSSHClient(files)
+
+        def item(identifier):
+            return rmtool.DocumentItem(identifier, identifier, "DocumentType", None, ["rm"])
+
+        with tempfile.TemporaryDirectory() as temp_root, mock.patch.object(
+            rmtool, "app_state_dir", return_value=Path(temp_root)
+        ), mock.patch.object(_export_mirror, "MIRROR_MAX_BYTES", 350):
+            mirrors = {}
+            for stamp, identifier in enumerate(("oldest", "old", "recent")):
+                mirrors[identifier] = rmtool.export_mirror_for(ssh_client, identifier)
+                _tab_documents._sync_export_mirror(ssh_client, item(identifier), mirrors[identifier])
+                os.utime(mirrors[identifier].root, (stamp, stamp))
+            # A fourth notebook goes over 350 bytes: the least recently
+            # synced mirror is dropped, the one just synced never is.
+            files[f"{root}/new/page-1.rm"] = [b"x" * 100, 1000]
+            mirrors["new"] = rmtool.export_mirror_for(ssh_client, "new")
+            _tab_documents._sync_export_mirror(ssh_client, item("new"), mirrors["new"])
+            self.assertEqual(
+                {name for name, mirror in mirrors.items() if mirror.root.is_dir()},
+                {"old", "recent", "new"},
+            )
+
+            # A listing without a notebook removes its mirror, except while
+            # an export holds it.
+            listing = [SimpleNamespace(filename=f"{name}.metadata") for name in ("recent", "new")]
+            with mirrors["new"].lock:
+                rmtool.prune_export_mirrors(ssh_client, listing[:1])
+            self.assertFalse(mirrors["old"].root.exists())
+            self.assertTrue(mirrors["new"].root.is_dir())
+
+            # A notebook with no files on the device still gets a mirror
+            # root, so rendering reports the missing pages.
+            empty = rmtool.export_mirror_for(ssh_client, "empty")
+            source = _tab_documents._sync_export_mirror(ssh_client, item("empty"), empty)
+            with self.assertRaisesRegex(rmrl.RmrlError, "未找到任何 .rm 页面"):
+                rmrl.render_notebook_to_pdf(source, str(Path(temp_root) / "out.pdf"))
+
+    def test_embedded_rmrl_reads_archives_without_extracting(self):
+        with tempfile.TemporaryDirectory() as temp_root:
+            archive_path = Path(temp_root) / "notebook.zip"
+            with zipfile.ZipFile(archive_path, "w") as archive:
+                archive.writestr(
+                    "notebook/doc.content",
+                    json.dumps({"pages": ["page-2", "page-1"], "pageDimensions": [1404, 1872]}),
+                )
+                archive.writestr("notebook/doc/page-1.rm", build_rm_v5_page())
+                archive.writestr("notebook/doc/page-2.rm", build_rm_v5_page())
+                archive.writestr("__MACOSX/notebook/._doc.content", b"junk")
+            workspace = Path(temp_root) / "workspace"
+            workspace.mkdir()
+            output_pdf = Path(temp_root) / "export.pdf"
+
+            with mock.patch.object(zipfile.ZipFile, "extractall") as extractall:
+                rmrl.render_notebook_to_pdf(
+                    str(archive_path), str(output_pdf), workspace=str(workspace), jobs=2
+                )
+
+            extractall.assert_not_called()
+            self.assertEqual(list(workspace.iterdir()), [])
+            self.assertEqual(rmtool.pdf_page_count(str(output_pdf)), 2)
+
+            # A .note archive next to the .content file in a directory source.
+            notebook_root = Path(temp_root) / "mirror"
+            notebook_root.mkdir()
+            (notebook_root / "doc.content").write_text(
+                json.dumps({"pages": ["page-2", "page-1"]}), encoding="utf-8"
+            )
+            with zipfile.ZipFile(notebook_root / "doc.note", "w") as archive:
+                archive.writestr("page-1.rm", build_rm_v5_page())
+                archive.writestr("page-2.rm", build_rm_v5_page())
+
+            pages = rmrl._collect_pages(notebook_root)
+
+            self.assertEqual([page.path.name for page in pages], ["page-2.rm", "page-1.rm"])
+            self.assertEqual(rmrl._parse_rm(pages[0].path)[1], (10.0, 10.0, 120.0, 160.0))
+            self.assertEqual(sorted(path.name for path in notebook_root.iterdir()), ["doc.content", "doc.note"])
+
     def test_embedded_rmrl_finds_nested_pages_from_content_order(self):
         with tempfile.TemporaryDirectory() as temp_root:
             notebook_root = Path(temp_root) / "notebook"
@@ -6012,6 +7247,316 @@ class DocumentTransferTests(unittest.TestCase):
             self.assertTrue(output_pdf.exists())
             self.assertEqual(rmtool.pdf_page_count(str(output_pdf)), 2)
 
+    def test_embedded_rmrl_streams_pages_and_discards_partial_output(self):
+        with tempfile.TemporaryDirectory() as temp_root:
+            notebook_root = Path(temp_root) / "notebook"
+            notebook_root.mkdir()
+            for name in ("page-1", "page-2", "page-3"):
+                (notebook_root / f"{name}.rm").write_bytes(build_rm_v5_page())
+            output_pdf = Path(temp_root) / "export.pdf"
+            written = []
+            real_add_page = rmrl.PdfStreamWriter.add_image_page
+
+            def add_page(writer, image, resolution=300.0):
+                written.append(Path(writer.path).stat().st_size)
+                real_add_page(writer, image, resolution)
+
+            with mock.patch.object(rmrl.PdfStreamWriter, "add_image_page", add_page):
+                rmrl.render_notebook_to_pdf(str(notebook_root), str(output_pdf))
+
+            self.assertEqual(rmtool.pdf_page_count(str(output_pdf)), 3)
+            # Earlier pages are already on disk when later ones are added.
+            self.assertLess(written[0], written[1])
+            self.assertLess(written[1], written[2])
+            self.assertFalse(Path(f"{output_pdf}.part").exists())
+
+            (notebook_root / "page-2.rm").write_bytes(b"reMarkable .lines file, version=5" + b"\0" * 8)
+            broken_pdf = Path(temp_root) / "broken.pdf"
+            with self.assertRaises(rmrl.RmrlError):
+                rmrl.render_notebook_to_pdf(str(notebook_root), str(broken_pdf))
+            self.assertFalse(broken_pdf.exists())
+            self.assertFalse(Path(f"{broken_pdf}.part").exists())
+
+    def test_embedded_rmrl_parallel_jobs_keep_page_order(self):
+        with tempfile.TemporaryDirectory() as temp_root:
+            notebook_root = Path(temp_root) / "notebook"
+            notebook_root.mkdir()
+            names = [f"page-{index}" for index in range(5)]
+            for index, name in enumerate(names):
+                page = build_rm_v5_page().replace(
+                    struct.pack("<f", 120.0), struct.pack("<f", 120.0 + 150.0 * index)
+                )
+                (notebook_root / f"{name}.rm").write_bytes(page)
+            (notebook_root / "doc.content").write_text(
+                json.dumps({"pages": names, "pageDimensions": [1404, 1872]}),
+                encoding="utf-8",
+            )
+            serial_pdf = Path(temp_root) / "serial.pdf"
+            parallel_pdf = Path(temp_root) / "parallel.pdf"
+            progress = []
+
+            rmrl.render_notebook_to_pdf(str(notebook_root), str(serial_pdf))
+            rmrl.render_notebook_to_pdf(
+                str(notebook_root),
+                str(parallel_pdf),
+                progress_callback=lambda done, total: progress.append((done, total)),
+                jobs=2,
+            )
+
+            self.assertEqual(parallel_pdf.read_bytes(), serial_pdf.read_bytes())
+            self.assertEqual(progress, [(index, 5) for index in range(6)])
+
+            (notebook_root / "page-3.rm").write_bytes(b"reMarkable .lines file, version=5" + b"\0" * 8)
+            broken_pdf = Path(temp_root) / "broken.pdf"
+            with self.assertRaises(rmrl.RmrlError):
+                rmrl.render_notebook_to_pdf(str(notebook_root), str(broken_pdf), jobs=2)
+            self.assertFalse(broken_pdf.exists())
+            self.assertFalse(Path(f"{broken_pdf}.part").exists())
+
+    def test_embedded_rmrl_parallel_archive_render_matches_serial(self):
+        with tempfile.TemporaryDirectory() as temp_root:
+            archive_path = Path(temp_root) / "notebook.zip"
+            names = [f"page-{index}" for index in range(12)]
+            with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as archive:
+                archive.writestr(
+                    "doc.content",
+                    json.dumps({"pages": names, "pageDimensions": [1404, 1872]}),
+                )
+                for index, name in enumerate(names):
+                    archive.writestr(
+                        f"doc/{name}.rm",
+                        build_rm_v5_page().replace(
+                            struct.pack("<f", 120.0),
+                            struct.pack("<f", 120.0 + 100.0 * index),
+                        ),
+                    )
+            serial_pdf = Path(temp_root) / "serial.pdf"
+            parallel_pdf = Path(temp_root) / "parallel.pdf"
+
+            rmrl.render_notebook_to_pdf(str(archive_path), str(serial_pdf))
+            # The parent opens the archive while collecting pages, before the
+            # pool forks; workers must not share that handle's file offset.
+            rmrl.render_notebook_to_pdf(str(archive_path), str(parallel_pdf), jobs=2)
+
+            self.assertEqual(parallel_pdf.read_bytes(), serial_pdf.read_bytes())
+
+            inherited = rmrl._open_archive(str(archive_path), retain=True)
+            try:
+                with mock.patch.object(
+                    rmrl, "_open_archives", rmrl._open_archives
+                ), mock.patch.object(rmrl, "_open_archives_lock", rmrl._open_archives_lock):
+                    rmrl._forget_inherited_archives()
+                    own = rmrl._open_archive(str(archive_path))
+                    self.assertIsNot(own, inherited)
+                    own.close()
+                self.assertIs(rmrl._open_archive(str(archive_path)), inherited)
+            finally:
+                rmrl._release_archive(str(archive_path))
+
+    def test_embedded_rmrl_sources_keep_shared_archives_open_until_all_clean_up(self):
+        with tempfile.TemporaryDirectory() as temp_root:
+            archive_path = Path(temp_root) / "notebook.zip"
+            with zipfile.ZipFile(archive_path, "w") as archive:
+                archive.writestr("doc/page-1.rm", build_rm_v5_page())
+
+            first = rmrl._NotebookSource(str(archive_path))
+            second = rmrl._NotebookSource(str(archive_path))
+            # A read already in flight in the second source uses the same
+            # handle the first one releases.
+            shared = rmrl._open_archive(str(archive_path))
+            first.cleanup()
+            self.assertEqual(shared.read("doc/page-1.rm"), build_rm_v5_page())
+            with second.get("page-1.rm").open() as handle:
+                self.assertEqual(handle.read(), build_rm_v5_page())
+            second.cleanup()
+            self.assertNotIn(str(archive_path), rmrl._open_archives)
+
+    def test_rmrl_cli_passes_jobs_to_renderer(self):
+        from rmrl import __main__ as rmrl_cli
+
+        with mock.patch.object(rmrl_cli, "render_notebook_to_pdf") as render:
+            self.assertEqual(rmrl_cli.main(["render", "nb.zip", "out.pdf", "--jobs", "4"]), 0)
+            self.assertEqual(rmrl_cli.main(["nb.zip", "out.pdf", "--backend", "vector"]), 0)
+            self.assertEqual(rmrl_cli.main(["export", "nb.zip", "out.pdf", "--pages", "2-3,1"]), 0)
+            self.assertEqual(rmrl_cli.main(["render", "nb.zip", "out.pdf", "--pages", "3-1"]), 1)
+
+        self.assertEqual(
+            render.call_args_list,
+            [
+                mock.call("nb.zip", "out.pdf", None, jobs=4, backend="raster", pages=None),
+                mock.call("nb.zip", "out.pdf", None, jobs=None, backend="vector", pages=None),
+                mock.call("nb.zip", "out.pdf", None, jobs=None, backend="raster", pages=[1, 2, 0]),
+            ],
+        )
+
+    def test_embedded_rmrl_renders_page_subsets_and_thumbnails(self):
+        from rmrl import __main__ as rmrl_cli
+
+        with tempfile.TemporaryDirectory() as temp_root:
+            notebook_root = Path(temp_root) / "notebook"
+            notebook_root.mkdir()
+            for name in ("page-1", "page-2", "page-3"):
+                (notebook_root / f"{name}.rm").write_bytes(build_rm_v5_page())
+            output_pdf = Path(temp_root) / "subset.pdf"
+
+            rmrl.render_notebook_to_pdf(str(notebook_root), str(output_pdf), pages=[2, 0])
+            self.assertEqual(rmtool.pdf_page_count(str(output_pdf)), 2)
+            with self.assertRaisesRegex(rmrl.RmrlError, "页码超出范围：4"):
+                rmrl.render_notebook_to_pdf(str(notebook_root), str(output_pdf), pages=[3])
+
+            thumbnails = rmrl.render_page_thumbnails(str(notebook_root), pages=[1], size=128)
+            self.assertEqual(len(thumbnails), 1)
+            image = Image.open(BytesIO(thumbnails[0]))
+            self.assertEqual((image.format, image.size), ("PNG", (96, 128)))
+            self.assertLess(image.convert("L").getextrema()[0], 128)
+
+            thumbs_dir = Path(temp_root) / "thumbs"
+            argv = ["thumbnails", str(notebook_root), str(thumbs_dir), "--pages", "1,3", "--size", "64"]
+            self.assertEqual(rmrl_cli.main(argv), 0)
+            self.assertEqual(
+                sorted(path.name for path in thumbs_dir.iterdir()), ["page-001.png", "page-003.png"]
+            )
+
+        self.assertEqual(rmrl.parse_page_spec("1-3, 5"), [0, 1, 2, 4])
+        for spec in ("0", "x", "4-2", ","):
+            with self.assertRaises(ValueError):
+                rmrl.parse_page_spec(spec)
+
+    def test_embedded_rmrl_vector_backend_writes_stroke_paths(self):
+        with tempfile.TemporaryDirectory() as temp_root:
+            notebook_root = Path(temp_root) / "notebook"
+            notebook_root.mkdir()
+            for name in ("page-1", "page-2"):
+                (notebook_root / f"{name}.rm").write_bytes(build_rm_v5_page())
+            raster_pdf = Path(temp_root) / "raster.pdf"
+            vector_pdf = Path(temp_root) / "vector.pdf"
+
+            rmrl.render_notebook_to_pdf(str(notebook_root), str(raster_pdf))
+            rmrl.render_notebook_to_pdf(str(notebook_root), str(vector_pdf), jobs=2, backend="vector")
+
+            self.assertEqual(rmtool.pdf_page_count(str(vector_pdf)), 2)
+            data = vector_pdf.read_bytes()
+            self.assertNotIn(b"/DCTDecode", data)
+            self.assertLess(len(data) * 10, raster_pdf.stat().st_size)
+            start = data.index(b"stream\n") + len(b"stream\n")
+            content = zlib.decompress(data[start:data.index(b"\nendstream", start)]).decode()
+            self.assertIn("1 J 1 j", content)
+            self.assertIn("10.0 10.0 m\n120.0 160.0 l\nS", content)
+            self.assertIn("/MediaBox [0 0 336.96 449.28]", data.decode("latin-1"))
+
+            with self.assertRaises(ValueError):
+                rmrl.render_notebook_to_pdf(str(notebook_root), str(vector_pdf), backend="svg")
+
+    def test_embedded_rmrl_cache_rerenders_only_changed_pages(self):
+        with tempfile.TemporaryDirectory() as temp_root:
+            notebook_root = Path(temp_root) / "notebook"
+            notebook_root.mkdir()
+            for name in ("page-1", "page-2", "page-3"):
+                (notebook_root / f"{name}.rm").write_bytes(build_rm_v5_page())
+            (notebook_root / "page-3.rm").write_bytes(
+                build_rm_v5_page().replace(struct.pack("<f", 160.0), struct.pack("<f", 900.0))
+            )
+            cache = rmrl.PageCache(Path(temp_root) / "cache")
+            first_pdf = Path(temp_root) / "first.pdf"
+            second_pdf = Path(temp_root) / "second.pdf"
+            real_render = rmrl._render_page
+
+            rmrl.render_notebook_to_pdf(str(notebook_root), str(first_pdf), cache=cache)
+            # Identical pages share one entry.
+            self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+            (notebook_root / "page-1.rm").write_bytes(
+                build_rm_v5_page().replace(struct.pack("<f", 120.0), struct.pack("<f", 700.0))
+            )
+            with mock.patch.object(rmrl, "_render_page", side_effect=real_render) as render:
+                rmrl.render_notebook_to_pdf(str(notebook_root), str(second_pdf), cache=cache)
+
+            self.assertEqual(render.call_count, 1)
+            self.assertEqual((cache.hits, cache.misses), (3, 3))
+            self.assertEqual(rmtool.pdf_page_count(str(second_pdf)), 3)
+
+            parallel_pdf = Path(temp_root) / "parallel.pdf"
+            rmrl.render_notebook_to_pdf(str(notebook_root), str(parallel_pdf), cache=cache, jobs=2)
+            self.assertEqual((cache.hits, cache.misses), (6, 3))
+            self.assertEqual(parallel_pdf.read_bytes(), second_pdf.read_bytes())
+
+            vector_pdf = Path(temp_root) / "vector.pdf"
+            rmrl.render_notebook_to_pdf(str(notebook_root), str(vector_pdf), cache=cache, backend="vector")
+            rmrl.render_notebook_to_pdf(str(notebook_root), str(second_pdf), cache=cache, backend="vector")
+            self.assertEqual(second_pdf.read_bytes(), vector_pdf.read_bytes())
+
+    def test_page_cache_evicts_least_recently_used_entries(self):
+        with tempfile.TemporaryDirectory() as temp_root:
+            cache = rmrl.PageCache(Path(temp_root), max_bytes=300)
+            for index, key in enumerate(("aa01", "bb02", "cc03")):
+                cache.put(key, bytes(100))
+                stamp = time.time() - 100 + index
+                os.utime(cache._path(key), (stamp, stamp))
+
+            self.assertEqual(cache.get("aa01"), bytes(100))
+            cache.put("dd04", bytes(100))
+
+            self.assertIsNone(cache.get("bb02"))
+            self.assertIsNone(cache.get("cc03"))
+            self.assertEqual(cache.get("aa01"), bytes(100))
+            self.assertEqual(cache.get("dd04"), bytes(100))
+            self.assertEqual(cache.size(), 200)
+
+    def test_embedded_rmrl_collects_pages_from_one_directory_walk(self):
+        with tempfile.TemporaryDirectory() as temp_root:
+            notebook_root = Path(temp_root)
+            identifiers = [f"page-{index:03d}" for index in range(300)]
+            (notebook_root / "doc").mkdir()
+            for identifier in identifiers:
+                (notebook_root / "doc" / f"{identifier}.rm").write_bytes(b"")
+            (notebook_root / "doc" / "stray.rm").write_bytes(b"")
+            order = list(reversed(identifiers)) + ["missing-page"]
+            (notebook_root / "doc.content").write_text(json.dumps({"pages": order}), encoding="utf-8")
+
+            real_walk = os.walk
+            with mock.patch.object(rmrl.os, "walk", side_effect=real_walk) as walk, mock.patch.object(
+                Path, "rglob", side_effect=AssertionError("rglob")
+            ), mock.patch.object(Path, "resolve", side_effect=AssertionError("resolve")):
+                pages = rmrl._collect_pages(notebook_root)
+
+            self.assertEqual(walk.call_count, 1)
+            self.assertEqual(
+                [page.path.stem for page in pages], list(reversed(identifiers)) + ["stray"]
+            )
+
+    def test_rmrl_bench_covers_every_format_and_flags_regressions(self):
+        from rmrl import bench
+
+        with tempfile.TemporaryDirectory() as temp_root:
+            for page_format in bench.FORMATS:
+                page_path = Path(temp_root) / f"{page_format}.rm"
+                page_path.write_bytes(bench.build_page(page_format, strokes=3, points=5))
+                layers, _bounds = rmrl._parse_rm(page_path)
+                self.assertEqual([len(stroke) for stroke in layers[0].strokes], [5, 5, 5], page_format)
+
+        results = bench.run_benchmarks(
+            formats=("v5", "fallback"), backends=("vector",), pages=2, strokes=4, points=6
+        )
+        self.assertEqual([(r.format, r.backend, r.points) for r in results], [
+            ("v5", "vector", 48),
+            ("fallback", "vector", 48),
+        ])
+        self.assertTrue(all(r.output_bytes > 0 and r.render_seconds > 0 for r in results))
+        self.assertTrue(all(r.peak_memory_bytes > 0 for r in results))
+
+        # Worker processes are invisible to tracemalloc, so no peak is claimed.
+        parallel = bench.run_benchmarks(
+            formats=("v5",), backends=("vector",), pages=2, strokes=4, points=6, jobs=2
+        )
+        self.assertIsNone(parallel[0].peak_memory_bytes)
+        self.assertIn("         -", bench._format_table(parallel))
+
+        baseline = [dict(vars(r), render_seconds=r.render_seconds / 4) for r in results]
+        self.assertEqual(bench.find_regressions(results, baseline, tolerance=10.0), [])
+        regressions = bench.find_regressions(results, baseline, tolerance=0.5)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn("v5/vector render_seconds", regressions[0])
+
     def test_embedded_rmrl_uses_cpages_page_order(self):
         with tempfile.TemporaryDirectory() as temp_root:
             notebook_root = Path(temp_root) / "notebook"
@@ -6097,6 +7642,148 @@ class DocumentTransferTests(unittest.TestCase):
         self.assertEqual(len(draw.lines[0][0]), 3)
         self.assertEqual(draw.lines[0][3], "curve")
 
+    def test_embedded_rmrl_rasterizes_variable_width_strokes_at_native_size(self):
+        page = rmrl.PageInfo(path=Path("page.rm"), width=600, height=400)
+        layers = [
+            rmrl.Layer(
+                [
+                    rmrl.Stroke(
+                        color=0,
+                        brush=0,
+                        segments=[
+                            rmrl.Segment(100.0 + 40.0 * i, 200.3, 2.0 + 2.0 * i, 1.0, 0.0)
+                            for i in range(11)
+                        ],
+                    )
+                ]
+            )
+        ]
+
+        def ink_height(image, x):
+            return sum(1 for y in range(image.height) if image.getpixel((x, y)) < 128)
+
+        images = []
+        for numpy_module in (rmrl._np, None):
+            if numpy_module is None and rmrl._np is None:
+                continue
+            with mock.patch.object(rmrl, "_np", numpy_module):
+                images.append(rmrl._render_page(page, layers, (100.0, 200.3, 500.0, 200.3)))
+
+        for image in images:
+            self.assertEqual(image.size, (600, 400))
+            self.assertIsNotNone(image.point(lambda value: 255 if value < 128 else 0).getbbox())
+
+        if rmrl._np is None:
+            return
+        image = images[0]
+        self.assertLess(ink_height(image, 120), ink_height(image, 300))
+        self.assertLess(ink_height(image, 300), ink_height(image, 480))
+        # Outline pixels are partially covered rather than snapped to black.
+        column = [image.getpixel((300, y)) for y in range(image.height)]
+        self.assertTrue(any(0 < value < 255 for value in column))
+        self.assertEqual(image.getpixel((300, 200)), 0)
+        self.assertEqual(image.getpixel((300, 100)), 255)
+
+    def test_embedded_rmrl_stroke_coverage_does_not_depend_on_point_density(self):
+        if rmrl._np is None:
+            self.skipTest("numpy is not installed")
+        from rmrl import _raster
+
+        np = rmrl._np
+
+        def coverage(points, strokes=1):
+            t = np.tile(np.linspace(0.0, 1.0, points), strokes)
+            polygons = _raster.stroke_polygons(
+                10.0 + 80.0 * t, np.full(len(t), 20.3), 2.0 + 6.0 * t, [points] * strokes
+            )
+            canvas = np.zeros((40, 100))
+            _raster.fill_strokes(canvas, polygons, 1.0)
+            return canvas
+
+        sparse = coverage(2)
+        self.assertTrue(((sparse > 0) & (sparse < 1)).any())
+        for points in (3, 17, 60):
+            np.testing.assert_allclose(coverage(points), sparse, atol=1e-6)
+        # Strokes drawn over each other keep their anti-aliased edges.
+        np.testing.assert_allclose(coverage(17, strokes=2), sparse, atol=1e-6)
+
+    def test_embedded_rmrl_clips_strokes_that_leave_the_canvas(self):
+        if rmrl._np is None:
+            self.skipTest("numpy is not installed")
+        from rmrl import _raster
+
+        np = rmrl._np
+        # Both ends of the diagonal lie off the page.
+        polygons = _raster.stroke_polygons(
+            np.array([-50.0, 150.0]), np.array([-20.0, 120.0]), np.full(2, 4.0), [2]
+        )
+        canvas = np.zeros((100, 100))
+        _raster.fill_strokes(canvas, polygons, 1.0)
+        larger = np.zeros((300, 300))
+        _raster.fill_strokes(larger, (polygons[0] + 100.0, polygons[1] + 100.0, polygons[2]), 1.0)
+
+        self.assertGreater(canvas.sum(), 100.0)
+        np.testing.assert_allclose(canvas, larger[100:200, 100:200], atol=1e-6)
+
+    def test_embedded_rmrl_decodes_segment_blocks_with_and_without_numpy(self):
+        header = b"reMarkable .lines file, version=5" + (b" " * 9) + b"\n"
+        points = [(float(i), float(200 - i), 0.0, 0.0, 2.0 + i, 0.5) for i in range(5)]
+        body = (
+            struct.pack("<BBH", 1, 0, 0)
+            + struct.pack("<I", 1)
+            + struct.pack("<IIIfII", 3, 1, 0, 2.0, 0, len(points))
+            + b"".join(struct.pack("<ffffff", *point) for point in points)
+        )
+        with tempfile.TemporaryDirectory() as temp_root:
+            page_path = Path(temp_root) / "page.rm"
+            page_path.write_bytes(header + body)
+            truncated_path = Path(temp_root) / "truncated.rm"
+            truncated_path.write_bytes(header + body[:-4])
+
+            results = []
+            for numpy_module in (rmrl._np, None):
+                if numpy_module is None and rmrl._np is None:
+                    continue
+                with mock.patch.object(rmrl, "_np", numpy_module):
+                    layers, bounds = rmrl._parse_rm(page_path)
+                    with self.assertRaisesRegex(rmrl.RmrlError, "越界"):
+                        rmrl._parse_rm(truncated_path)
+                results.append((layers, bounds))
+
+        for layers, bounds in results:
+            stroke = layers[0].strokes[0]
+            self.assertEqual((stroke.brush, stroke.color), (3, 1))
+            self.assertEqual(bounds, (0.0, 196.0, 4.0, 200.0))
+            self.assertEqual(
+                list(stroke.segments),
+                [rmrl.Segment(x, y, width, pressure, 0.0) for x, y, _s, _d, width, pressure in points],
+            )
+
+    @unittest.skipIf(rmrl._np is None, "NumPy is not installed")
+    def test_embedded_rmrl_stroke_columns_do_not_view_the_page_buffer(self):
+        for count in (1, 3):
+            with self.subTest(count=count):
+                data = memoryview(
+                    b"".join(
+                        rmrl._RM_SEGMENT_FALLBACK.pack(
+                            *(float(i),) * (rmrl._RM_SEGMENT_FALLBACK.size // 4)
+                        )
+                        for i in range(count)
+                    )
+                )
+                columns, _end = rmrl._decode_segments(
+                    data,
+                    count,
+                    0,
+                    rmrl._RM_SEGMENT_FALLBACK,
+                    rmrl._SEGMENT_FIELDS_FALLBACK,
+                    "越界",
+                )
+                stroke = rmrl.Stroke(1, 3, **columns)
+                for column in (stroke.x, stroke.y, stroke.width, stroke.pressure):
+                    self.assertIsNone(column.base)
+                    self.assertEqual(len(column), count)
+
     def test_embedded_rmrl_can_render_valid_v5_rm_page(self):
         with tempfile.TemporaryDirectory() as temp_root:
             notebook_root = Path(temp_root) / "notebook"
@@ -6129,6 +7816,23 @@ class DocumentTransferTests(unittest.TestCase):
             self.assertTrue(output_pdf.exists())
             self.assertGreater(output_pdf.stat().st_size, 0)
 
+    def test_embedded_rmrl_strokes_keep_points_in_compact_columns(self):
+        with tempfile.TemporaryDirectory() as temp_root:
+            page_path = Path(temp_root) / "page.rm"
+            page_path.write_bytes(build_rm_v6_page())
+            layers, _bounds = rmrl._parse_rm(page_path)
+
+        stroke = layers[0].strokes[0]
+        self.assertGreaterEqual(len(stroke), 2)
+        for column in (stroke.x, stroke.y, stroke.width, stroke.pressure):
+            self.assertEqual(len(column), len(stroke))
+            self.assertEqual(getattr(column, "itemsize", None), 4)
+        self.assertFalse(hasattr(stroke, "__dict__"))
+
+        rebuilt = rmrl.Stroke(stroke.color, stroke.brush, stroke.segments)
+        self.assertEqual(rebuilt.segments, stroke.segments)
+        self.assertEqual(rebuilt.bounds(), stroke.bounds())
+
 
 if __name__ == "__main__":
     unittest.main()
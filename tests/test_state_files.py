@@ -0,0 +1,32 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import _state_files
+
+
+class StateFilesTests(unittest.TestCase):
+    def test_safe_name_keeps_one_path_component(self):
+        self.assertEqual(_state_files.safe_name("10.11.99.1:22/root"), "10.11.99.1_22_root")
+        self.assertEqual(_state_files.safe_name(".."), "device")
+
+    def test_failed_atomic_write_keeps_the_old_file_and_no_temp(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "nested" / "entry"
+            _state_files.write_atomic(path, b"old")
+            with self.assertRaises(RuntimeError):
+                with _state_files.atomic_path(path) as temp_path:
+                    temp_path.write_bytes(b"partial")
+                    raise RuntimeError("interrupted")
+            self.assertEqual(path.read_bytes(), b"old")
+            self.assertEqual(sorted(p.name for p in path.parent.iterdir()), ["entry"])
+
+    def test_shared_instances_are_created_once_per_path(self):
+        instances = _state_files.SharedInstances(lambda path: [path])
+        first = instances.get(Path("a"))
+        self.assertIs(instances.get(Path("a")), first)
+        self.assertIsNot(instances.get(Path("b")), first)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -334,6 +334,24 @@ class TapPageTurnTests(unittest.TestCase):
         for path in tap._RUNTIME_PATHS:
             self.assertIn(f"{tap.REMOTE_BASE}/{path}", launcher)
 
+    def test_payload_check_reports_modified_runtime_file(self):
+        package = self.package()
+        launcher_sha = hashlib.sha256(tap._launcher(package).encode()).hexdigest()
+        dropin_sha = hashlib.sha256(tap._dropin(package).encode()).hexdigest()
+        marker = json.loads(tap._marker(package, launcher_sha, dropin_sha))
+        hashes = {tap.DROPIN_PATH: dropin_sha, tap.LAUNCHER_PATH: launcher_sha}
+        for item in package.files:
+            hashes[f"{tap.REMOTE_BASE}/{item.path}"] = item.sha256
+        with patch.object(tap, "_read_marker", return_value=marker), patch.object(
+            tap, "_remote_sha256", side_effect=lambda _ssh, path: hashes[path]
+        ):
+            self.assertEqual(tap._payload_valid(FakeSSH(), package), (True, ""))
+            hashes[f"{tap.REMOTE_BASE}/xovi.so"] = "0" * 64
+            self.assertEqual(
+                tap._payload_valid(FakeSSH(), package),
+                (False, "运行资源 xovi.so 已被修改"),
+            )
+
     def test_launcher_recognizes_every_supported_platform(self):
         launcher = tap._launcher(self.package())
         for machine, platform in (